@@ -0,0 +1,204 @@
+# The Signal Engine - Configuración
+# Todos los parámetros ajustables se leen de variables de entorno (ver docker-compose.yml)
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str, default: str) -> list:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+# --- POOL DE NAVEGADORES (Playwright) ---
+# Páginas concurrentes disponibles (= navegaciones simultáneas máximas)
+BROWSER_POOL_SIZE = _env_int("BROWSER_POOL_SIZE", 4)
+# Procesos Chromium entre los que se reparten las páginas
+BROWSER_POOL_BROWSERS = _env_int("BROWSER_POOL_BROWSERS", 1)
+# Reciclamos el navegador tras N navegaciones (fugas de memoria de Chromium)
+BROWSER_MAX_NAVIGATIONS = _env_int("BROWSER_MAX_NAVIGATIONS", 200)
+# Segundos que una petición espera por una página libre antes de rendirse (backpressure)
+BROWSER_ACQUIRE_TIMEOUT = _env_float("BROWSER_ACQUIRE_TIMEOUT", 10.0)
+
+# --- NAVEGACIÓN PLAYWRIGHT: bloqueo de recursos y perfiles por dominio ---
+# Tipos de recurso que se abortan (solo necesitamos el texto del DOM)
+BROWSER_BLOCK_RESOURCES = _env_list("BROWSER_BLOCK_RESOURCES", "image,media,font,stylesheet")
+# Dominios de publicidad/analítica abortados (incluye subdominios)
+BROWSER_TRACKER_DOMAINS = _env_list(
+    "BROWSER_TRACKER_DOMAINS",
+    "google-analytics.com,googletagmanager.com,googlesyndication.com,googleadservices.com,doubleclick.net,"
+    "adservice.google.com,facebook.net,connect.facebook.net,amazon-adsystem.com,scorecardresearch.com,"
+    "hotjar.com,segment.io,segment.com,mixpanel.com,criteo.com,criteo.net,taboola.com,outbrain.com,"
+    "quantserve.com,chartbeat.com,adnxs.com,rubiconproject.com,pubmatic.com,moatads.com,clarity.ms",
+)
+# Perfil por defecto de cada navegación
+NAVIGATION_WAIT_UNTIL = os.getenv("NAVIGATION_WAIT_UNTIL", "domcontentloaded")
+NAVIGATION_TIMEOUT_MS = _env_int("NAVIGATION_TIMEOUT_MS", 15000)
+# Perfiles por dominio: JSON en línea o ruta a un archivo .json, p. ej.
+# {"lento.com": {"wait_until": "networkidle", "timeout_ms": 30000},
+#  "estatico.org": {"javascript": false, "viewport": {"width": 800, "height": 600}, "block_resources": ["image"]}}
+NAVIGATION_PROFILES = os.getenv("NAVIGATION_PROFILES", "")
+
+# --- TIER HTTP (httpx, sin navegador) ---
+HTTP_FETCH_TIMEOUT = _env_float("HTTP_FETCH_TIMEOUT", 10.0)
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = _env_int("HTTP_MAX_KEEPALIVE", 20)
+# Conexiones simultáneas máximas contra un mismo host (cortesía + evita baneos)
+HTTP_MAX_PER_HOST = _env_int("HTTP_MAX_PER_HOST", 4)
+# No descargamos más de esto por página en el tier HTTP
+HTTP_MAX_BYTES = _env_int("HTTP_MAX_BYTES", 5_000_000)
+# Por debajo de estos caracteres de texto limpio escalamos a Playwright
+HTTP_MIN_TEXT_CHARS = _env_int("HTTP_MIN_TEXT_CHARS", 500)
+# Cuánto recordamos qué tier funcionó para cada dominio (segundos) y cuántos dominios
+DOMAIN_TIER_TTL = _env_int("DOMAIN_TIER_TTL", 6 * 3600)
+DOMAIN_TIER_MAX_ENTRIES = _env_int("DOMAIN_TIER_MAX_ENTRIES", 10000)
+
+# --- EXTRACCIÓN DE TEXTO ---
+# "stream": una pasada con lxml que para al llenar el presupuesto; "soup": árbol BeautifulSoup completo
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "stream")
+# Caracteres de texto limpio que se conservan por página (los largos se trocean antes del LLM)
+EXTRACT_MAX_CHARS = _env_int("EXTRACT_MAX_CHARS", 100_000)
+
+# --- DOCUMENTOS LARGOS (troceado + map-reduce en el scorer) ---
+# Textos más largos que esto se trocean; los demás se evalúan enteros en una sola llamada
+CHUNK_MIN_DOC_CHARS = _env_int("CHUNK_MIN_DOC_CHARS", 15000)
+# Tamaño objetivo y máximo de cada fragmento (se corta en párrafos/encabezados)
+CHUNK_TARGET_CHARS = _env_int("CHUNK_TARGET_CHARS", 2000)
+CHUNK_MAX_CHARS = _env_int("CHUNK_MAX_CHARS", 4000)
+# Fragmentos más salientes que se evalúan (en paralelo) y presupuesto total de caracteres
+CHUNK_MAX_SELECTED = _env_int("CHUNK_MAX_SELECTED", 3)
+CHUNK_BUDGET_CHARS = _env_int("CHUNK_BUDGET_CHARS", 6000)
+# Peso de la relevancia respecto al tópico frente a la densidad informativa (TF-IDF)
+CHUNK_TOPIC_WEIGHT = _env_float("CHUNK_TOPIC_WEIGHT", 0.7)
+
+# --- CACHÉ DE VEREDICTOS (Gemini) ---
+# Entradas en memoria (LRU por proceso)
+VERDICT_CACHE_SIZE = _env_int("VERDICT_CACHE_SIZE", 2048)
+# Vida de un veredicto en la caché compartida (Postgres), en segundos
+VERDICT_CACHE_TTL = _env_int("VERDICT_CACHE_TTL", 7 * 24 * 3600)
+# Vida máxima de una entrada en memoria: un clear() en otra réplica llega a este proceso en ese plazo
+VERDICT_CACHE_MEMORY_TTL = _env_int("VERDICT_CACHE_MEMORY_TTL", 300)
+
+# --- BATCH (/api/v1/analyze/batch) ---
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 100)
+# Límite de concurrencia independiente por etapa del pipeline
+BATCH_NAVIGATE_CONCURRENCY = _env_int("BATCH_NAVIGATE_CONCURRENCY", 8)
+BATCH_SCORE_CONCURRENCY = _env_int("BATCH_SCORE_CONCURRENCY", 4)
+BATCH_EMBED_CONCURRENCY = _env_int("BATCH_EMBED_CONCURRENCY", 8)
+
+# --- COLA DE TRABAJOS (/api/v1/jobs) ---
+# Workers asíncronos por proceso que consumen la cola de Postgres
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)
+# Segundos entre sondeos cuando la cola está vacía
+JOB_POLL_INTERVAL = _env_float("JOB_POLL_INTERVAL", 1.0)
+# Un trabajo "running" más viejo que esto se considera huérfano (worker caído) y se reintenta
+JOB_VISIBILITY_TIMEOUT = _env_int("JOB_VISIBILITY_TIMEOUT", 300)
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_WEBHOOK_TIMEOUT = _env_float("JOB_WEBHOOK_TIMEOUT", 10.0)
+
+# --- DEDUPLICACIÓN SEMÁNTICA (pgvector) ---
+SEMANTIC_DEDUP_ENABLED = _env_bool("SEMANTIC_DEDUP_ENABLED", True)
+# Distancia coseno máxima (1 - similitud) para reutilizar el veredicto de otro ítem
+SEMANTIC_DEDUP_MAX_DISTANCE = _env_float("SEMANTIC_DEDUP_MAX_DISTANCE", 0.05)
+
+# --- ÍNDICE VECTORIAL (pgvector) sobre content_history.embedding ---
+# "hnsw" (mejor recall/latencia) o "ivfflat" (construcción más barata)
+VECTOR_INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw")
+HNSW_M = _env_int("HNSW_M", 16)
+HNSW_EF_CONSTRUCTION = _env_int("HNSW_EF_CONSTRUCTION", 64)
+# Candidatos explorados por consulta (más alto = más recall, más latencia)
+HNSW_EF_SEARCH = _env_int("HNSW_EF_SEARCH", 40)
+IVFFLAT_LISTS = _env_int("IVFFLAT_LISTS", 100)
+IVFFLAT_PROBES = _env_int("IVFFLAT_PROBES", 10)
+
+# --- BASE DE DATOS ---
+# Pool de conexiones (por engine: síncrono para endpoints de lectura, asíncrono para el pipeline)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+# Segundos esperando una conexión libre antes de fallar
+DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 10.0)
+# Reciclar conexiones más viejas que esto (evita cortes silenciosos de NAT/pgbouncer)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+# Aplicar las migraciones de Alembic al arrancar (con advisory lock: seguro con varias réplicas).
+# En despliegues con paso de migración propio (`alembic upgrade head`), desactivar
+DB_AUTO_MIGRATE = _env_bool("DB_AUTO_MIGRATE", True)
+# Si Postgres no responde al arrancar se reintenta con backoff exponencial (segundos, tope)
+DB_WARMUP_BACKOFF = _env_float("DB_WARMUP_BACKOFF", 1.0)
+DB_WARMUP_MAX_BACKOFF = _env_float("DB_WARMUP_MAX_BACKOFF", 30.0)
+
+# --- ESCRITURA DIFERIDA DEL HISTORIAL (write-behind) ---
+# Filas por INSERT multi-fila
+HISTORY_WRITER_BATCH_SIZE = _env_int("HISTORY_WRITER_BATCH_SIZE", 100)
+# Segundos máximos que una fila espera en el buffer antes de escribirse
+HISTORY_WRITER_FLUSH_INTERVAL = _env_float("HISTORY_WRITER_FLUSH_INTERVAL", 0.5)
+# Tamaño del buffer; si se llena, submit() espera (backpressure)
+HISTORY_WRITER_MAX_BUFFER = _env_int("HISTORY_WRITER_MAX_BUFFER", 5000)
+
+# --- CUOTA DE GEMINI (compartida por ContentScorer y EmbeddingService) ---
+GEMINI_RPM = _env_int("GEMINI_RPM", 60)
+GEMINI_TPM = _env_int("GEMINI_TPM", 1_000_000)
+# Concurrencia adaptativa (AIMD): arranca en el máximo y se reduce a la mitad ante RESOURCE_EXHAUSTED
+GEMINI_MAX_CONCURRENCY = _env_int("GEMINI_MAX_CONCURRENCY", 16)
+GEMINI_MIN_CONCURRENCY = _env_int("GEMINI_MIN_CONCURRENCY", 1)
+# Tokens de salida que reservamos por llamada al LLM (el JSON del veredicto)
+GEMINI_OUTPUT_TOKENS_ESTIMATE = _env_int("GEMINI_OUTPUT_TOKENS_ESTIMATE", 300)
+
+# --- EMBEDDINGS ---
+# Peticiones concurrentes que llegan dentro de esta ventana (ms) viajan en un solo aembed_documents
+EMBEDDING_BATCH_WINDOW_MS = _env_float("EMBEDDING_BATCH_WINDOW_MS", 10.0)
+# Máximo de textos por llamada (límite de batchEmbedContents)
+EMBEDDING_BATCH_MAX = _env_int("EMBEDDING_BATCH_MAX", 100)
+# Vectores en la LRU en memoria (float32: ~3 KB cada uno a 768 dimensiones)
+EMBEDDING_CACHE_SIZE = _env_int("EMBEDDING_CACHE_SIZE", 10000)
+
+# --- PRE-FILTRO LOCAL (antes del LLM) ---
+PREFILTER_ENABLED = _env_bool("PREFILTER_ENABLED", True)
+# Probabilidad de ruido a partir de la cual se bloquea sin llamar a Gemini
+PREFILTER_BLOCK_THRESHOLD = _env_float("PREFILTER_BLOCK_THRESHOLD", 0.95)
+# Probabilidad de ruido por debajo de la cual se muestra sin Gemini (0 = nunca: no evalúa el tópico)
+PREFILTER_SHOW_THRESHOLD = _env_float("PREFILTER_SHOW_THRESHOLD", 0.0)
+# Fracción de veredictos locales confiados que se auditan igualmente contra el LLM
+PREFILTER_SAMPLE_RATE = _env_float("PREFILTER_SAMPLE_RATE", 0.05)
+
+# --- REPUTACIÓN DE DOMINIOS (trusted_sources + historial de veredictos) ---
+DOMAIN_REPUTATION_ENABLED = _env_bool("DOMAIN_REPUTATION_ENABLED", True)
+# Segundos entre recargas del índice desde Postgres
+DOMAIN_REPUTATION_REFRESH = _env_int("DOMAIN_REPUTATION_REFRESH", 300)
+# Ventana del historial por dominio
+DOMAIN_HISTORY_DAYS = _env_int("DOMAIN_HISTORY_DAYS", 30)
+# Un dominio se bloquea sin navegar con al menos N veredictos y esta proporción de BLOCK
+DOMAIN_BLOCK_MIN_ITEMS = _env_int("DOMAIN_BLOCK_MIN_ITEMS", 20)
+DOMAIN_BLOCK_RATIO = _env_float("DOMAIN_BLOCK_RATIO", 0.95)
+# Fuentes con base_trust_score >= esto se muestran sin llamar a Gemini
+DOMAIN_TRUST_FAST_TRACK = _env_float("DOMAIN_TRUST_FAST_TRACK", 0.9)
+# Peso del base_trust_score en el quality_score del resto de fuentes de confianza
+DOMAIN_TRUST_WEIGHT = _env_float("DOMAIN_TRUST_WEIGHT", 0.2)
+
+# --- STREAMING (/api/v1/analyze/stream) ---
+# Cuánto espera el veredicto al embedding (para reutilizar un casi-duplicado) antes de ir al LLM sin él
+STREAM_DEDUP_WAIT_MS = _env_float("STREAM_DEDUP_WAIT_MS", 250.0)
+
+# --- INTERESES DE USUARIO (fan-out multi-tenant) ---
+INTEREST_INDEX_ENABLED = _env_bool("INTEREST_INDEX_ENABLED", True)
+# Segundos entre recargas del índice en memoria (intereses nuevos o editados)
+INTEREST_INDEX_REFRESH = _env_int("INTEREST_INDEX_REFRESH", 300)
+# Similitud coseno mínima entre el ítem y un interés para entregárselo al usuario
+INTEREST_MIN_SIMILARITY = _env_float("INTEREST_MIN_SIMILARITY", 0.5)
+
+# --- OBSERVABILIDAD (logs + métricas + trazas) ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" (legible) o "json" (una línea por evento, con los campos de `extra`)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Nivel de los logs por ítem (navegación, etapas del pipeline). WARNING los silencia sin tocar el resto
+HOT_PATH_LOG_LEVEL = os.getenv("HOT_PATH_LOG_LEVEL", "INFO").upper()
+# Spans de OpenTelemetry por etapa (requiere opentelemetry-api; exportador vía SDK / opentelemetry-instrument)
+OTEL_ENABLED = _env_bool("OTEL_ENABLED", False)
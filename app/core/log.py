@@ -0,0 +1,61 @@
+# The Signal Engine - Logging estructurado
+# Texto legible por defecto o JSON por línea (LOG_FORMAT=json); los campos pasados en
+# `extra=` viajan como claves propias en ambos formatos.
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+from app.core import config
+
+# Loggers que emiten una línea por ítem analizado (se silencian con HOT_PATH_LOG_LEVEL=WARNING)
+HOT_PATH_LOGGERS = ("app.services.analysis_pipeline", "app.services.source_navigator")
+
+# Atributos estándar de LogRecord: todo lo demás viene de `extra`
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def configure_logging(level: str = config.LOG_LEVEL, fmt: str = config.LOG_FORMAT,
+                      hot_path_level: str = config.HOT_PATH_LOG_LEVEL):
+    """Un único handler a stdout en el logger `app` (uvicorn conserva su propia configuración)."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers[:] = [handler]
+    app_logger.setLevel(level)
+    app_logger.propagate = False
+    # Nunca más detallado que el nivel global
+    hot_path = max(logging.getLevelName(level), logging.getLevelName(hot_path_level))
+    for name in HOT_PATH_LOGGERS:
+        logging.getLogger(name).setLevel(hot_path)
@@ -1,5 +1,6 @@
 # The Signal Engine - System Prompts
 # Define la personalidad del "Editor Despiadado"
+import hashlib
 
 RUTHLESS_EDITOR_PROMPT = """
 Eres el EDITOR JEFE de "The Signal Engine". Tu misión es filtrar contenido basándote en un contexto y categoría específicos.
@@ -31,3 +32,18 @@ CRITERIOS DE RECHAZO:
 - Contenido superficial o rumores.
 - Ventas agresivas sin valor educativo.
 """
+
+# Contexto para evaluar un documento largo por fragmentos (map-reduce en ContentScorer):
+# cada fragmento es uno de los más relevantes del documento, no su comienzo.
+CHUNK_CONTEXT = """
+NOTA: Es un documento largo. Recibes el FRAGMENTO {index} de {total} seleccionados por relevancia
+(no es el comienzo del texto). Evalúa la calidad del documento a partir de este fragmento.
+"""
+
+# Tópico de los análisis sin `topic` (multi-tenant): se puntúa la calidad una sola vez
+# y la relevancia para cada usuario la deciden sus intereses (app/services/interest_index.py)
+GENERAL_TOPIC = "General: evalúa la calidad y el valor del contenido sin un tema concreto"
+
+# Versión del prompt: cambia automáticamente al editar el texto e invalida
+# los veredictos cacheados con la versión anterior.
+PROMPT_VERSION = hashlib.sha256(RUTHLESS_EDITOR_PROMPT.encode("utf-8")).hexdigest()[:12]
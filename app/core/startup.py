@@ -0,0 +1,64 @@
+# The Signal Engine - Arranque en segundo plano
+# La app acepta conexiones en cuanto importa; los subsistemas pesados (migraciones,
+# Chromium, clientes de Gemini...) se calientan después y /api/v1/ready informa del progreso.
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class Readiness:
+    """Estado de calentamiento de cada subsistema."""
+
+    def __init__(self, subsystems: Iterable[str]):
+        self.started = time.monotonic()
+        self.subsystems = {name: {"status": PENDING} for name in subsystems}
+
+    async def warm(self, name: str, warm_up: Callable[[], Awaitable]) -> bool:
+        """Ejecuta `warm_up()` y registra su duración. Un fallo se informa, no tumba la app."""
+        self.subsystems[name] = {"status": WARMING}
+        start = time.monotonic()
+        try:
+            await warm_up()
+        except Exception as e:
+            self.subsystems[name] = {"status": FAILED, "error": f"{type(e).__name__}: {e}",
+                                     "seconds": round(time.monotonic() - start, 3)}
+            logger.error(f"❌ No se pudo iniciar {name}: {e}")
+            return False
+        seconds = round(time.monotonic() - start, 3)
+        self.subsystems[name] = {"status": READY, "seconds": seconds,
+                                 "since_start": round(time.monotonic() - self.started, 3)}
+        logger.info("✅ Subsistema listo", extra={"subsystem": name, "seconds": seconds})
+        return True
+
+    async def warm_until_ready(self, name: str, warm_up: Callable[[], Awaitable],
+                               backoff: float = 1.0, max_backoff: float = 30.0):
+        """
+        Como `warm`, pero reintenta con backoff exponencial hasta que funcione
+        (p. ej. Postgres aún no acepta conexiones al arrancar). El estado muestra los intentos.
+        """
+        attempts = 1
+        while not await self.warm(name, warm_up):
+            self.subsystems[name]["attempts"] = attempts
+            self.subsystems[name]["retry_in"] = backoff
+            await asyncio.sleep(backoff)
+            attempts += 1
+            backoff = min(backoff * 2, max_backoff)
+
+    @property
+    def ready(self) -> bool:
+        return all(state["status"] == READY for state in self.subsystems.values())
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "subsystems": {name: dict(state) for name, state in self.subsystems.items()},
+        }
@@ -0,0 +1,88 @@
+# The Signal Engine - Telemetría
+# Métricas Prometheus (expuestas en /metrics) y, opcionalmente, trazas OpenTelemetry.
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+from app.core import config
+
+try:
+    # Opcional: solo la API. Exportador y muestreo se configuran con el SDK
+    # (p. ej. `opentelemetry-instrument uvicorn app.main:app` + OTEL_EXPORTER_OTLP_ENDPOINT)
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # pragma: no cover
+    _otel_trace = None
+
+_tracer = _otel_trace.get_tracer("signal_engine") if (_otel_trace is not None and config.OTEL_ENABLED) else None
+
+# Desde una caché en memoria (µs) hasta una navegación lenta con Playwright (decenas de s)
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+_SIZE_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+
+STAGE_SECONDS = Histogram(
+    "signal_stage_seconds", "Duración de cada etapa del análisis", ["stage"], buckets=_LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("signal_stage_errors_total", "Etapas que terminaron con excepción", ["stage"])
+RETRIES = Counter("signal_retries_total", "Reintentos por operación", ["operation"])
+CACHE_LOOKUPS = Counter(
+    "signal_cache_lookups_total", "Consultas a cachés por resultado (memory, db, miss)", ["cache", "result"]
+)
+VERDICTS = Counter(
+    "signal_verdicts_total", "Veredictos por origen (llm, cache, semantic, prefilter, domain, fallback)",
+    ["source", "decision"],
+)
+LLM_TOKENS = Counter("signal_llm_tokens_total", "Tokens de Gemini informados por la API", ["model", "kind"])
+PAYLOAD_CHARS = Histogram(
+    "signal_payload_chars", "Tamaño de los datos que se mueven (html, text, prompt)", ["kind"], buckets=_SIZE_BUCKETS
+)
+
+# Callbacks (stage, segundos) además de Prometheus: p. ej. los benchmarks, que quieren percentiles exactos
+_stage_listeners = []
+
+
+def add_stage_listener(callback):
+    _stage_listeners.append(callback)
+
+
+def remove_stage_listener(callback):
+    _stage_listeners.remove(callback)
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Mide un bloque (síncrono o dentro de una corrutina) en signal_stage_seconds{stage}
+    y, con OTEL_ENABLED, lo registra también como span de OpenTelemetry.
+    """
+    start = time.perf_counter()
+    otel = _tracer.start_as_current_span(f"signal.{stage}", attributes=attributes) if _tracer else None
+    if otel is not None:
+        otel.__enter__()
+    try:
+        yield
+    except BaseException as e:
+        STAGE_ERRORS.labels(stage).inc()
+        if otel is not None:
+            otel.__exit__(type(e), e, e.__traceback__)
+            otel = None
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        for callback in _stage_listeners:
+            callback(stage, elapsed)
+        if otel is not None:
+            otel.__exit__(None, None, None)
+
+
+def observe_tokens(model: str, usage: dict):
+    """usage_metadata de LangChain: {"input_tokens": .., "output_tokens": .., ...}."""
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(model, kind.replace("_tokens", "")).inc(usage[kind])
+
+
+def render_metrics():
+    """(cuerpo, content-type) para el endpoint /metrics."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,45 @@
+# Migraciones del esquema con Alembic (app/db/migrations).
+# La app las aplica al arrancar (DB_AUTO_MIGRATE); también: `alembic upgrade head`.
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# Clave del advisory lock: varias réplicas/workers arrancando a la vez migran de uno en uno
+MIGRATION_LOCK_KEY = 74_001_019
+
+
+def alembic_config():
+    # Import diferido: Alembic solo hace falta al migrar, no para servir peticiones
+    from alembic.config import Config
+
+    cfg = Config()
+    cfg.set_main_option("script_location", MIGRATIONS_DIR)
+    return cfg
+
+
+def run_migrations(engine: Engine, revision: str = "head"):
+    """Lleva el esquema a `revision` en una sola transacción, serializada entre procesos."""
+    from alembic import command
+
+    cfg = alembic_config()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, revision)
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    run_migrations(engine)
+    print(f"✅ Esquema en la revisión {current_revision(engine)}")
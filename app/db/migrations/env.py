@@ -0,0 +1,42 @@
+# Entorno de Alembic: misma URL y metadata que la app.
+# Desde la app (app/db/migrate.py) la conexión llega ya abierta en config.attributes["connection"].
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db import models  # noqa: F401 (registra las tablas en Base.metadata)
+from app.db.session import DATABASE_URL, Base, engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("connection") is None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """`alembic upgrade head --sql`: genera el SQL sin conectarse."""
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection):
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.begin() as connection:
+        _run(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,124 @@
+"""Esquema inicial (antes docker/init.sql + Base.metadata.create_all)
+
+Idempotente: las instalaciones creadas con init.sql o con create_all ya tienen
+estas tablas y solo quedan marcadas en alembic_version.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS vector",
+    # Usuarios
+    """CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        total_time_saved_minutes INTEGER DEFAULT 0,
+        focus_score DECIMAL(3,2) DEFAULT 5.0
+    )""",
+    # Taxonomía + datos semilla
+    """CREATE TABLE IF NOT EXISTS category_taxonomy (
+        code VARCHAR(20) PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        priority_level INTEGER,
+        description TEXT
+    )""",
+    """INSERT INTO category_taxonomy (code, name, priority_level, description) VALUES
+        ('PROFESIONAL', 'Crecimiento Profesional', 1, 'Papers, documentación, noticias de industria, tutoriales técnicos'),
+        ('OCIO_SANO', 'Ocio Creativo/Salud', 2, 'Recetas, ejercicios, arte, gaming de estrategia'),
+        ('NOTICIAS', 'Noticias Generales', 3, 'Actualidad verificada, clima, tráfico'),
+        ('RUIDO', 'Basura Digital', 4, 'Chismes, polémicas, virales vacíos, clickbait')
+    ON CONFLICT (code) DO NOTHING""",
+    # Intereses del usuario
+    """CREATE TABLE IF NOT EXISTS user_interests (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        keyword VARCHAR(100),
+        category_code VARCHAR(20) REFERENCES category_taxonomy(code),
+        min_quality_threshold DECIMAL(3,2) DEFAULT 0.7,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )""",
+    # Fuentes confiables
+    """CREATE TABLE IF NOT EXISTS trusted_sources (
+        id SERIAL PRIMARY KEY,
+        domain VARCHAR(100) UNIQUE,
+        base_trust_score DECIMAL(3,2) DEFAULT 1.0
+    )""",
+    # Historial unificado (el índice HNSW lo gestiona app/db/vector_index.py con parámetros de config)
+    """CREATE TABLE IF NOT EXISTS content_history (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        source_url TEXT NOT NULL,
+        title TEXT,
+        content_summary TEXT,
+        signal_score DECIMAL(3,2),
+        is_signal BOOLEAN,
+        rejection_reason TEXT,
+        category_code VARCHAR(20),
+        estimated_read_time_seconds INTEGER,
+        time_saved_seconds INTEGER,
+        embedding vector(768),
+        analyzed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_content_history_is_signal_id ON content_history (is_signal, id)",
+    "CREATE INDEX IF NOT EXISTS ix_content_history_category_id ON content_history (category_code, id)",
+    "CREATE INDEX IF NOT EXISTS ix_content_history_analyzed_at ON content_history (analyzed_at)",
+    # Caché de veredictos
+    """CREATE TABLE IF NOT EXISTS verdict_cache (
+        cache_key VARCHAR(64) PRIMARY KEY,
+        prompt_version VARCHAR(16) NOT NULL,
+        verdict JSONB NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_verdict_cache_prompt_version ON verdict_cache (prompt_version)",
+    "CREATE INDEX IF NOT EXISTS ix_verdict_cache_expires_at ON verdict_cache (expires_at)",
+    # Cola de trabajos
+    """CREATE TABLE IF NOT EXISTS analysis_jobs (
+        id UUID PRIMARY KEY,
+        status VARCHAR(20) NOT NULL DEFAULT 'queued',
+        payload JSONB NOT NULL,
+        result JSONB,
+        error TEXT,
+        error_code INTEGER,
+        webhook_url TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP WITH TIME ZONE,
+        finished_at TIMESTAMP WITH TIME ZONE
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_analysis_jobs_status_created_at ON analysis_jobs (status, created_at)",
+    # KPIs agregados (día x categoría)
+    """CREATE TABLE IF NOT EXISTS content_stats_daily (
+        day DATE NOT NULL,
+        category_code VARCHAR(20) NOT NULL,
+        total_items INTEGER NOT NULL DEFAULT 0,
+        blocked_items INTEGER NOT NULL DEFAULT 0,
+        time_saved_seconds BIGINT NOT NULL DEFAULT 0,
+        score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, category_code)
+    )""",
+]
+
+TABLES = ["content_stats_daily", "analysis_jobs", "verdict_cache", "content_history",
+          "trusted_sources", "user_interests", "category_taxonomy", "users"]
+
+
+def upgrade():
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f"DROP TABLE IF EXISTS {table}")
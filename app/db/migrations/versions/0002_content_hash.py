@@ -0,0 +1,23 @@
+"""content_history.content_hash: caché de embeddings direccionada por contenido
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # sha256 del texto vectorizado (ver app/services/embedding_service.py)
+    op.execute("ALTER TABLE content_history ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_content_history_content_hash ON content_history (content_hash)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_content_history_content_hash")
+    op.execute("ALTER TABLE content_history DROP COLUMN IF EXISTS content_hash")
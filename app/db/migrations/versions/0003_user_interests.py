@@ -0,0 +1,58 @@
+"""Multi-tenant: embeddings de intereses, fan-out por usuario y KPIs por usuario
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+STATEMENTS = [
+    # Vector de cada interés (ver app/services/interest_index.py) y hash del texto vectorizado:
+    # si cambia la keyword se vuelve a calcular en la siguiente recarga del índice
+    "ALTER TABLE user_interests ADD COLUMN IF NOT EXISTS embedding vector(768)",
+    "ALTER TABLE user_interests ADD COLUMN IF NOT EXISTS embedding_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_user_interests_user_id ON user_interests (user_id)",
+    # Las tablas creadas con create_all (sin init.sql) no tenían user_id
+    "ALTER TABLE content_history ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id)",
+    # Filas de fan-out: el ítem llegó al usuario por este interés (sin FK: borrar un interés no borra historial)
+    "ALTER TABLE content_history ADD COLUMN IF NOT EXISTS interest_id INTEGER",
+    "ALTER TABLE content_history ADD COLUMN IF NOT EXISTS interest_similarity REAL",
+    # Historial por usuario con paginación keyset (y filtro por decisión)
+    "CREATE INDEX IF NOT EXISTS ix_content_history_user_id_id ON content_history (user_id, id) "
+    "WHERE user_id IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_content_history_user_id_is_signal_id ON content_history (user_id, is_signal, id) "
+    "WHERE user_id IS NOT NULL",
+    # KPIs del dashboard por usuario (día x categoría), como content_stats_daily
+    """CREATE TABLE IF NOT EXISTS user_stats_daily (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        day DATE NOT NULL,
+        category_code VARCHAR(20) NOT NULL,
+        total_items INTEGER NOT NULL DEFAULT 0,
+        blocked_items INTEGER NOT NULL DEFAULT 0,
+        time_saved_seconds BIGINT NOT NULL DEFAULT 0,
+        score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, category_code)
+    )""",
+]
+
+
+def upgrade():
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS user_stats_daily")
+    op.execute("DROP INDEX IF EXISTS ix_content_history_user_id_is_signal_id")
+    op.execute("DROP INDEX IF EXISTS ix_content_history_user_id_id")
+    op.execute("ALTER TABLE content_history DROP COLUMN IF EXISTS interest_similarity")
+    op.execute("ALTER TABLE content_history DROP COLUMN IF EXISTS interest_id")
+    op.execute("DROP INDEX IF EXISTS ix_user_interests_user_id")
+    op.execute("ALTER TABLE user_interests DROP COLUMN IF EXISTS embedding_hash")
+    op.execute("ALTER TABLE user_interests DROP COLUMN IF EXISTS embedding")
@@ -0,0 +1,38 @@
+"""content_history: origen del veredicto y clickbait, para reutilizarlo sin alterarlo
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Textos fijos con los que se reconocen los veredictos que no vienen del LLM en filas anteriores
+FALLBACK_REASONING = "El servicio de IA está temporalmente no disponible (Rate Limit o Error de Proceso)."
+DOMAIN_REASON_PREFIX = "Reputación de dominio"
+PREFILTER_REASON_PREFIX = "Pre-filtro local"
+
+
+def upgrade():
+    # llm | cache | semantic | prefilter | domain | fallback (AnalysisResponse.verdict_source)
+    op.execute("ALTER TABLE content_history ADD COLUMN IF NOT EXISTS verdict_source VARCHAR(20)")
+    # NULL en filas anteriores: no se sabía (la deduplicación lo devuelve como desconocido)
+    op.execute("ALTER TABLE content_history ADD COLUMN IF NOT EXISTS is_clickbait BOOLEAN")
+    op.execute(f"""
+        UPDATE content_history SET verdict_source = CASE
+            WHEN content_summary = '{FALLBACK_REASONING}' THEN 'fallback'
+            WHEN content_summary LIKE '{DOMAIN_REASON_PREFIX}%' THEN 'domain'
+            WHEN content_summary LIKE '{PREFILTER_REASON_PREFIX}%' THEN 'prefilter'
+            ELSE 'llm'
+        END
+        WHERE verdict_source IS NULL
+    """)
+
+
+def downgrade():
+    op.execute("ALTER TABLE content_history DROP COLUMN IF EXISTS is_clickbait")
+    op.execute("ALTER TABLE content_history DROP COLUMN IF EXISTS verdict_source")
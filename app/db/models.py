@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, Text, DateTime, func
+import uuid
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, String, Boolean, Float, Numeric, Text, Date, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from pgvector.sqlalchemy import Vector
 from app.db.session import Base
 
@@ -6,6 +8,8 @@ class ContentHistory(Base):
     __tablename__ = "content_history"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Usuario que pidió el análisis o al que se le entregó (fan-out); NULL = anónimo
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     source_url = Column(Text, nullable=False)
     title = Column(Text)
     
@@ -16,12 +20,148 @@ class ContentHistory(Base):
     signal_score = Column(Float)
     is_signal = Column(Boolean)
     rejection_reason = Column(Text, nullable=True)
+    # NULL en filas anteriores a la migración 0004 (no se guardaba)
+    is_clickbait = Column(Boolean, nullable=True)
     category_code = Column(String(50))
+    # llm | cache | semantic | prefilter | domain | fallback: solo los del LLM se reutilizan por similitud
+    verdict_source = Column(String(20), nullable=True)
     
     # Métricas de Tiempo
     estimated_read_time_seconds = Column(Integer)
     
     # Vector Semántico (Google = 768 dimensiones)
     embedding = Column(Vector(768))
+    # sha256 del texto vectorizado: reutilizar el embedding si el mismo texto vuelve a llegar
+    content_hash = Column(String(64), index=True)
+
+    # Fan-out: interés del usuario que casó con el ítem (NULL en la fila del análisis en sí)
+    interest_id = Column(Integer, nullable=True)
+    interest_similarity = Column(Float, nullable=True)
     
     analyzed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Paginación keyset de /history (WHERE filtro ORDER BY id) sin ordenar en memoria
+    __table_args__ = (
+        Index("ix_content_history_is_signal_id", "is_signal", "id"),
+        Index("ix_content_history_category_id", "category_code", "id"),
+        Index("ix_content_history_analyzed_at", "analyzed_at"),
+        # Historial por usuario (solo filas con usuario)
+        Index("ix_content_history_user_id_id", "user_id", "id", postgresql_where=user_id.is_not(None)),
+        Index("ix_content_history_user_id_is_signal_id", "user_id", "is_signal", "id",
+              postgresql_where=user_id.is_not(None)),
+    )
+
+
+class VerdictCacheEntry(Base):
+    """Veredictos de Gemini reutilizables, compartidos entre réplicas."""
+    __tablename__ = "verdict_cache"
+
+    # sha256(prompt_version + categoría + tópico + contenido normalizado)
+    cache_key = Column(String(64), primary_key=True)
+    prompt_version = Column(String(16), nullable=False, index=True)
+    verdict = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class AnalysisJob(Base):
+    """Cola durable de análisis asíncronos (consumida con FOR UPDATE SKIP LOCKED)."""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # queued -> running -> done | failed
+    status = Column(String(20), nullable=False, default="queued")
+    payload = Column(JSONB, nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    error_code = Column(Integer, nullable=True)
+    webhook_url = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_created_at", "status", "created_at"),
+    )
+
+
+class ContentStatsDaily(Base):
+    """
+    Contadores del dashboard por día y categoría, actualizados en la misma
+    transacción que cada inserción en content_history (ver app/db/stats.py).
+    """
+    __tablename__ = "content_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    category_code = Column(String(20), primary_key=True)
+
+    total_items = Column(Integer, nullable=False, default=0)
+    blocked_items = Column(Integer, nullable=False, default=0)
+    # Suma de estimated_read_time_seconds del contenido bloqueado
+    time_saved_seconds = Column(BigInteger, nullable=False, default=0)
+    # Para el promedio de calidad: sum(signal_score) / count(signal_score)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+
+
+class UserStatsDaily(Base):
+    """Los mismos contadores que ContentStatsDaily, por usuario (análisis propios + fan-out)."""
+    __tablename__ = "user_stats_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category_code = Column(String(20), primary_key=True)
+
+    total_items = Column(Integer, nullable=False, default=0)
+    blocked_items = Column(Integer, nullable=False, default=0)
+    time_saved_seconds = Column(BigInteger, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String(50), unique=True, nullable=False)
+    email = Column(String(100), unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Desnormalizado desde user_stats_daily en cada escritura del historial
+    total_time_saved_minutes = Column(Integer, default=0)
+    focus_score = Column(Numeric(3, 2), default=5.0)
+
+
+class UserInterest(Base):
+    __tablename__ = "user_interests"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    keyword = Column(String(100))
+    category_code = Column(String(20), ForeignKey("category_taxonomy.code"))
+    min_quality_threshold = Column(Numeric(3, 2), default=0.7)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Vector de `keyword` y embedding_key del texto vectorizado (se recalcula si cambia)
+    embedding = Column(Vector(768))
+    embedding_hash = Column(String(64))
+
+
+class TrustedSource(Base):
+    """Whitelist de dominios (definida en docker/init.sql). Un dominio cubre sus subdominios."""
+    __tablename__ = "trusted_sources"
+
+    id = Column(Integer, primary_key=True)
+    domain = Column(String(100), unique=True)  # ej: arxiv.org
+    base_trust_score = Column(Float, default=1.0)
+
+
+class CategoryTaxonomy(Base):
+    __tablename__ = "category_taxonomy"
+
+    code = Column(String(20), primary_key=True)  # ej: PROFESIONAL
+    name = Column(String(100), nullable=False)
+    priority_level = Column(Integer)  # 1=Alta, 4=Bloquear
+    description = Column(Text)
@@ -1,14 +1,33 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.core import config
 
 # Construimos la URL de conexión. 
 # En Docker, el host es 'db', usuario 'user', pass 'password', db 'signal_engine'
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/signal_engine")
+# Misma base, driver asyncpg (para el pipeline, que corre en el event loop)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+)
 
-engine = create_engine(DATABASE_URL)
+_pool_options = dict(
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+engine = create_engine(DATABASE_URL, **_pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 Base = declarative_base()
 
 # Dependency para FastAPI
@@ -18,3 +37,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency para endpoints async
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
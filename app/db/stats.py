@@ -0,0 +1,189 @@
+# KPIs del dashboard mantenidos de forma incremental en content_stats_daily (y user_stats_daily)
+#
+# Uso (recalcular desde content_history, p. ej. tras una importación manual):
+#   python -m app.db.stats backfill
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, func, select, text, update
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.db.models import ContentHistory, ContentStatsDaily, User, UserStatsDaily
+
+UNCATEGORIZED = "SIN_CATEGORIA"
+COUNTERS = ("total_items", "blocked_items", "time_saved_seconds", "score_sum", "score_count")
+
+
+def _daily_upserts(table, rows: Iterable[dict], keys: tuple = ()) -> List[Insert]:
+    """
+    UPSERTs que suman `rows` a los contadores de `table` (por día UTC de `analyzed_at`,
+    categoría + `keys`). Se emiten ordenados por clave: dos réplicas que vuelcan
+    claves solapadas bloquean las filas en el mismo orden y no se interbloquean.
+    """
+    now = datetime.now(timezone.utc)
+    deltas = defaultdict(lambda: {"total_items": 0, "blocked_items": 0, "time_saved_seconds": 0,
+                                  "score_sum": 0.0, "score_count": 0})
+    for row in rows:
+        day = (row.get("analyzed_at") or now).astimezone(timezone.utc).date()
+        delta = deltas[(day, row.get("category_code") or UNCATEGORIZED, *(row[k] for k in keys))]
+        delta["total_items"] += 1
+        if row.get("is_signal") is False:
+            delta["blocked_items"] += 1
+            delta["time_saved_seconds"] += row.get("estimated_read_time_seconds") or 0
+        if row.get("signal_score") is not None:
+            delta["score_sum"] += float(row["signal_score"])
+            delta["score_count"] += 1
+
+    statements = []
+    for key in sorted(deltas):
+        (day, category, *key_values), delta = key, deltas[key]
+        stmt = insert(table).values(day=day, category_code=category, **dict(zip(keys, key_values)), **delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[getattr(table, k) for k in (*keys, "day", "category_code")],
+            set_={col: getattr(table, col) + getattr(stmt.excluded, col) for col in delta},
+        )
+        statements.append(stmt)
+    return statements
+
+
+def _time_saved_update(user_ids):
+    """users.total_time_saved_minutes recalculado desde user_stats_daily (sin redondeos acumulados)."""
+    total = select(func.div(func.coalesce(func.sum(UserStatsDaily.time_saved_seconds), 0), 60))\
+        .where(UserStatsDaily.user_id == User.id).scalar_subquery()
+    stmt = update(User).values(total_time_saved_minutes=total)
+    return stmt if user_ids is None else stmt.where(User.id.in_(sorted(user_ids)))
+
+
+def stats_upserts(rows: Iterable[dict]) -> list:
+    """
+    UPSERTs que suman las nuevas filas de content_history a los contadores
+    diarios. Se ejecutan en la misma transacción que el INSERT del historial,
+    así contadores e historial nunca divergen.
+
+    Globales: solo las filas de análisis (las de fan-out repiten el mismo ítem).
+    Por usuario: toda fila con user_id, y el tiempo ahorrado acumulado en `users`.
+    """
+    rows = list(rows)
+    statements = _daily_upserts(ContentStatsDaily, [r for r in rows if r.get("interest_id") is None])
+    user_rows = [r for r in rows if r.get("user_id") is not None]
+    statements += _daily_upserts(UserStatsDaily, user_rows, keys=("user_id",))
+    saved = {r["user_id"] for r in user_rows if r.get("is_signal") is False}
+    if saved:
+        statements.append(_time_saved_update(saved))
+    return statements
+
+
+def _backfill_source(*keys):
+    blocked = ContentHistory.is_signal.is_(False)
+    day = func.date(func.timezone("UTC", ContentHistory.analyzed_at))
+    category = func.coalesce(ContentHistory.category_code, UNCATEGORIZED)
+    return select(
+        *keys,
+        day,
+        category,
+        func.count(),
+        func.count().filter(blocked),
+        func.coalesce(func.sum(case((blocked, ContentHistory.estimated_read_time_seconds), else_=0)), 0),
+        func.coalesce(func.sum(ContentHistory.signal_score), 0.0),
+        func.count(ContentHistory.signal_score),
+    ).group_by(*keys, day, category)
+
+
+def backfill(db: Session) -> int:
+    """Reconstruye las tablas de contadores (globales y por usuario) a partir de todo content_history."""
+    db.execute(text("DELETE FROM content_stats_daily"))
+    db.execute(text("DELETE FROM user_stats_daily"))
+    result = db.execute(
+        insert(ContentStatsDaily).from_select(
+            ["day", "category_code", *COUNTERS],
+            _backfill_source().where(ContentHistory.interest_id.is_(None)),
+        )
+    )
+    per_user = db.execute(
+        insert(UserStatsDaily).from_select(
+            ["user_id", "day", "category_code", *COUNTERS],
+            _backfill_source(ContentHistory.user_id).where(ContentHistory.user_id.is_not(None)),
+        )
+    )
+    db.execute(_time_saved_update(None))
+    db.commit()
+    return result.rowcount + per_user.rowcount
+
+
+def needs_backfill(db: Session) -> bool:
+    """True si hay historial pero la tabla de contadores está vacía (instalaciones previas)."""
+    has_stats = db.query(ContentStatsDaily.day).limit(1).first() is not None
+    has_history = db.query(ContentHistory.id).limit(1).first() is not None
+    return has_history and not has_stats
+
+
+def dashboard_stats(db: Session, days: Optional[int] = None, category: Optional[str] = None,
+                    user_id: Optional[int] = None) -> dict:
+    """
+    KPIs a partir de los contadores: lee como mucho (días x categorías) filas,
+    sin importar el tamaño de content_history. Con `user_id`, los de ese usuario.
+    """
+    table = ContentStatsDaily if user_id is None else UserStatsDaily
+    query = db.query(
+        table.category_code,
+        *(func.sum(getattr(table, col)).label(col) for col in COUNTERS),
+    )
+    if user_id is not None:
+        query = query.filter(UserStatsDaily.user_id == user_id)
+    if days is not None:
+        since: date = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        query = query.filter(table.day >= since)
+    if category:
+        query = query.filter(table.category_code == category)
+    rows = query.group_by(table.category_code).all()
+
+    by_category = {row.category_code: _kpis(row) for row in rows}
+    total = _kpis(_Totals(rows))
+    total["by_category"] = by_category
+    total["window_days"] = days
+    return total
+
+
+class _Totals:
+    """Suma de las filas por categoría, con la misma forma que una fila."""
+
+    def __init__(self, rows):
+        self.total_items = sum(r.total_items or 0 for r in rows)
+        self.blocked_items = sum(r.blocked_items or 0 for r in rows)
+        self.time_saved_seconds = sum(r.time_saved_seconds or 0 for r in rows)
+        self.score_sum = sum(r.score_sum or 0.0 for r in rows)
+        self.score_count = sum(r.score_count or 0 for r in rows)
+
+
+def _kpis(row) -> dict:
+    total_count = int(row.total_items or 0)
+    if total_count == 0:
+        return {
+            "total_items": 0,
+            "blocked_items": 0,
+            "noise_ratio": 0,
+            "time_saved_minutes": 0,
+            "digital_health_score": 0
+        }
+    blocked_count = int(row.blocked_items or 0)
+    avg_quality = (row.score_sum / row.score_count) if row.score_count else 0.0
+    return {
+        "total_items": total_count,
+        "blocked_items": blocked_count,
+        "noise_ratio": round((blocked_count / total_count * 100), 1),
+        "time_saved_minutes": int((row.time_saved_seconds or 0) / 60),
+        "digital_health_score": round(float(avg_quality) * 10, 1) # Escala 0-10
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from app.db.session import SessionLocal
+
+    if sys.argv[1:] != ["backfill"]:
+        print("Uso: python -m app.db.stats backfill")
+        sys.exit(1)
+    with SessionLocal() as session:
+        print(f"✅ {backfill(session)} filas de contadores reconstruidas")
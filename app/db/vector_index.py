@@ -0,0 +1,141 @@
+# Gestión del índice ANN (pgvector) sobre content_history.embedding
+#
+# Uso:
+#   python -m app.db.vector_index status
+#   python -m app.db.vector_index ensure
+#   python -m app.db.vector_index rebuild --method hnsw --m 32 --ef-construction 128
+import argparse
+import json
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import config
+
+TABLE = "content_history"
+COLUMN = "embedding"
+INDEX_NAME = "ix_content_history_embedding_ann"
+# Distancia coseno: la misma que usa la deduplicación semántica y /similar
+OPCLASS = "vector_cosine_ops"
+
+
+def index_ddl(
+    name: str = INDEX_NAME,
+    method: str = config.VECTOR_INDEX_METHOD,
+    m: int = config.HNSW_M,
+    ef_construction: int = config.HNSW_EF_CONSTRUCTION,
+    lists: int = config.IVFFLAT_LISTS,
+    concurrently: bool = True,
+    table: str = TABLE,
+    column: str = COLUMN,
+) -> str:
+    if method == "hnsw":
+        params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    elif method == "ivfflat":
+        params = f"lists = {int(lists)}"
+    else:
+        raise ValueError(f"Método de índice desconocido: {method}")
+
+    mode = "CONCURRENTLY " if concurrently else ""
+    return (
+        f"CREATE INDEX {mode}IF NOT EXISTS {name} ON {table} "
+        f"USING {method} ({column} {OPCLASS}) WITH ({params})"
+    )
+
+
+def _search_params_sql(ef_search: Optional[int], probes: Optional[int]):
+    ef_search = int(ef_search or config.HNSW_EF_SEARCH)
+    probes = int(probes or config.IVFFLAT_PROBES)
+    return [
+        text(f"SET LOCAL hnsw.ef_search = {ef_search}"),
+        text(f"SET LOCAL ivfflat.probes = {probes}"),
+    ]
+
+
+def set_search_params(db: Session, ef_search: Optional[int] = None, probes: Optional[int] = None):
+    """
+    Ajusta la búsqueda ANN solo para la transacción en curso (SET LOCAL).
+    Ambos parámetros se aplican: Postgres ignora el del método que no se usa.
+    """
+    for stmt in _search_params_sql(ef_search, probes):
+        db.execute(stmt)
+
+
+async def aset_search_params(db: AsyncSession, ef_search: Optional[int] = None, probes: Optional[int] = None):
+    """Versión para AsyncSession de set_search_params."""
+    for stmt in _search_params_sql(ef_search, probes):
+        await db.execute(stmt)
+
+
+def index_status(engine: Engine, name: str = INDEX_NAME) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT i.indexdef, pg_relation_size(c.oid) AS size_bytes, x.indisvalid AS valid "
+                "FROM pg_indexes i "
+                "JOIN pg_class c ON c.relname = i.indexname "
+                "JOIN pg_index x ON x.indexrelid = c.oid "
+                "WHERE i.indexname = :name"
+            ),
+            {"name": name},
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def ensure_index(engine: Engine, **params) -> bool:
+    """
+    Crea el índice si no existe (sin bloquear escrituras). Si existe pero es inválido
+    (un CREATE INDEX CONCURRENTLY interrumpido), el planner no lo usa: se borra y se
+    vuelve a crear. Devuelve True si lo creó.
+    """
+    status = index_status(engine)
+    if status is not None and status["valid"]:
+        return False
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if status is not None:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+        conn.execute(text(index_ddl(**params)))
+    return True
+
+
+def rebuild_index(engine: Engine, **params):
+    """
+    Reconstrucción online: se crea un índice nuevo en paralelo (CONCURRENTLY),
+    y solo cuando está listo se borra el anterior y se renombra. Las consultas
+    siguen usando el índice viejo mientras tanto. Permite cambiar m/ef_construction/método.
+    """
+    tmp_name = f"{INDEX_NAME}_new"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Restos de una reconstrucción interrumpida (índice inválido)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}"))
+        conn.execute(text(index_ddl(name=tmp_name, **params)))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+        conn.execute(text(f"ALTER INDEX {tmp_name} RENAME TO {INDEX_NAME}"))
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Índice ANN de content_history.embedding")
+    parser.add_argument("command", choices=["status", "ensure", "rebuild"])
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default=config.VECTOR_INDEX_METHOD)
+    parser.add_argument("--m", type=int, default=config.HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=config.HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--lists", type=int, default=config.IVFFLAT_LISTS)
+    args = parser.parse_args()
+
+    from app.db.session import engine
+
+    params = {"method": args.method, "m": args.m, "ef_construction": args.ef_construction, "lists": args.lists}
+    if args.command == "ensure":
+        print("✅ Índice creado" if ensure_index(engine, **params) else "ℹ️ El índice ya existía (válido)")
+    elif args.command == "rebuild":
+        rebuild_index(engine, **params)
+        print("✅ Índice reconstruido")
+    print(json.dumps(index_status(engine), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    _main()
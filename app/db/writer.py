@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from app.core import config
+from app.core.telemetry import span
+from app.db.models import ContentHistory
+from app.db.session import AsyncSessionLocal
+from app.db.stats import stats_upserts
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """
+    Persistencia diferida (write-behind) de content_history.
+
+    El pipeline entrega las filas con `submit()` y responde al usuario sin
+    esperar a la base de datos. Una tarea de fondo las agrupa y las escribe con
+    un INSERT multi-fila (+ los contadores del dashboard) en una sola transacción,
+    cuando el lote llega a `batch_size` o pasan `flush_interval` segundos.
+    El buffer es acotado: si la DB no da abasto, `submit()` espera (backpressure).
+    Al apagar la app, `stop()` escribe todo lo pendiente.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = config.HISTORY_WRITER_BATCH_SIZE,
+        flush_interval: float = config.HISTORY_WRITER_FLUSH_INTERVAL,
+        max_buffer: int = config.HISTORY_WRITER_MAX_BUFFER,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Métricas
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_buffer)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Marcador de fin: el loop vacía lo que quede y termina
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, row: dict):
+        """Encola una fila (dict de columnas de ContentHistory) para escritura diferida."""
+        if self._task is None:
+            # Sin writer en marcha (scripts, tests): escritura inmediata
+            await self._flush([row])
+            return
+        await self._queue.put(row)
+
+    def metrics(self) -> dict:
+        return {
+            "buffered": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch: List[dict] = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    closing = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+        # Apagado: escribimos lo que haya quedado en el buffer
+        leftover = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                leftover.append(row)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[dict]):
+        """
+        Escribe el lote en una transacción. Si falla se reintenta una vez (corte
+        transitorio); si vuelve a fallar se escribe fila a fila, para que una fila
+        inválida no se lleve por delante al resto del lote. Toda fila, también la
+        de un lote de una sola, tiene así tres intentos antes de descartarse.
+        """
+        with span("persist", rows=len(batch)):
+            for attempt in (1, 2):
+                try:
+                    await self._insert(batch)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error DB guardando {len(batch)} filas (intento {attempt}): {e}")
+                    continue
+                self.written += len(batch)
+                self.flushes += 1
+                logger.debug("✅ Filas guardadas en DB", extra={"rows": len(batch)})
+                return
+
+            for row in batch:
+                try:
+                    await self._insert([row])
+                    self.written += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"❌ Fila descartada: {e}", extra={"url": row.get("source_url")})
+            self.flushes += 1
+
+    async def _insert(self, rows: List[dict]):
+        async with self.session_factory() as db:
+            async with db.begin():
+                # executemany => INSERT ... VALUES (...), (...), ... en lotes
+                await db.execute(insert(ContentHistory), rows)
+                for stmt in stats_upserts(rows):
+                    await db.execute(stmt)
@@ -1,16 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import logging
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.schemas.analysis import AnalysisRequest, AnalysisResponse
+from sqlalchemy import desc, text
+from uuid import UUID
+from app.core import config
+from app.core.log import configure_logging
+from app.core.startup import Readiness
+from app.core.telemetry import render_metrics
+from app.schemas.analysis import AnalysisRequest, AnalysisResponse, BatchAnalysisRequest, JobRequest, JobResponse
+from app.services.analysis_pipeline import AnalysisPipeline, AnalysisError
+from app.services.job_queue import JobQueue
+from app.services.rate_limiter import gemini_limiter
 from app.services.source_navigator import SourceNavigator
 from app.services.content_scorer import ContentScorer
 from app.services.embedding_service import EmbeddingService
-from app.db.session import get_db, engine, Base
+from app.db.session import get_db, engine, async_engine, SessionLocal
 from app.db.models import ContentHistory
+from app.db.vector_index import ensure_index, set_search_params
+from app.db.stats import backfill, dashboard_stats, needs_backfill
+from app.db.migrate import run_migrations
 
-# Inicializar tablas si no existen (útil para desarrollo)
-Base.metadata.create_all(bind=engine)
+# Logs del paquete `app` (texto o JSON según LOG_FORMAT)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 from pydantic import BaseModel
 
@@ -27,12 +45,102 @@ class HistoryItem(BaseModel):
     class Config:
         from_attributes = True # Antes orm_mode
 
-app = FastAPI(title="The Signal Engine API", version="0.2.0")
+# DTO para ítems similares (vecinos más cercanos en el espacio semántico)
+class SimilarItem(BaseModel):
+    id: int
+    title: Optional[str]
+    url: str
+    decision: str
+    score: float
+    distance: float
 
-# Servicios
+# Servicios (constructores baratos: los clientes de Gemini y Chromium se crean al calentar)
 navigator = SourceNavigator()
 scorer = ContentScorer()
 vectorizer = EmbeddingService() # Nuevo servicio
+pipeline = AnalysisPipeline(navigator, scorer, vectorizer)
+jobs = JobQueue(pipeline)
+readiness = Readiness(("database", "browser", "llm", "embeddings", "reputation", "interests", "jobs"))
+
+def ping_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def prepare_database():
+    # Sin conexión (Postgres aún arrancando) falla aquí y warm_until_ready reintenta
+    await asyncio.to_thread(ping_database)
+    # Esquema vía Alembic (app/db/migrations); un fallo aquí deja la app "no lista"
+    if config.DB_AUTO_MIGRATE:
+        await asyncio.to_thread(run_migrations, engine)
+    # Veredictos de versiones anteriores del prompt ya no sirven
+    try:
+        purged = await scorer.cache.purge_stale()
+        logger.info("🧹 Caché de veredictos purgada", extra={"purged": purged})
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo purgar la caché de veredictos: {e}")
+    # Instalaciones previas: calculamos los contadores una vez desde el historial
+    try:
+        with SessionLocal() as db:
+            if await asyncio.to_thread(needs_backfill, db):
+                rows = await asyncio.to_thread(backfill, db)
+                logger.info("📊 Contadores del dashboard reconstruidos", extra={"rows": rows})
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron verificar los contadores del dashboard: {e}")
+
+async def build_vector_index():
+    """
+    Índice ANN sobre los embeddings (no-op si ya existe y es válido). Sobre un historial
+    grande tarda minutos: corre en segundo plano y no cuenta para /api/v1/ready
+    (mientras tanto las búsquedas son secuenciales). CONCURRENTLY no bloquea escrituras.
+    """
+    try:
+        if await asyncio.to_thread(ensure_index, engine):
+            logger.info("🧭 Índice vectorial creado")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo verificar el índice vectorial: {e}")
+
+async def warm_up():
+    """Calienta los subsistemas en paralelo; los que leen tablas esperan a las migraciones."""
+    async def database_and_dependents():
+        await readiness.warm_until_ready("database", prepare_database,
+                                         config.DB_WARMUP_BACKOFF, config.DB_WARMUP_MAX_BACKOFF)
+        # Índice en memoria de fuentes de confianza + historial por dominio (se recarga en segundo plano)
+        # e índice de intereses de los usuarios (fan-out de cada veredicto)
+        await asyncio.gather(
+            readiness.warm("reputation", pipeline.reputation.start),
+            readiness.warm("interests", pipeline.interests.start),
+            readiness.warm("jobs", jobs.start),
+            build_vector_index(),
+        )
+
+    await asyncio.gather(
+        database_and_dependents(),
+        # Chromium arranca una sola vez con la app y se reutiliza entre peticiones
+        readiness.warm("browser", navigator.start),
+        # Importar langchain + crear los clientes de Gemini bloquea: en un hilo
+        readiness.warm("llm", lambda: asyncio.to_thread(scorer.warm)),
+        readiness.warm("embeddings", lambda: asyncio.to_thread(vectorizer.warm)),
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pipeline.writer.start()
+    # La app atiende (/, /api/v1/ready) mientras calienta; ver /api/v1/ready
+    warming = asyncio.create_task(warm_up())
+    yield
+    warming.cancel()
+    await asyncio.gather(warming, return_exceptions=True)
+    await jobs.stop()
+    await pipeline.reputation.stop()
+    await pipeline.interests.stop()
+    # Embeddings / persistencias que quedaron en marcha tras responder en streaming
+    await pipeline.drain()
+    # Lo que quede en el buffer de escritura se guarda antes de salir
+    await pipeline.writer.stop()
+    await navigator.close()
+    await async_engine.dispose()
+
+app = FastAPI(title="The Signal Engine API", version="0.2.0", lifespan=lifespan)
 
 @app.get("/")
 def read_root():
@@ -42,87 +150,234 @@ def read_root():
         "ai_model": "Google Gemini 2.0 Flash"
     }
 
+@app.get("/api/v1/ready")
+def get_readiness():
+    """
+    Readiness: 200 cuando todos los subsistemas están calientes (esquema migrado,
+    Chromium, clientes de Gemini, reputación, cola de trabajos); 503 mientras tanto.
+    `/` sigue sirviendo de liveness.
+    """
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def get_prometheus_metrics():
+    """
+    Métricas Prometheus: latencia por etapa (signal_stage_seconds), reintentos,
+    aciertos de caché, veredictos por origen (incluidos los de fallback),
+    tokens de Gemini y tamaño de HTML / texto / prompt.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/api/v1/navigator/metrics")
+def get_navigator_metrics():
+    """
+    Estado del navegador: uso de cada tier (HTTP / Playwright), tier aprendido
+    por dominio y pool de Chromium (páginas en uso, esperando, reciclados).
+    """
+    return navigator.metrics()
+
+@app.get("/api/v1/cache/verdicts")
+def get_verdict_cache_metrics():
+    """
+    Aciertos/fallos de la caché de veredictos y versión de prompt activa.
+    """
+    return scorer.cache.metrics()
+
+@app.delete("/api/v1/cache/verdicts")
+async def clear_verdict_cache():
+    """
+    Invalidación explícita de todos los veredictos cacheados (memoria + DB).
+    """
+    deleted = await scorer.cache.clear()
+    return {"deleted": deleted}
+
+@app.get("/api/v1/writer")
+def get_history_writer_metrics():
+    """
+    Estado de la escritura diferida del historial (filas en buffer, escritas, fallidas).
+    """
+    return pipeline.writer.metrics()
+
+@app.get("/api/v1/dedup")
+def get_semantic_dedup_metrics():
+    """
+    Búsquedas de casi-duplicados y veredictos reutilizados sin llamar a Gemini.
+    """
+    return pipeline.dedup.metrics()
+
+@app.get("/api/v1/domains/reputation")
+def get_domain_reputation_metrics():
+    """
+    Reputación de dominios: fuentes de confianza cargadas, dominios con historial
+    y cuántos análisis se resolvieron sin navegar o sin llamar a Gemini.
+    """
+    return pipeline.reputation.metrics()
+
+@app.get("/api/v1/interests")
+def get_interest_index_metrics():
+    """
+    Índice de intereses en memoria: intereses y usuarios cargados, última recarga
+    y entregas por fan-out (un análisis servido a varios usuarios).
+    """
+    return pipeline.interests.metrics()
+
+@app.get("/api/v1/prefilter")
+def get_prefilter_metrics():
+    """
+    Pre-filtro local: tasa de ítems decididos sin Gemini y acuerdo con el LLM
+    en la muestra auditada.
+    """
+    return pipeline.prefilter.metrics()
+
+@app.get("/api/v1/embeddings")
+def get_embedding_metrics():
+    """
+    Embeddings: peticiones recibidas frente a llamadas reales a Gemini (micro-lotes)
+    y aciertos de la caché por contenido (memoria / historial).
+    """
+    return vectorizer.metrics()
+
+@app.get("/api/v1/llm/limiter")
+def get_llm_limiter_metrics():
+    """
+    Cuota de Gemini compartida (evaluación + embeddings): concurrencia adaptativa,
+    peticiones en espera por prioridad y throttles recibidos.
+    """
+    return gemini_limiter.metrics()
+
 @app.post("/api/v1/analyze", response_model=AnalysisResponse)
-async def analyze_url(
-    request: AnalysisRequest, 
-    db: Session = Depends(get_db)
-):
-    # 1. Navegación
-    print(f"🔍 [1/3] Navegando: {request.url}")
-    nav_result = await navigator.fetch_and_clean(str(request.url))
-    
-    if nav_result.get("status") != "success":
-        raise HTTPException(status_code=400, detail=f"Error navegación: {nav_result.get('error')}")
-
-    clean_text = nav_result.get("clean_text", "")
-    if len(clean_text) < 50:
-        raise HTTPException(status_code=422, detail="Contenido insuficiente para analizar.")
-
-    # 2. Análisis (Cerebro)
-    print("🧠 [2/3] Evaluando calidad...")
-    ai_result = await scorer.analyze_content(
-        content=clean_text[:15000], 
-        topic=request.topic, 
-        category=request.category
-    )
+async def analyze_url(request: AnalysisRequest):
+    # Navegación → Embeddings → Evaluación (o veredicto reutilizado) → Persistencia.
+    # La sesión de DB se abre solo al persistir, no durante toda la petición.
+    try:
+        return await pipeline.run(request)
+    except AnalysisError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.post("/api/v1/analyze/stream")
+async def analyze_url_stream(request: AnalysisRequest):
+    """
+    Variante en streaming (Server-Sent Events) de /analyze, para que el cliente
+    vea algo en cuanto lo hay:
 
-    # 3. Embeddings (Memoria Semántica)
-    print("🧬 [3/3] Generando vectores...")
-    # Vectorizamos el resumen o los primeros párrafos, no todo el texto para ahorrar
-    vector = await vectorizer.generate_embedding(clean_text[:2000])
+    - `page`: título y snippet al terminar la navegación.
+    - `reasoning`: trozos del razonamiento según los genera Gemini (`delta`;
+      con `reset: true` el texto sustituye al anterior, tras un reintento).
+      En documentos largos se evalúan varios fragmentos a la vez: cada trozo
+      lleva `chunk` (1..`total`) y cada texto se acumula por separado.
+    - `chunk`: veredicto parcial (`decision`, `quality_score`, `is_clickbait`)
+      de cada fragmento de un documento largo, según terminan.
+    - `verdict`: la misma respuesta que /analyze, en cuanto hay veredicto.
+    - `error`: `status_code` + `detail` si una etapa falla.
 
-    # 4. Persistencia
+    El embedding y la persistencia terminan después de cerrar el stream.
+    """
     try:
-        db_entry = ContentHistory(
-            source_url=str(request.url),
-            title=nav_result.get("title"),
-            content_summary=ai_result.get("analysis_reasoning"),
-            signal_score=ai_result.get("quality_score"),
-            is_signal=(ai_result.get("decision") == "SHOW"),
-            rejection_reason=ai_result.get("analysis_reasoning") if ai_result.get("decision") == "BLOCK" else None,
-            category_code=request.category,
-            estimated_read_time_seconds=ai_result.get("estimated_read_time_seconds", 0),
-            embedding=vector # Guardamos el array de floats
-        )
-        db.add(db_entry)
-        db.commit()
-        db.refresh(db_entry)
-        print(f"✅ Guardado en DB (ID: {db_entry.id})")
-        
-    except Exception as e:
-        print(f"⚠️ Error DB: {e}")
-        # Continuamos aunque falle el guardado para responder al usuario
-
-    return AnalysisResponse(
-        url=str(request.url),
-        title=nav_result.get("title"),
-        status="processed",
-        quality_score=ai_result.get("quality_score", 0.0),
-        decision=ai_result.get("decision", "BLOCK"),
-        is_clickbait=ai_result.get("is_clickbait", False),
-        reasoning=ai_result.get("analysis_reasoning", ""),
-        estimated_read_time=ai_result.get("estimated_read_time_seconds", 0),
-        clean_text_snippet=clean_text[:200]
-    )
+        await pipeline.check_user(request)
+    except AnalysisError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async def events():
+        async for event, data in pipeline.stream(request):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    # Sin buffering en proxies (nginx) ni cachés intermedias
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/v1/analyze/batch")
+async def analyze_batch(batch: BatchAnalysisRequest):
+    """
+    Analiza un lote de URLs. Devuelve NDJSON (una línea por ítem) en orden de
+    finalización; cada línea lleva su `index` en el lote. Los errores por ítem
+    se informan en su línea (status="error") sin cortar el resto.
+    """
+    async def ndjson_lines():
+        async for item in pipeline.run_batch(batch.items):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/api/v1/jobs", response_model=JobResponse, status_code=202)
+async def enqueue_analysis(job: JobRequest):
+    """
+    Encola un análisis y responde al instante con el id del trabajo.
+    El resultado se consulta en GET /api/v1/jobs/{id} o llega al `webhook_url`.
+    """
+    return await jobs.enqueue(job)
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: UUID):
+    """
+    Estado (queued/running/done/failed) y resultado de un trabajo encolado.
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
 
 @app.get("/api/v1/history", response_model=List[HistoryItem])
 def get_user_history(
-    limit: int = 10, 
-    decision: Optional[str] = None, 
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    user_id: Optional[int] = Query(None, description="Historial de este usuario (sus análisis + lo entregado por sus intereses)"),
+    decision: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before: Optional[int] = Query(None, description="Cursor: ítems con id menor (página siguiente)"),
+    after: Optional[int] = Query(None, description="Cursor: ítems con id mayor (página anterior)"),
     db: Session = Depends(get_db)
 ):
     """
-    Recupera el historial de análisis. 
-    Permite filtrar por decisión (SHOW/BLOCK).
+    Recupera el historial de análisis, del más reciente al más antiguo.
+    Permite filtrar por usuario, decisión (SHOW/BLOCK, la de ese usuario), categoría y fechas.
+    Sin `user_id` se listan los análisis una sola vez (sin las copias entregadas a cada usuario).
+
+    Paginación por cursor (keyset sobre `id`): la respuesta trae las cabeceras
+    `X-Next-Cursor` (pasar como `before`) y `X-Prev-Cursor` (pasar como `after`).
     """
-    query = db.query(ContentHistory)
+    # Solo las columnas del DTO: nada de embeddings ni resúmenes
+    query = db.query(
+        ContentHistory.id,
+        ContentHistory.title,
+        ContentHistory.source_url,
+        ContentHistory.is_signal,
+        ContentHistory.signal_score,
+        ContentHistory.estimated_read_time_seconds,
+        ContentHistory.analyzed_at,
+    )
     
+    if user_id is not None:
+        query = query.filter(ContentHistory.user_id == user_id)
+    else:
+        query = query.filter(ContentHistory.interest_id.is_(None))
     if decision:
         is_signal = (decision.upper() == "SHOW")
         query = query.filter(ContentHistory.is_signal == is_signal)
-    
-    # Ordenar por el más reciente
-    results = query.order_by(desc(ContentHistory.id)).limit(limit).all()
+    if category:
+        query = query.filter(ContentHistory.category_code == category)
+    if since:
+        query = query.filter(ContentHistory.analyzed_at >= since)
+    if until:
+        query = query.filter(ContentHistory.analyzed_at < until)
+
+    if after is not None:
+        # Página anterior: los `limit` ids inmediatamente mayores, devueltos en orden descendente
+        results = query.filter(ContentHistory.id > after)\
+            .order_by(ContentHistory.id).limit(limit).all()[::-1]
+    else:
+        if before is not None:
+            query = query.filter(ContentHistory.id < before)
+        # Ordenar por el más reciente
+        results = query.order_by(desc(ContentHistory.id)).limit(limit).all()
+
+    if results:
+        response.headers["X-Prev-Cursor"] = str(results[0].id)
+        if len(results) == limit:
+            response.headers["X-Next-Cursor"] = str(results[-1].id)
     
     # Mapeo manual simple para formatear fecha (o usar Pydantic avanzado)
     response_list = []
@@ -139,37 +394,58 @@ def get_user_history(
     
     return response_list
 
-@app.get("/api/v1/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """
-    KPIs para el Dashboard del usuario (Gráficos)
-    """
-    # 1. Total procesado
-    total_count = db.query(ContentHistory).count()
-    if total_count == 0:
-        return {
-            "total_items": 0,
-            "blocked_items": 0,
-            "noise_ratio": 0,
-            "time_saved_minutes": 0,
-            "digital_health_score": 0
-        }
-    
-    # 2. Total Bloqueado (Ruido)
-    blocked_count = db.query(ContentHistory).filter(ContentHistory.is_signal == False).count()
-    
-    # 3. Tiempo Ahorrado Total (Suma de segundos de contenido bloqueado)
-    time_saved_seconds = db.query(func.sum(ContentHistory.estimated_read_time_seconds))\
-        .filter(ContentHistory.is_signal == False)\
-        .scalar() or 0
-    
-    # 4. Promedio de Calidad
-    avg_quality = db.query(func.avg(ContentHistory.signal_score)).scalar() or 0.0
+@app.get("/api/v1/similar", response_model=List[SimilarItem])
+def get_similar_items(
+    id: int,
+    k: int = Query(10, ge=1, le=100),
+    ef_search: Optional[int] = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Los `k` ítems analizados más cercanos (distancia coseno) al ítem `id`.
+    `ef_search` permite cambiar recall por latencia en esta consulta.
+    """
+    source = db.query(ContentHistory.embedding).filter(ContentHistory.id == id).first()
+    if source is None:
+        raise HTTPException(status_code=404, detail="Ítem no encontrado")
+    if source.embedding is None:
+        raise HTTPException(status_code=422, detail="El ítem no tiene embedding")
 
-    return {
-        "total_items": total_count,
-        "blocked_items": blocked_count,
-        "noise_ratio": round((blocked_count / total_count * 100), 1),
-        "time_saved_minutes": int(time_saved_seconds / 60),
-        "digital_health_score": round(float(avg_quality) * 10, 1) # Escala 0-10
-    }
+    set_search_params(db, ef_search=ef_search)
+    distance = ContentHistory.embedding.cosine_distance(source.embedding)
+    rows = db.query(
+        ContentHistory.id,
+        ContentHistory.title,
+        ContentHistory.source_url,
+        ContentHistory.is_signal,
+        ContentHistory.signal_score,
+        distance.label("distance"),
+    ).filter(
+        ContentHistory.id != id,
+        ContentHistory.embedding.is_not(None),
+    ).order_by(distance).limit(k).all()
+
+    return [
+        SimilarItem(
+            id=row.id,
+            title=row.title or "Sin título",
+            url=row.source_url,
+            decision="SHOW" if row.is_signal else "BLOCK",
+            score=float(row.signal_score) if row.signal_score is not None else 0.0,
+            distance=float(row.distance),
+        )
+        for row in rows
+    ]
+
+@app.get("/api/v1/stats")
+def get_dashboard_stats(
+    days: Optional[int] = Query(None, ge=1, le=3650, description="Ventana: últimos N días (por defecto, todo)"),
+    category: Optional[str] = None,
+    user_id: Optional[int] = Query(None, description="KPIs de este usuario (por defecto, globales)"),
+    db: Session = Depends(get_db)
+):
+    """
+    KPIs para el Dashboard del usuario (Gráficos).
+    Se leen de los contadores diarios (content_stats_daily / user_stats_daily), no de content_history.
+    """
+    return dashboard_stats(db, days=days, category=category, user_id=user_id)
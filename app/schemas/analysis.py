@@ -1,12 +1,27 @@
-from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Literal
+from pydantic import BaseModel, HttpUrl, Field, model_validator
+from datetime import datetime
+from typing import List, Optional, Literal
+from uuid import UUID
+from app.core import config
 
 # Lo que el usuario (o la app móvil) envía
 class AnalysisRequest(BaseModel):
     url: HttpUrl
-    topic: str = Field(..., description="El tema de interés del usuario (ej: Python, Economía)")
+    topic: Optional[str] = Field(None, description="El tema de interés del usuario (ej: Python, Economía). "
+                                                 "Opcional con user_id: la relevancia la deciden sus intereses")
     category: Literal["PROFESIONAL", "OCIO_SANO", "NOTICIAS", "RUIDO"] = Field(..., description="Categoría taxonómica")
-    
+    user_id: Optional[int] = Field(None, description="Usuario que pide el análisis (se guarda en su historial)")
+
+    @model_validator(mode="after")
+    def topic_or_user(self):
+        if not self.topic and self.user_id is None:
+            raise ValueError("Indica `topic` o `user_id`")
+        return self
+
+# Lote de análisis (ingesta masiva)
+class BatchAnalysisRequest(BaseModel):
+    items: List[AnalysisRequest] = Field(..., min_length=1, max_length=config.BATCH_MAX_ITEMS)
+
 # Lo que devolvemos (Estructura unificada)
 class AnalysisResponse(BaseModel):
     url: str
@@ -14,7 +29,27 @@ class AnalysisResponse(BaseModel):
     status: str
     quality_score: float
     decision: Literal["SHOW", "BLOCK"]
-    is_clickbait: bool
+    # None: desconocido (veredicto reutilizado de un análisis anterior a que se guardara)
+    is_clickbait: Optional[bool]
     reasoning: str
     estimated_read_time: int
     clean_text_snippet: Optional[str] = None # Para debug o previsualización
+    # De dónde salió el veredicto: llm, cache (mismo contenido), semantic (casi duplicado),
+    # prefilter (heurísticas locales), domain (reputación de la fuente) o fallback
+    verdict_source: Literal["llm", "cache", "semantic", "prefilter", "domain", "fallback"] = "llm"
+    reused_from_id: Optional[int] = None # ID de content_history cuyo veredicto se reutilizó
+    delivered_to: int = 0 # Otros usuarios a los que se entregó por sus intereses (fan-out)
+
+# Análisis en modo cola: se responde al instante con el id del trabajo
+class JobRequest(AnalysisRequest):
+    webhook_url: Optional[HttpUrl] = Field(None, description="Se le hace POST con el resultado al terminar")
+
+class JobResponse(BaseModel):
+    job_id: UUID
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+    error_code: Optional[int] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
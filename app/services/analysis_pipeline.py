@@ -0,0 +1,463 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from app.core import config
+from app.core.prompts import GENERAL_TOPIC
+from app.core.telemetry import VERDICTS, span
+from app.db.writer import HistoryWriter
+from app.schemas.analysis import AnalysisRequest, AnalysisResponse
+from app.services.chunker import DocumentChunker
+from app.services.content_scorer import ContentScorer
+from app.services.domain_reputation import DomainReputation, normalize_host
+from app.services.embedding_service import EmbeddingService, embedding_key
+from app.services.interest_index import InterestIndex, InterestMatch
+from app.services.prefilter import ContentPrefilter
+from app.services.rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from app.services.semantic_dedup import SemanticDeduplicator
+from app.services.source_navigator import SourceNavigator
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisError(Exception):
+    """Fallo de una etapa del pipeline, con el código HTTP que le corresponde."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AnalysisPipeline:
+    """
+    Las tres etapas del análisis (navegar → vectorizar → evaluar) + persistencia diferida,
+    reutilizables tanto por /analyze (una URL) como por /analyze/batch.
+
+    El embedding se calcula antes de evaluar: si ya existe un ítem casi idéntico
+    en el historial, se reutiliza su veredicto y no se llama a Gemini. Antes aún,
+    el pre-filtro local bloquea el ruido evidente sin salir del proceso, y lo
+    primero de todo es la reputación del dominio (ni siquiera se navega).
+
+    Los documentos largos se trocean al navegar: solo los fragmentos más
+    salientes para el tópico se vectorizan (vector medio) y se evalúan (map-reduce).
+
+    Cada veredicto se entrega además a los usuarios cuyos intereses casan con el
+    vector del ítem (fan-out): una evaluación sirve a N usuarios.
+    """
+
+    def __init__(
+        self,
+        navigator: SourceNavigator,
+        scorer: ContentScorer,
+        vectorizer: EmbeddingService,
+        dedup: Optional[SemanticDeduplicator] = None,
+        writer: Optional[HistoryWriter] = None,
+        prefilter: Optional[ContentPrefilter] = None,
+        reputation: Optional[DomainReputation] = None,
+        chunker: Optional[DocumentChunker] = None,
+        interests: Optional[InterestIndex] = None,
+    ):
+        self.navigator = navigator
+        self.scorer = scorer
+        self.vectorizer = vectorizer
+        self.dedup = dedup or SemanticDeduplicator()
+        self.writer = writer or HistoryWriter()
+        self.prefilter = prefilter or ContentPrefilter()
+        self.reputation = reputation or DomainReputation()
+        self.chunker = chunker or DocumentChunker()
+        self.interests = interests or InterestIndex(vectorizer)
+
+        # Límites por etapa para lotes: mientras se evalúa la página N ya se descarga la N+1
+        self.navigate_limit = asyncio.Semaphore(config.BATCH_NAVIGATE_CONCURRENCY)
+        self.score_limit = asyncio.Semaphore(config.BATCH_SCORE_CONCURRENCY)
+        self.embed_limit = asyncio.Semaphore(config.BATCH_EMBED_CONCURRENCY)
+        # Embedding + persistencia que siguen tras responder en streaming (ver drain())
+        self._background = set()
+
+    # --- ETAPAS ---
+    @staticmethod
+    def topic(request: AnalysisRequest) -> str:
+        # Sin tópico (análisis de un usuario): calidad general, la relevancia la ponen sus intereses
+        return request.topic or GENERAL_TOPIC
+
+    async def check_user(self, request: AnalysisRequest):
+        if request.user_id is not None and not await self.interests.has_user(request.user_id):
+            raise AnalysisError(404, f"Usuario {request.user_id} no encontrado")
+
+    def precheck(self, request: AnalysisRequest) -> Optional[tuple]:
+        """(nav_result, veredicto) si el dominio o la categoría ya deciden el BLOCK sin navegar."""
+        verdict = self.reputation.precheck(str(request.url), request.category)
+        if verdict is None:
+            return None
+        return {"title": normalize_host(str(request.url)), "clean_text": ""}, verdict
+
+    async def navigate(self, request: AnalysisRequest) -> dict:
+        logger.info("🔍 [1/3] Navegando", extra={"url": str(request.url)})
+        nav_result = await self.navigator.fetch_and_clean(str(request.url))
+
+        if nav_result.get("status") == "busy":
+            raise AnalysisError(503, f"Navegador saturado: {nav_result.get('error')}")
+        if nav_result.get("status") != "success":
+            raise AnalysisError(400, f"Error navegación: {nav_result.get('error')}")
+
+        if len(nav_result.get("clean_text", "")) < 50:
+            raise AnalysisError(422, "Contenido insuficiente para analizar.")
+
+        # None para textos cortos: se vectorizan y evalúan enteros
+        with span("chunk"):
+            nav_result["chunks"] = self.chunker.select(nav_result["clean_text"], self.topic(request))
+        return nav_result
+
+    def shortcut(self, request: AnalysisRequest, nav_result: dict) -> Tuple[Optional[dict], Optional[dict]]:
+        """
+        Atajos locales tras navegar (sin I/O ni cuota): fast-track de fuentes de confianza
+        y pre-filtro. Devuelve (veredicto, local): el veredicto si se decide aquí, o el del
+        pre-filtro que cayó en la muestra auditada (score lo compara con el del LLM).
+        Van antes del embedding: el ruido evidente no paga una llamada a la API.
+        """
+        url = str(request.url)
+        trusted = self.reputation.fast_track(url, nav_result["clean_text"], request.category)
+        if trusted is not None:
+            return trusted, None
+
+        # Ruido evidente: veredicto local sin gastar cuota (salvo la muestra auditada)
+        with span("prefilter"):
+            # Las heurísticas miran el comienzo: mismo coste por página aunque el texto sea largo
+            local = self.prefilter.evaluate(nav_result["clean_text"][:config.CHUNK_MIN_DOC_CHARS], nav_result.get("page_stats"))
+        if local is not None and self.prefilter.skip(local):
+            return self.reputation.observe(url, local), None
+        return None, local
+
+    @staticmethod
+    def wants_vector(verdict: dict) -> bool:
+        """
+        ¿Vectorizar un ítem decidido por un atajo? Solo si se muestra: es lo que se entrega
+        por intereses (fan-out) y aparece en /similar. Un BLOCK local se guarda sin vector.
+        """
+        return verdict.get("decision") == "SHOW"
+
+    async def score(self, request: AnalysisRequest, nav_result: dict, vector=None, priority: int = PRIORITY_INTERACTIVE,
+                    on_reasoning: Optional[Callable[[Optional[int], str], None]] = None,
+                    on_chunk: Optional[Callable[[int, dict], None]] = None,
+                    local: Optional[dict] = None) -> dict:
+        """
+        Veredicto de lo que no resolvió shortcut(): casi-duplicados y, si no, Gemini.
+        `local`: veredicto del pre-filtro auditado. Progreso para el streaming:
+        `on_reasoning(fragmento, texto)` con el razonamiento acumulado (fragmento None
+        si el texto se evalúa entero) y `on_chunk(fragmento, veredicto)` al terminar
+        cada fragmento de un documento largo.
+        """
+        url = str(request.url)
+        logger.info("🧠 [3/3] Evaluando calidad", extra={"url": url})
+        with span("dedup"):
+            ai_result = await self.dedup.find(vector, request.category)
+        if ai_result is None and nav_result.get("chunks"):
+            ai_result = await self.scorer.analyze_chunks(
+                nav_result["chunks"],
+                topic=self.topic(request),
+                category=request.category,
+                read_time_seconds=int(len(nav_result["clean_text"].split()) / 200 * 60),  # ~200 palabras/minuto
+                priority=priority,
+                on_reasoning=on_reasoning,
+                on_chunk=on_chunk
+            )
+            if local is not None:
+                self.prefilter.record_audit(local, ai_result)
+        elif ai_result is None:
+            ai_result = await self.scorer.analyze_content(
+                content=nav_result["clean_text"][:15000],
+                topic=self.topic(request),
+                category=request.category,
+                priority=priority,
+                on_reasoning=partial(on_reasoning, None) if on_reasoning is not None else None
+            )
+            if local is not None:
+                self.prefilter.record_audit(local, ai_result)
+        return self.reputation.observe(url, ai_result)
+
+    @staticmethod
+    def embedding_text(nav_result: dict) -> str:
+        # Vectorizamos el resumen o los primeros párrafos, no todo el texto para ahorrar.
+        # Documentos largos: los fragmentos seleccionados (es también su content_hash)
+        if nav_result.get("chunks"):
+            return "\n\n".join(chunk.text for chunk in nav_result["chunks"])
+        return nav_result["clean_text"][:2000]
+
+    async def embed(self, nav_result: dict, priority: int = PRIORITY_INTERACTIVE):
+        logger.info("🧬 [2/3] Generando vectores", extra={"url": nav_result.get("url")})
+        with span("embed"):
+            chunks = nav_result.get("chunks")
+            if not chunks:
+                return await self.vectorizer.generate_embedding(self.embedding_text(nav_result), priority)
+            return await self.vectorizer.embed_document([chunk.text for chunk in chunks], priority)
+
+    @staticmethod
+    def history_row(request: AnalysisRequest, nav_result: dict, ai_result: dict, vector) -> dict:
+        return dict(
+            user_id=request.user_id,
+            source_url=str(request.url),
+            title=nav_result.get("title"),
+            content_summary=ai_result.get("analysis_reasoning"),
+            signal_score=ai_result.get("quality_score"),
+            is_signal=(ai_result.get("decision") == "SHOW"),
+            rejection_reason=ai_result.get("analysis_reasoning") if ai_result.get("decision") == "BLOCK" else None,
+            is_clickbait=ai_result.get("is_clickbait"),
+            category_code=request.category,
+            verdict_source=ai_result.get("verdict_source", "llm"),
+            estimated_read_time_seconds=ai_result.get("estimated_read_time_seconds", 0),
+            # Hora del análisis, no la del volcado: los contadores diarios se agrupan por ella
+            analyzed_at=datetime.now(timezone.utc),
+            embedding=vector, # Guardamos el vector float32
+            content_hash=embedding_key(AnalysisPipeline.embedding_text(nav_result)) if vector is not None else None,
+            # Mismas claves en todas las filas del lote (ver delivery_row)
+            interest_id=None,
+            interest_similarity=None
+        )
+
+    @staticmethod
+    def delivery_row(analysis_row: dict, ai_result: dict, match: InterestMatch) -> dict:
+        """Fila del historial de un usuario interesado (o del solicitante): mismo ítem, su decisión, sin vector."""
+        accepted = match.accepts(ai_result)
+        if accepted:
+            reason = None
+        elif ai_result.get("is_clickbait"):
+            reason = "Clickbait"
+        else:
+            reason = f"Calidad {ai_result.get('quality_score', 0.0):.2f} bajo tu umbral {match.threshold:.2f}"
+        return dict(
+            analysis_row,
+            user_id=match.user_id,
+            interest_id=match.interest_id,
+            interest_similarity=match.similarity,
+            is_signal=accepted,
+            rejection_reason=reason,
+            embedding=None,
+        )
+
+    async def save(self, request: AnalysisRequest, nav_result: dict, ai_result: dict, vector):
+        """Entrega las filas al writer diferido: la respuesta no espera a la base de datos."""
+        # Todo ítem analizado pasa una vez por aquí: punto único para contar veredictos por origen
+        VERDICTS.labels(ai_result.get("verdict_source", "llm"), ai_result.get("decision", "BLOCK")).inc()
+        row = self.history_row(request, nav_result, ai_result, vector)
+        if ai_result.get("verdict_source") == "fallback":
+            await self.writer.submit(row)
+            return
+
+        # El solicitante con intereses en la categoría recibe el ítem con su umbral, igual que
+        # el fan-out; la fila del análisis (vector, contadores globales, reputación) queda anónima
+        own = self.interests.match_user(request.user_id, vector, request.category) if request.user_id is not None else None
+        if own is None:
+            await self.writer.submit(row)
+        else:
+            await self.writer.submit(dict(row, user_id=None))
+            await self.writer.submit(self.delivery_row(row, ai_result, own))
+
+        # Fan-out: el veredicto (nunca el de emergencia) llega a cada usuario interesado
+        matches = self.interests.match(vector, request.category, exclude_user=request.user_id)
+        for match in matches:
+            await self.writer.submit(self.delivery_row(row, ai_result, match))
+        ai_result["delivered_to"] = len(matches)
+
+    async def run(self, request: AnalysisRequest, priority: int = PRIORITY_INTERACTIVE) -> AnalysisResponse:
+        """
+        Pipeline completo para una URL. Lanza AnalysisError si una etapa falla.
+        `priority` decide el turno en la cuota de Gemini (los jobs van detrás de /analyze).
+        """
+        with span("pipeline"):
+            await self.check_user(request)
+            decided = self.precheck(request)
+            if decided is not None:
+                nav_result, ai_result = decided
+                await self.save(request, nav_result, ai_result, None)
+                return self.build_response(request, nav_result, ai_result)
+
+            nav_result = await self.navigate(request)
+            ai_result, local = self.shortcut(request, nav_result)
+            if ai_result is None:
+                vector = await self.embed(nav_result, priority)
+                ai_result = await self.score(request, nav_result, vector, priority, local=local)
+            else:
+                vector = await self.embed(nav_result, priority) if self.wants_vector(ai_result) else None
+            await self.save(request, nav_result, ai_result, vector)
+            return self.build_response(request, nav_result, ai_result)
+
+    # --- STREAMING ---
+    async def stream(self, request: AnalysisRequest, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Mismo análisis que run(), entregado por partes como (evento, datos):
+        `page` (título y snippet) al terminar la navegación, `reasoning` con cada
+        trozo del razonamiento de Gemini (por fragmento en documentos largos, más
+        un `chunk` al terminar cada uno), `verdict` en cuanto hay veredicto y
+        `error` si una etapa falla. El embedding arranca en paralelo al veredicto
+        y, con la persistencia, termina después de responder (delivered_to va a 0).
+        """
+        embedding = scoring = None
+        finished = False
+        try:
+            await self.check_user(request)
+            decided = self.precheck(request)
+            if decided is not None:
+                nav_result, ai_result = decided
+                yield "page", self.page_event(request, nav_result)
+            else:
+                nav_result = await self.navigate(request)
+                yield "page", self.page_event(request, nav_result)
+
+                ai_result, local = self.shortcut(request, nav_result)
+                if ai_result is not None:
+                    # El vector (si hace falta) se calcula tras responder, como en el camino del LLM
+                    if self.wants_vector(ai_result):
+                        embedding = asyncio.create_task(self.embed(nav_result, priority))
+                    response = self.build_response(request, nav_result, ai_result)
+                    finished = True
+                    self._finish_later(request, nav_result, ai_result, embedding)
+                    yield "verdict", response.model_dump()
+                    return
+
+                embedding = asyncio.create_task(self.embed(nav_result, priority))
+                # Un casi-duplicado ahorra la llamada al LLM, pero solo esperamos al vector un momento
+                try:
+                    vector = await asyncio.wait_for(asyncio.shield(embedding), config.STREAM_DEDUP_WAIT_MS / 1000)
+                except asyncio.TimeoutError:
+                    vector = None
+
+                progress = asyncio.Queue()
+                scoring = asyncio.create_task(self.score(
+                    request, nav_result, vector, priority,
+                    on_reasoning=lambda chunk, text: progress.put_nowait(("reasoning", chunk, text)),
+                    on_chunk=lambda chunk, verdict: progress.put_nowait(("chunk", chunk, verdict)),
+                    local=local,
+                ))
+                total = len(nav_result.get("chunks") or ())
+                sent = {}  # fragmento (None = texto entero) -> razonamiento ya enviado
+                while not (scoring.done() and progress.empty()):
+                    getter = asyncio.ensure_future(progress.get())
+                    await asyncio.wait({getter, scoring}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    kind, chunk, payload = getter.result()
+                    if kind == "chunk":
+                        yield "chunk", self.chunk_event(chunk, total, payload)
+                        continue
+                    # Deltas por fragmento; si Gemini se reintentó, ese razonamiento vuelve a empezar
+                    previous = sent.get(chunk, "")
+                    if payload.startswith(previous):
+                        event = {"delta": payload[len(previous):]}
+                    else:
+                        event = {"delta": payload, "reset": True}
+                    if chunk is not None:
+                        event.update(chunk=chunk + 1, total=total)
+                    sent[chunk] = payload
+                    yield "reasoning", event
+                ai_result = scoring.result()
+
+            # La persistencia queda encargada antes de responder: aunque el cliente corte, se guarda
+            response = self.build_response(request, nav_result, ai_result)
+            finished = True
+            self._finish_later(request, nav_result, ai_result, embedding)
+            yield "verdict", response.model_dump()
+
+        except AnalysisError as e:
+            yield "error", {"url": str(request.url), "status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            yield "error", {"url": str(request.url), "status_code": 500, "detail": f"{type(e).__name__}: {e}"}
+        finally:
+            # Cliente desconectado antes del veredicto: no seguimos gastando cuota
+            if not finished:
+                for task in (embedding, scoring):
+                    if task is not None:
+                        task.cancel()
+
+    @staticmethod
+    def chunk_event(chunk: int, total: int, verdict: dict) -> dict:
+        """Veredicto parcial de un fragmento (1..total) de un documento largo."""
+        return {"chunk": chunk + 1, "total": total, "decision": verdict.get("decision"),
+                "quality_score": verdict.get("quality_score"), "is_clickbait": verdict.get("is_clickbait")}
+
+    @staticmethod
+    def page_event(request: AnalysisRequest, nav_result: dict) -> dict:
+        return {"url": str(request.url), "title": nav_result.get("title"),
+                "clean_text_snippet": nav_result["clean_text"][:200]}
+
+    def _finish_later(self, request: AnalysisRequest, nav_result: dict, ai_result: dict, embedding: Optional[asyncio.Task]):
+        async def finish():
+            vector = None
+            if embedding is not None:
+                try:
+                    vector = await embedding
+                except Exception as e:
+                    logger.warning(f"⚠️ Embedding tras el streaming falló: {e}", extra={"url": str(request.url)})
+            await self.save(request, nav_result, ai_result, vector)
+
+        task = asyncio.create_task(finish())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def drain(self):
+        """Espera a los embeddings/persistencias pendientes del streaming (apagado)."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    @staticmethod
+    def build_response(request: AnalysisRequest, nav_result: dict, ai_result: dict) -> AnalysisResponse:
+        return AnalysisResponse(
+            url=str(request.url),
+            title=nav_result.get("title"),
+            status="processed",
+            quality_score=ai_result.get("quality_score", 0.0),
+            decision=ai_result.get("decision", "BLOCK"),
+            is_clickbait=ai_result.get("is_clickbait", False),
+            reasoning=ai_result.get("analysis_reasoning", ""),
+            estimated_read_time=ai_result.get("estimated_read_time_seconds", 0),
+            clean_text_snippet=nav_result["clean_text"][:200],
+            verdict_source=ai_result.get("verdict_source", "llm"),
+            reused_from_id=ai_result.get("reused_from_id"),
+            delivered_to=ai_result.get("delivered_to", 0)
+        )
+
+    # --- LOTES ---
+    async def _run_batch_item(self, index: int, request: AnalysisRequest) -> dict:
+        try:
+            await self.check_user(request)
+            decided = self.precheck(request)
+            if decided is not None:
+                nav_result, ai_result = decided
+                vector = None
+            else:
+                async with self.navigate_limit:
+                    nav_result = await self.navigate(request)
+                ai_result, local = self.shortcut(request, nav_result)
+                vector = None
+                if ai_result is None or self.wants_vector(ai_result):
+                    async with self.embed_limit:
+                        vector = await self.embed(nav_result, PRIORITY_BATCH)
+                if ai_result is None:
+                    async with self.score_limit:
+                        ai_result = await self.score(request, nav_result, vector, PRIORITY_BATCH, local=local)
+
+            await self.save(request, nav_result, ai_result, vector)
+            response = self.build_response(request, nav_result, ai_result)
+            return {"index": index, **response.model_dump()}
+
+        except AnalysisError as e:
+            return {"index": index, "url": str(request.url), "status": "error",
+                    "status_code": e.status_code, "error": e.detail}
+        except Exception as e:
+            # Un ítem roto nunca tumba el lote completo
+            return {"index": index, "url": str(request.url), "status": "error",
+                    "status_code": 500, "error": f"{type(e).__name__}: {e}"}
+
+    async def run_batch(self, requests: List[AnalysisRequest]) -> AsyncIterator[dict]:
+        """Procesa el lote en paralelo y entrega cada resultado en orden de finalización."""
+        tasks = [asyncio.create_task(self._run_batch_item(i, r)) for i, r in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Si el cliente corta el stream, no seguimos gastando navegador ni cuota
+            for task in tasks:
+                task.cancel()
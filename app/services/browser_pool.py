@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, List, Optional
+
+from app.core import config
+from app.services.navigation_profiles import NavigationProfile, ResourceBlocker
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class BrowserPoolTimeout(Exception):
+    """Todas las páginas del pool están ocupadas y se agotó la espera."""
+
+
+class _BrowserHandle:
+    """Un proceso Chromium y sus contadores de uso."""
+
+    def __init__(self, browser: "Browser"):
+        self.browser = browser
+        self.navigations = 0
+        self.active = 0
+        self.retired = False
+
+    def needs_recycle(self, max_navigations: int) -> bool:
+        return self.navigations >= max_navigations or not self.browser.is_connected()
+
+    async def close(self):
+        try:
+            await self.browser.close()
+        except Exception:
+            pass  # Si el proceso ya murió no hay nada que cerrar
+
+
+class _Slot:
+    """Una página reutilizable (con su contexto) atada a un navegador del pool."""
+
+    def __init__(self, browser_index: int):
+        self.browser_index = browser_index
+        self.handle: Optional[_BrowserHandle] = None
+        self.context: Optional["BrowserContext"] = None
+        self.page: Optional["Page"] = None
+        # Ajustes vigentes de la página (cambian según el perfil de cada navegación)
+        self.javascript = True
+        self.viewport: Optional[dict] = None
+        self.block_types: frozenset = frozenset()
+
+    async def dispose(self):
+        if self.context is not None:
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+        self.handle = self.context = self.page = None
+
+
+class BrowserPool:
+    """
+    Pool de navegadores "calientes" que vive lo mismo que la app FastAPI.
+
+    - `size` páginas repartidas entre `browsers` procesos Chromium.
+    - Cada navegador se recicla tras `max_navigations` usos o si se cae.
+    - Si todas las páginas están ocupadas, `page()` espera hasta `acquire_timeout`
+      y luego lanza BrowserPoolTimeout (backpressure en lugar de encolar sin límite).
+    - Cada contexto pasa sus peticiones por `blocker` (imágenes, fuentes, trackers...).
+    """
+
+    def __init__(
+        self,
+        size: int = config.BROWSER_POOL_SIZE,
+        browsers: int = config.BROWSER_POOL_BROWSERS,
+        max_navigations: int = config.BROWSER_MAX_NAVIGATIONS,
+        acquire_timeout: float = config.BROWSER_ACQUIRE_TIMEOUT,
+        blocker: Optional[ResourceBlocker] = None,
+    ):
+        self.size = max(1, size)
+        self.browsers = max(1, min(browsers, self.size))
+        self.max_navigations = max_navigations
+        self.acquire_timeout = acquire_timeout
+        self.blocker = blocker or ResourceBlocker()
+
+        self._playwright = None
+        self._handles: List[Optional[_BrowserHandle]] = [None] * self.browsers
+        self._locks = [asyncio.Lock() for _ in range(self.browsers)]
+        self._free: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+
+        # Métricas
+        self.in_use = 0
+        self.waiting = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.navigations = 0
+        self.timeouts = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+            # Import diferido: Playwright solo se carga al arrancar el pool
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+            for i in range(self.browsers):
+                self._handles[i] = await self._launch()
+            self._free = asyncio.Queue()
+            for n in range(self.size):
+                self._free.put_nowait(_Slot(n % self.browsers))
+            logger.info(f"🌐 Pool de navegadores listo ({self.browsers} navegador/es, {self.size} páginas)")
+
+    async def close(self):
+        async with self._start_lock:
+            if not self.started:
+                return
+            if self._free is not None:
+                while not self._free.empty():
+                    await self._free.get_nowait().dispose()
+            for handle in self._handles:
+                if handle is not None:
+                    await handle.close()
+            self._handles = [None] * self.browsers
+            await self._playwright.stop()
+            self._playwright = None
+            self._free = None
+
+    async def _launch(self) -> _BrowserHandle:
+        browser = await self._playwright.chromium.launch(headless=True)
+        return _BrowserHandle(browser)
+
+    async def _checkout(self, slot: _Slot, profile: NavigationProfile):
+        """Prepara la página del slot con el perfil pedido, reciclando el navegador si hace falta."""
+        async with self._locks[slot.browser_index]:
+            current = self._handles[slot.browser_index]
+            if current.needs_recycle(self.max_navigations):
+                if not current.browser.is_connected():
+                    self.crashed += 1
+                    logger.warning("⚠️ Navegador caído, relanzando...")
+                self._handles[slot.browser_index] = await self._launch()
+                current.retired = True
+                self.recycled += 1
+                # Si otras páginas aún lo usan, se cierra cuando la última lo libere
+                if current.active == 0:
+                    await current.close()
+                current = self._handles[slot.browser_index]
+
+        # JavaScript es una opción del contexto: si el perfil la cambia, contexto nuevo
+        if (slot.handle is not current or slot.page is None or slot.page.is_closed()
+                or slot.javascript != profile.javascript):
+            await slot.dispose()
+            slot.context = await current.browser.new_context(
+                user_agent=USER_AGENT, java_script_enabled=profile.javascript, viewport=profile.viewport
+            )
+            await slot.context.route("**/*", self._route_handler(slot))
+            slot.page = await slot.context.new_page()
+            slot.handle = current
+            slot.javascript = profile.javascript
+            slot.viewport = profile.viewport
+        elif slot.viewport != profile.viewport:
+            await slot.page.set_viewport_size(profile.viewport)
+            slot.viewport = profile.viewport
+        slot.block_types = profile.block_resources
+        current.active += 1
+
+    def _route_handler(self, slot: _Slot):
+        async def handle(route):
+            # Se leen los tipos del slot en cada petición: el perfil cambia entre navegaciones
+            await self.blocker.handle(route, slot.block_types)
+        return handle
+
+    async def _checkin(self, slot: _Slot):
+        handle = slot.handle
+        handle.active -= 1
+        handle.navigations += 1
+        self.navigations += 1
+        if handle.retired and handle.active == 0:
+            await slot.dispose()
+            await handle.close()
+        elif handle.browser.is_connected():
+            try:
+                # Aislamos sesiones entre peticiones sin pagar un contexto nuevo
+                await slot.context.clear_cookies()
+            except Exception:
+                await slot.dispose()
+
+    @asynccontextmanager
+    async def page(self, profile: Optional[NavigationProfile] = None):
+        """Presta una página del pool, ajustada a `profile`, durante el bloque `async with`."""
+        if not self.started:
+            await self.start()
+
+        free = self._free
+        self.waiting += 1
+        try:
+            slot = await asyncio.wait_for(free.get(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise BrowserPoolTimeout(f"Sin páginas libres tras {self.acquire_timeout}s")
+        finally:
+            self.waiting -= 1
+
+        self.in_use += 1
+        checked_out = False
+        try:
+            await self._checkout(slot, profile or NavigationProfile())
+            checked_out = True
+            yield slot.page
+        finally:
+            self.in_use -= 1
+            try:
+                if checked_out:
+                    await self._checkin(slot)
+            finally:
+                free.put_nowait(slot)
+
+    def metrics(self) -> dict:
+        return {
+            "started": self.started,
+            "size": self.size,
+            "browsers": self.browsers,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+            "navigations": self.navigations,
+            "timeouts": self.timeouts,
+            "resources": self.blocker.metrics(),
+        }
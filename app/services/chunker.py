@@ -0,0 +1,186 @@
+# The Signal Engine - Documentos largos
+# Trocea el texto limpio en fragmentos por párrafos/encabezados y elige los más
+# informativos con TF-IDF contra el tópico (solo CPU, sin llamadas externas).
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from app.core import config
+
+_TOKEN = re.compile(r"[^\W\d_]{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+# Un encabezado: línea corta, sin puntuación final, o un título markdown
+_HEADING_MAX_WORDS = 12
+_HEADING_MAX_CHARS = 120
+# Fragmentos con menos palabras que esto (menús, avisos de cookies...) pierden saliencia
+_MIN_INFORMATIVE_TOKENS = 40
+
+STOPWORDS = frozenset(
+    # ES
+    "los las del que por para con una uno unos unas como mas pero sus este esta estos estas ese esa eso "
+    "hay ser son fue han has hemos sin sobre entre cuando donde quien todo todos toda todas tambien muy "
+    "solo puede pueden desde hasta porque cada otro otra otros otras nos les ella ellos aqui asi ya "
+    # EN
+    "the and for are was were with that this these those from have has had not but you your our their "
+    "they them its will would can could should into about than then there here what which when who "
+    "all any also been being more most such only other over some just".split()
+)
+
+
+@dataclass
+class Chunk:
+    index: int  # posición en el documento
+    text: str
+    salience: float = 0.0
+
+
+@lru_cache(maxsize=65536)
+def _fold(token: str) -> str:
+    # Por palabra (no por carácter del texto): el vocabulario de un documento es pequeño
+    return "".join(c for c in unicodedata.normalize("NFKD", token) if not unicodedata.combining(c))
+
+
+def term_counts(text: str) -> Counter:
+    """Frecuencia de palabras en minúsculas y sin tildes (código == codigo), sin números ni stopwords."""
+    counts = Counter()
+    # Se cuenta antes de normalizar: cada palabra distinta se pliega una sola vez
+    for token, freq in Counter(_TOKEN.findall(text.lower())).items():
+        term = _fold(token)
+        if term not in STOPWORDS:
+            counts[term] += freq
+    return counts
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if line.startswith("#"):
+        return True
+    return (
+        0 < len(line) <= _HEADING_MAX_CHARS
+        and len(line.split()) <= _HEADING_MAX_WORDS
+        and line[0].isupper()
+        and line[-1] not in ".,;:!?…)»\"'"
+    )
+
+
+def _units(text: str, max_chars: int):
+    """Líneas del texto; las más largas que `max_chars` se parten por frases (o a ciegas)."""
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            yield line
+            continue
+        piece = ""
+        for sentence in _SENTENCE_END.split(line):
+            while len(sentence) > max_chars:
+                yield sentence[:max_chars]
+                sentence = sentence[max_chars:]
+            if piece and len(piece) + len(sentence) + 1 > max_chars:
+                yield piece
+                piece = ""
+            piece = f"{piece} {sentence}" if piece else sentence
+        if piece:
+            yield piece
+
+
+def split_chunks(text: str, target_chars: int, max_chars: int) -> List[Chunk]:
+    """
+    Agrupa líneas en fragmentos de ~`target_chars` (nunca más de `max_chars`).
+    Se corta preferentemente antes de un encabezado; pasado el objetivo, en el
+    siguiente inicio de párrafo (las líneas que empiezan en minúscula suelen ser
+    texto de un enlace o negrita en mitad de la frase).
+    """
+    chunks: List[Chunk] = []
+    current: List[str] = []
+    size = 0
+    for line in _units(text, max_chars):
+        if current and (
+            size + len(line) + 1 > max_chars
+            or (is_heading(line) and size >= target_chars // 2)
+            or (size >= target_chars and line[0].isupper())
+        ):
+            chunks.append(Chunk(len(chunks), "\n".join(current)))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append(Chunk(len(chunks), "\n".join(current)))
+    return chunks
+
+
+def score_salience(chunks: List[Chunk], topic: str, topic_weight: float):
+    """
+    Saliencia de cada fragmento = mezcla de
+    - relevancia: coseno TF-IDF entre el fragmento y el tópico (IDF sobre los fragmentos del documento),
+    - densidad: IDF medio de sus palabras (el texto repetido en todo el documento —navegación,
+      pies, avisos— aporta poco).
+    """
+    if not chunks:
+        return
+    counts = [term_counts(chunk.text) for chunk in chunks]
+    df = Counter(term for tf in counts for term in tf)
+    n = len(chunks)
+    idf = {term: math.log((1 + n) / (1 + freq)) + 1.0 for term, freq in df.items()}
+    max_idf = math.log(1 + n) + 1.0
+
+    topic_terms = term_counts(topic)
+    topic_vec = {term: idf.get(term, max_idf) * (1 + math.log(freq)) for term, freq in topic_terms.items()}
+    topic_norm = math.sqrt(sum(w * w for w in topic_vec.values())) or 1.0
+
+    for chunk, tf in zip(chunks, counts):
+        tokens = sum(tf.values())
+        if not tokens:
+            chunk.salience = 0.0
+            continue
+        vec = {term: (1 + math.log(freq)) * idf[term] for term, freq in tf.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        relevance = sum(vec.get(term, 0.0) * w for term, w in topic_vec.items()) / (norm * topic_norm)
+        density = sum(idf[term] * freq for term, freq in tf.items()) / (tokens * max_idf)
+        salience = topic_weight * relevance + (1 - topic_weight) * density
+        chunk.salience = salience * min(1.0, tokens / _MIN_INFORMATIVE_TOKENS)
+
+
+class DocumentChunker:
+    """
+    Para textos de más de `min_doc_chars`: trocea, puntúa y se queda con los
+    fragmentos más salientes hasta `budget_chars` / `max_selected` (en orden de
+    lectura). Los textos cortos devuelven None y se evalúan enteros como siempre.
+    """
+
+    def __init__(
+        self,
+        min_doc_chars: int = config.CHUNK_MIN_DOC_CHARS,
+        target_chars: int = config.CHUNK_TARGET_CHARS,
+        max_chars: int = config.CHUNK_MAX_CHARS,
+        max_selected: int = config.CHUNK_MAX_SELECTED,
+        budget_chars: int = config.CHUNK_BUDGET_CHARS,
+        topic_weight: float = config.CHUNK_TOPIC_WEIGHT,
+    ):
+        self.min_doc_chars = min_doc_chars
+        self.target_chars = target_chars
+        self.max_chars = max_chars
+        self.max_selected = max_selected
+        self.budget_chars = budget_chars
+        self.topic_weight = topic_weight
+
+    def select(self, text: str, topic: str) -> Optional[List[Chunk]]:
+        if len(text) <= self.min_doc_chars:
+            return None
+        chunks = split_chunks(text, self.target_chars, self.max_chars)
+        score_salience(chunks, topic, self.topic_weight)
+
+        selected, used = [], 0
+        for chunk in sorted(chunks, key=lambda c: c.salience, reverse=True):
+            if len(selected) >= self.max_selected:
+                break
+            if selected and used + len(chunk.text) > self.budget_chars:
+                continue
+            selected.append(chunk)
+            used += len(chunk.text)
+        return sorted(selected, key=lambda c: c.index)
@@ -1,22 +1,205 @@
 import os
+import re
 import json
+import asyncio
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from langchain_google_genai import ChatGoogleGenerativeAI
-from app.core.prompts import RUTHLESS_EDITOR_PROMPT
+from functools import partial
+from typing import Callable, List, Optional
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from app.core import config
+from app.core.prompts import CHUNK_CONTEXT, RUTHLESS_EDITOR_PROMPT
+from app.core.telemetry import PAYLOAD_CHARS, RETRIES, observe_tokens, span
+from app.services.chunker import Chunk
+from app.services.rate_limiter import GeminiRateLimiter, PRIORITY_INTERACTIVE, estimate_tokens, gemini_limiter, is_retryable
+from app.services.verdict_cache import VerdictCache
 
-# Configuración de Logging para ver cuándo ocurren los reintentos
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SCORER_MODEL = "gemini-2.0-flash"
+
+# Veredicto de emergencia cuando Gemini no responde (nunca se cachea)
+FALLBACK_VERDICT = {
+    "quality_score": 0.0,
+    "decision": "BLOCK",
+    "analysis_reasoning": "El servicio de IA está temporalmente no disponible (Rate Limit o Error de Proceso).",
+    "is_clickbait": False,
+    "estimated_read_time_seconds": 0
+}
+
+# Umbral de "señal válida" del prompt: desempata el reduce de documentos largos
+SIGNAL_THRESHOLD = 0.6
+
+
+def merge_verdicts(verdicts: List[dict], weights: List[float], read_time_seconds: int) -> dict:
+    """
+    Reduce de los veredictos por fragmento: media ponderada de la calidad y voto
+    ponderado de decisión y clickbait (empate => decide la calidad media). El
+    razonamiento es el del fragmento de más peso que coincide con la decisión.
+    """
+    total = sum(weights)
+    weights = [w / total for w in weights] if total > 0 else [1.0 / len(weights)] * len(weights)
+    quality = sum(w * float(v.get("quality_score", 0.0)) for v, w in zip(verdicts, weights))
+    show = sum(w for v, w in zip(verdicts, weights) if v.get("decision") == "SHOW")
+    if abs(show - 0.5) < 1e-9:
+        decision = "SHOW" if quality >= SIGNAL_THRESHOLD else "BLOCK"
+    else:
+        decision = "SHOW" if show > 0.5 else "BLOCK"
+    clickbait = sum(w for v, w in zip(verdicts, weights) if v.get("is_clickbait")) > 0.5
+    agreeing = [(w, v) for v, w in zip(verdicts, weights) if v.get("decision") == decision]
+    reasoning = max(agreeing, key=lambda pair: pair[0])[1].get("analysis_reasoning", "") if agreeing else ""
+    return {
+        "quality_score": round(quality, 3),
+        "decision": decision,
+        "analysis_reasoning": f"[{len(verdicts)} fragmentos] {reasoning}",
+        "is_clickbait": clickbait,
+        "estimated_read_time_seconds": read_time_seconds,
+    }
+
+
+_REASONING_START = re.compile(r'"analysis_reasoning"\s*:\s*"')
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def partial_reasoning(text: str) -> str:
+    """
+    `analysis_reasoning` de un JSON que aún está llegando (streaming): el texto
+    decodificado hasta donde haya llegado, sin escapes a medias.
+    """
+    match = _REASONING_START.search(text)
+    if match is None:
+        return ""
+    out, i = [], match.end()
+    while i < len(text) and text[i] != '"':
+        if text[i] != "\\":
+            out.append(text[i])
+            i += 1
+            continue
+        if i + 1 >= len(text):
+            break
+        if text[i + 1] != "u":
+            out.append(_JSON_ESCAPES.get(text[i + 1], text[i + 1]))
+            i += 2
+            continue
+        # \uXXXX (y el par sustituto completo si es un emoji)
+        size = 12 if i + 6 <= len(text) and 0xD800 <= int(text[i + 2:i + 6], 16) <= 0xDBFF else 6
+        if i + size > len(text):
+            break
+        out.append(json.loads(f'"{text[i:i + size]}"'))
+        i += size
+    return "".join(out)
+
+
+def _build_llm():
+    # Import diferido: langchain + SDK de Gemini tardan más de un segundo en importarse
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=SCORER_MODEL,
+        temperature=0.1,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        convert_system_message_to_human=True,
+        # Sin reintentos internos del SDK: los gestiona @retry + el limitador de cuota
+        max_retries=1
+    )
+
+
+def _log_retry(retry_state):
+    RETRIES.labels("llm").inc()
+    logger.warning(f"⚠️ API saturada. Reintentando en {retry_state.next_action.sleep}s...")
+
+
 class ContentScorer:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            convert_system_message_to_human=True
-        )
+    def __init__(self, cache: Optional[VerdictCache] = None, limiter: Optional[GeminiRateLimiter] = None, llm=None):
+        # `llm`: cualquier modelo con `ainvoke(messages)` (p. ej. el falso de benchmarks/fakes.py).
+        # Si no se pasa, el cliente de Gemini se crea en el primer uso o en warm()
+        self._llm = llm
+        # Mismo contenido + tópico + categoría + prompt => mismo veredicto
+        self.cache = cache or VerdictCache()
+        # Cuota compartida con EmbeddingService
+        self.limiter = limiter or gemini_limiter
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = _build_llm()
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+
+    def warm(self):
+        """Importa langchain y crea el cliente (bloqueante: el lifespan lo llama en un hilo)."""
+        return self.llm
+
+    async def analyze_content(self, content: str, topic: str, category: str, priority: int = PRIORITY_INTERACTIVE,
+                              on_reasoning: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Devuelve el veredicto cacheado si existe; si no, consulta a Gemini y lo guarda.
+        Con `on_reasoning`, Gemini responde en streaming y el callback recibe el
+        razonamiento acumulado cada vez que crece (tras un reintento vuelve a empezar).
+        """
+        key = self.cache.key(content, topic, category)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return {**cached, "verdict_source": "cache"}
+
+        try:
+            verdict = await self._score(content, topic, category, priority, on_reasoning=on_reasoning)
+        except Exception as e:
+            # Este bloque se ejecuta si se agotan todos los reintentos
+            logger.error(f"❌ Scorer agotó reintentos o falló: {e}")
+            return {**FALLBACK_VERDICT, "verdict_source": "fallback"}
+
+        await self.cache.put(key, verdict)
+        return {**verdict, "verdict_source": "llm"}
+
+    async def analyze_chunks(
+        self,
+        chunks: List[Chunk],
+        topic: str,
+        category: str,
+        read_time_seconds: int = 0,
+        priority: int = PRIORITY_INTERACTIVE,
+        on_reasoning: Optional[Callable[[int, str], None]] = None,
+        on_chunk: Optional[Callable[[int, dict], None]] = None,
+    ) -> dict:
+        """
+        Map-reduce para documentos largos: cada fragmento seleccionado se evalúa
+        en paralelo (prompts pequeños) y los veredictos se combinan en local.
+        Con algún fragmento fallido se combina lo que haya, pero no se cachea.
+        Progreso por fragmento `i` (posición en `chunks`): `on_reasoning(i, texto)`
+        como en analyze_content y `on_chunk(i, veredicto)` al terminar cada uno.
+        """
+        context = CHUNK_CONTEXT.format(index="i", total=len(chunks))
+        key = self.cache.key(context + "\x1e".join(chunk.text for chunk in chunks), topic, category)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return {**cached, "verdict_source": "cache"}
+
+        async def score_chunk(i: int, chunk: Chunk) -> dict:
+            verdict = await self._score(
+                chunk.text, topic, category, priority,
+                note=CHUNK_CONTEXT.format(index=i + 1, total=len(chunks)),
+                on_reasoning=partial(on_reasoning, i) if on_reasoning is not None else None,
+            )
+            if on_chunk is not None:
+                on_chunk(i, verdict)
+            return verdict
+
+        results = await asyncio.gather(*(score_chunk(i, chunk) for i, chunk in enumerate(chunks)),
+                                       return_exceptions=True)
+
+        scored = [(chunk, r) for chunk, r in zip(chunks, results) if not isinstance(r, BaseException)]
+        if not scored:
+            logger.error(f"❌ Scorer agotó reintentos o falló en los {len(chunks)} fragmentos: {results[0]}")
+            return {**FALLBACK_VERDICT, "verdict_source": "fallback"}
+
+        verdict = merge_verdicts([r for _, r in scored], [max(c.salience, 1e-6) for c, _ in scored], read_time_seconds)
+        if len(scored) == len(chunks):
+            await self.cache.put(key, verdict)
+        else:
+            logger.warning(f"⚠️ {len(chunks) - len(scored)} de {len(chunks)} fragmentos sin evaluar")
+        return {**verdict, "verdict_source": "llm"}
     
     # --- AQUÍ ESTÁ LA MAGIA DEL BACKOFF ---
     @retry(
@@ -24,41 +207,53 @@ class ContentScorer:
         wait=wait_exponential(multiplier=1, min=2, max=10),
         # 2. Rendirse después de 3 intentos (para no colgar al usuario eternamente)
         stop=stop_after_attempt(3),
-        # 3. Loguear cada intento fallido
-        before_sleep=lambda retry_state: logger.warning(f"⚠️ API saturada. Reintentando en {retry_state.next_action.sleep}s..."),
-        # 4. Solo reintentar ante errores (RESOURCE_EXHAUSTED genera excepciones genéricas en este nivel)
-        retry=retry_if_exception_type(Exception),
-        reraise=True # Permite capturar el error final en el try/except de abajo
+        # 3. Loguear y contar cada intento fallido (signal_retries_total)
+        before_sleep=_log_retry,
+        # 4. Solo reintentar errores transitorios (cuota, 5xx, red). Un JSON inválido no se reintenta.
+        retry=retry_if_exception(is_retryable),
+        reraise=True # Permite capturar el error final en el try/except de analyze_content
     )
-    async def analyze_content(self, content: str, topic: str, category: str) -> dict:
+    async def _score(self, content: str, topic: str, category: str, priority: int = PRIORITY_INTERACTIVE, note: str = "",
+                     on_reasoning: Optional[Callable[[str], None]] = None) -> dict:
         """
         Analiza el contenido con reintentos automáticos ante fallos de red/cuota.
+        `note`: contexto extra antes del contenido (p. ej. CHUNK_CONTEXT).
         """
         messages = [
             ("system", RUTHLESS_EDITOR_PROMPT),
-            ("human", f"TÓPICO: {topic}\nCATEGORÍA: {category}\n\nCONTENIDO A ANALIZAR:\n{content}")
+            ("human", f"TÓPICO: {topic}\nCATEGORÍA: {category}\n{note}\nCONTENIDO A ANALIZAR:\n{content}")
         ]
         
-        try:
-            # Si esto falla por Rate Limit, @retry lo captura y espera
-            response = await self.llm.ainvoke(messages)
+        # Esperamos turno en la cuota (RPM/TPM) antes de llamar; si aun así
+        # falla por Rate Limit, el limitador baja la concurrencia y @retry espera
+        prompt = RUTHLESS_EDITOR_PROMPT + messages[1][1]
+        PAYLOAD_CHARS.labels("prompt").observe(len(prompt))
+        tokens = estimate_tokens(prompt) + config.GEMINI_OUTPUT_TOKENS_ESTIMATE
+        async with self.limiter.acquire(tokens, priority):
+            with span("llm", model=SCORER_MODEL):
+                if on_reasoning is None:
+                    response = await self.llm.ainvoke(messages)
+                else:
+                    response = await self._stream(messages, on_reasoning)
+        # Tokens reales informados por Gemini (input/output)
+        observe_tokens(SCORER_MODEL, getattr(response, "usage_metadata", None) or {})
+        
+        # Limpieza y Parseo JSON
+        text_response = response.content
+        if "```json" in text_response:
+            text_response = text_response.split("```json")[1].split("```")[0]
+        elif "```" in text_response:
+            text_response = text_response.replace("```", "")
             
-            # Limpieza y Parseo JSON
-            text_response = response.content
-            if "```json" in text_response:
-                text_response = text_response.split("```json")[1].split("```")[0]
-            elif "```" in text_response:
-                text_response = text_response.replace("```", "")
-                
-            return json.loads(text_response.strip())
+        return json.loads(text_response.strip())
 
-        except Exception as e:
-            # Este bloque se ejecuta si se agotan todos los reintentos (o si falla el parseo)
-            logger.error(f"❌ Scorer agotó reintentos o falló: {e}")
-            return {
-                "quality_score": 0.0,
-                "decision": "BLOCK",
-                "analysis_reasoning": "El servicio de IA está temporalmente no disponible (Rate Limit o Error de Proceso).",
-                "is_clickbait": False,
-                "estimated_read_time_seconds": 0
-            }
+    async def _stream(self, messages, on_reasoning: Callable[[str], None]):
+        """`astream`: junta los trozos en un solo mensaje y avisa de cada avance del razonamiento."""
+        response, reasoning = None, ""
+        async for chunk in self.llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            partial = partial_reasoning(response.content)
+            if len(partial) > len(reasoning):
+                reasoning = partial
+                on_reasoning(reasoning)
+        return response
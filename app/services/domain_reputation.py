@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.core import config
+from app.db.models import CategoryTaxonomy, ContentHistory, TrustedSource
+from app.db.session import AsyncSessionLocal
+from app.services.content_scorer import FALLBACK_VERDICT
+from app.services.domain_trie import DomainTrie, normalize_host
+
+logger = logging.getLogger(__name__)
+
+# category_taxonomy.priority_level: 1=Alta ... 4=Bloquear
+PRIORITY_BLOCK = 4
+# Prefijo del razonamiento de los veredictos por dominio: no cuentan para el historial
+# del propio dominio (si no, un bloqueo se realimentaría para siempre)
+DOMAIN_REASON_PREFIX = "Reputación de dominio"
+
+
+class _DomainHistory:
+    __slots__ = ("total", "blocked")
+
+    def __init__(self, total: int = 0, blocked: int = 0):
+        self.total = total
+        self.blocked = blocked
+
+
+class DomainReputation:
+    """
+    Atajo previo a la navegación, todo en memoria (sin I/O por petición):
+
+    - `trusted_sources` en un DomainTrie y `category_taxonomy.priority_level` en un dict.
+    - Historial de veredictos por host en los últimos DOMAIN_HISTORY_DAYS, sumado a
+      los veredictos que este proceso va viendo entre recargas.
+
+    Una tarea de fondo recarga todo desde Postgres cada DOMAIN_REPUTATION_REFRESH segundos.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        enabled: bool = config.DOMAIN_REPUTATION_ENABLED,
+        refresh_interval: int = config.DOMAIN_REPUTATION_REFRESH,
+        history_days: int = config.DOMAIN_HISTORY_DAYS,
+        block_min_items: int = config.DOMAIN_BLOCK_MIN_ITEMS,
+        block_ratio: float = config.DOMAIN_BLOCK_RATIO,
+        fast_track_trust: float = config.DOMAIN_TRUST_FAST_TRACK,
+        trust_weight: float = config.DOMAIN_TRUST_WEIGHT,
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.history_days = history_days
+        self.block_min_items = block_min_items
+        self.block_ratio = block_ratio
+        self.fast_track_trust = fast_track_trust
+        self.trust_weight = trust_weight
+
+        self.trusted = DomainTrie()
+        self.priorities: Dict[str, int] = {}
+        self.history: Dict[str, _DomainHistory] = {}
+        self.refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Métricas
+        self.blocked = 0
+        self.fast_tracked = 0
+        self.adjusted = 0
+
+    # --- CICLO DE VIDA ---
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def refresh(self):
+        """Reconstruye el índice desde Postgres; si falla se conserva el anterior."""
+        try:
+            trusted, priorities, history = await self._load()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo recargar la reputación de dominios: {e}")
+            return
+        # Sustitución atómica: las búsquedas en curso ven el índice viejo o el nuevo, nunca uno a medias
+        self.trusted, self.priorities, self.history = trusted, priorities, history
+        self.refreshed_at = time.time()
+
+    async def _load(self):
+        host = func.regexp_replace(
+            func.lower(func.substring(ContentHistory.source_url, r"^[a-zA-Z]+://([^/:?#]+)")), r"^www\.", ""
+        )
+        since = datetime.now(timezone.utc) - timedelta(days=self.history_days)
+        async with self.session_factory() as db:
+            sources = (await db.execute(select(TrustedSource.domain, TrustedSource.base_trust_score))).all()
+            taxonomy = (await db.execute(select(CategoryTaxonomy.code, CategoryTaxonomy.priority_level))).all()
+            rows = (await db.execute(
+                select(host.label("host"), func.count().label("total"),
+                       func.count().filter(ContentHistory.is_signal.is_(False)).label("blocked"))
+                .where(
+                    ContentHistory.analyzed_at >= since,
+                    # Un análisis cuenta una vez, no una por usuario que lo recibió
+                    ContentHistory.interest_id.is_(None),
+                    ContentHistory.content_summary != FALLBACK_VERDICT["analysis_reasoning"],
+                    ContentHistory.content_summary.not_like(f"{DOMAIN_REASON_PREFIX}%"),
+                )
+                .group_by(host)
+            )).all()
+
+        trusted = DomainTrie()
+        for domain, score in sources:
+            if domain:
+                trusted.insert(domain, float(score if score is not None else 1.0))
+        priorities = {code: level for code, level in taxonomy if level is not None}
+        history = {row.host: _DomainHistory(row.total, row.blocked) for row in rows if row.host}
+        return trusted, priorities, history
+
+    # --- CONSULTAS (síncronas, sin I/O) ---
+    def precheck(self, url: str, category: str) -> Optional[dict]:
+        """
+        Veredicto BLOCK antes de navegar (categoría bloqueada o dominio con historial de ruido), o None.
+        Las fuentes de confianza nunca se bloquean sin leerlas: se evalúan aunque la categoría sea de ruido.
+        """
+        if not self.enabled:
+            return None
+        host = normalize_host(url)
+        if self.trusted.longest_match(host) is not None:
+            return None
+        if self.priorities.get(category) == PRIORITY_BLOCK:
+            self.blocked += 1
+            return self._verdict("BLOCK", 0.0, f"la categoría {category} está marcada para bloqueo")
+
+        stats = self.history.get(host)
+        if stats is None or stats.total < self.block_min_items:
+            return None
+        ratio = stats.blocked / stats.total
+        if ratio < self.block_ratio:
+            return None
+        self.blocked += 1
+        return self._verdict("BLOCK", 0.0, f"{host} bloqueado en {stats.blocked}/{stats.total} análisis recientes")
+
+    def fast_track(self, url: str, clean_text: str, category: Optional[str] = None) -> Optional[dict]:
+        """
+        Veredicto SHOW para fuentes de máxima confianza (sin pre-filtro ni LLM), o None.
+        En una categoría marcada para bloqueo no hay atajo: el contenido se evalúa.
+        """
+        if not self.enabled or self.priorities.get(category) == PRIORITY_BLOCK:
+            return None
+        trust = self.trusted.longest_match(normalize_host(url))
+        if trust is None or trust < self.fast_track_trust:
+            return None
+        self.fast_tracked += 1
+        verdict = self._verdict("SHOW", trust, f"{normalize_host(url)} es una fuente de confianza")
+        verdict["estimated_read_time_seconds"] = int(len(clean_text.split()) / 200 * 60)  # ~200 palabras/minuto
+        return verdict
+
+    def observe(self, url: str, verdict: dict) -> dict:
+        """
+        Mezcla la confianza de la fuente en el quality_score y anota el veredicto
+        en el historial del dominio. Devuelve el veredicto (ajustado si procede).
+        """
+        if not self.enabled or verdict.get("verdict_source") in ("fallback", "domain"):
+            return verdict
+        host = normalize_host(url)
+
+        stats = self.history.setdefault(host, _DomainHistory())
+        stats.total += 1
+        if verdict.get("decision") == "BLOCK":
+            stats.blocked += 1
+
+        trust = self.trusted.longest_match(host)
+        if trust is None:
+            return verdict
+        self.adjusted += 1
+        quality = float(verdict.get("quality_score", 0.0))
+        return {**verdict, "quality_score": round((1 - self.trust_weight) * quality + self.trust_weight * trust, 3)}
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "trusted_domains": self.trusted.size,
+            "tracked_domains": len(self.history),
+            "blocked": self.blocked,
+            "fast_tracked": self.fast_tracked,
+            "trust_adjusted": self.adjusted,
+            "refreshed_at": self.refreshed_at,
+        }
+
+    @staticmethod
+    def _verdict(decision: str, quality: float, reason: str) -> dict:
+        return {
+            "quality_score": round(float(quality), 3),
+            "decision": decision,
+            "analysis_reasoning": f"{DOMAIN_REASON_PREFIX}: {reason}",
+            "is_clickbait": False,
+            "estimated_read_time_seconds": 0,
+            "verdict_source": "domain",
+        }
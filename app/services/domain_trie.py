@@ -0,0 +1,39 @@
+# Índice de dominios por sufijo (reputación, perfiles de navegación, trackers)
+from urllib.parse import urlsplit
+
+_LEAF = ""  # clave reservada en los nodos del trie: ninguna etiqueta DNS es vacía
+
+
+def normalize_host(url_or_host: str) -> str:
+    host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host
+    host = (host or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainTrie:
+    """
+    Trie por etiquetas invertidas (org → arxiv → export): `longest_match` devuelve
+    el valor del sufijo registrado más largo, así arxiv.org cubre export.arxiv.org.
+    Coste de la búsqueda: una visita por etiqueta del host.
+    """
+
+    def __init__(self):
+        self._root: dict = {}
+        self.size = 0
+
+    def insert(self, domain: str, value):
+        node = self._root
+        for label in reversed(normalize_host(domain).split(".")):
+            node = node.setdefault(label, {})
+        if _LEAF not in node:
+            self.size += 1
+        node[_LEAF] = value
+
+    def longest_match(self, host: str):
+        node, found = self._root, None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_LEAF, found)
+        return found
@@ -1,21 +1,254 @@
+import asyncio
+import hashlib
+import logging
 import os
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
-class EmbeddingService:
-    def __init__(self):
-        # Usamos el modelo optimizado de Google (768 dimensiones)
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-
-    async def generate_embedding(self, text: str):
+import numpy as np
+from sqlalchemy import select
+
+from app.core import config
+from app.core.telemetry import CACHE_LOOKUPS, span
+from app.db.models import ContentHistory
+from app.db.session import AsyncSessionLocal
+from app.services.rate_limiter import GeminiRateLimiter, PRIORITY_INTERACTIVE, estimate_tokens, gemini_limiter
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+# Google recomienda no enviar textos masivos de golpe para embeddings
+EMBEDDING_MAX_CHARS = 10000
+
+
+def embedding_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    """Hash del texto que realmente se vectoriza: mismo texto => mismo vector."""
+    return hashlib.sha256(f"{model}\x1f{text[:EMBEDDING_MAX_CHARS]}".encode("utf-8")).hexdigest()
+
+
+def to_vector(values) -> np.ndarray:
+    # float32 contiguo: ~3 KB por vector de 768 dimensiones (una lista de floats de Python ocupa ~8x)
+    return np.asarray(values, dtype=np.float32)
+
+
+def pool_vectors(vectors: List[Optional[np.ndarray]], weights: List[float]) -> Optional[np.ndarray]:
+    """Vector del documento: media ponderada de los fragmentos (sin los fallidos), normalizada a norma 1."""
+    pairs = [(v, w) for v, w in zip(vectors, weights) if v is not None]
+    if not pairs:
+        return None
+    pooled = np.average(np.stack([v for v, _ in pairs]), axis=0, weights=[w for _, w in pairs])
+    norm = np.linalg.norm(pooled)
+    return to_vector(pooled / norm if norm > 0 else pooled)
+
+
+class EmbeddingCache:
+    """
+    Caché direccionada por contenido (clave = embedding_key):
+    1. LRU en memoria con vectores float32.
+    2. Filas de `content_history` con el mismo `content_hash`: el vector ya está guardado.
+    """
+
+    def __init__(self, max_entries: int = config.EMBEDDING_CACHE_SIZE, session_factory=AsyncSessionLocal):
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Métricas
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            CACHE_LOOKUPS.labels("embedding", "memory").inc()
+        return vector
+
+    def remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Busca en el historial los vectores de varias claves en una sola consulta."""
         try:
-            # Google recomienda no enviar textos masivos de golpe para embeddings
-            # Recortamos a caracteres razonables para el contexto semántico
-            truncated_text = text[:10000] 
-            vector = await self.embeddings.aembed_query(truncated_text)
+            async with self.session_factory() as db:
+                rows = (await db.execute(
+                    select(ContentHistory.content_hash, ContentHistory.embedding)
+                    .where(ContentHistory.content_hash.in_(keys), ContentHistory.embedding.is_not(None))
+                    .distinct(ContentHistory.content_hash)
+                )).all()
+        except Exception as e:
+            logger.warning(f"⚠️ Caché de embeddings (DB) no disponible: {e}")
+            rows = []
+
+        found = {row.content_hash: to_vector(row.embedding) for row in rows}
+        for key, vector in found.items():
+            self.remember(key, vector)
+        self.db_hits += len(found)
+        self.misses += len(keys) - len(found)
+        CACHE_LOOKUPS.labels("embedding", "db").inc(len(found))
+        CACHE_LOOKUPS.labels("embedding", "miss").inc(len(keys) - len(found))
+        return found
+
+    def metrics(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": sum(v.nbytes for v in self._memory.values()),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
+
+
+class EmbeddingService:
+    """
+    Embeddings de Gemini con micro-lotes: las peticiones concurrentes que llegan
+    dentro de EMBEDDING_BATCH_WINDOW_MS se envían juntas en un `aembed_documents`
+    (una sola petición contra la cuota). Textos idénticos en vuelo comparten la llamada.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[GeminiRateLimiter] = None,
+        cache: Optional[EmbeddingCache] = None,
+        batch_window_ms: float = config.EMBEDDING_BATCH_WINDOW_MS,
+        batch_max: int = config.EMBEDDING_BATCH_MAX,
+        embeddings=None,
+    ):
+        # `embeddings`: cualquier backend con `aembed_documents(texts, task_type=...)`.
+        # Si no se pasa, el cliente de Gemini se crea en el primer uso o en warm()
+        self._embeddings = embeddings
+        # Misma API key que ContentScorer => misma cuota
+        self.limiter = limiter or gemini_limiter
+        self.cache = cache or EmbeddingCache()
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max = batch_max
+
+        self._pending: Dict[str, Tuple[str, int]] = {}  # clave -> (texto, prioridad)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+
+        # Métricas
+        self.requests = 0
+        self.api_calls = 0
+        self.texts_embedded = 0
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            # Import diferido (langchain + SDK de Gemini). Modelo optimizado de Google (768 dimensiones)
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            self._embeddings = GoogleGenerativeAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                google_api_key=os.getenv("GOOGLE_API_KEY")
+            )
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, value):
+        self._embeddings = value
+
+    def warm(self):
+        """Importa langchain y crea el cliente (bloqueante: el lifespan lo llama en un hilo)."""
+        return self.embeddings
+
+    async def generate_embedding(self, text: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[np.ndarray]:
+        """Vector float32 del texto (recortado a EMBEDDING_MAX_CHARS), o None si Gemini falla."""
+        self.requests += 1
+        truncated_text = text[:EMBEDDING_MAX_CHARS]
+        key = embedding_key(truncated_text)
+
+        vector = self.cache.get(key)
+        if vector is not None:
             return vector
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            self._pending[key] = (truncated_text, priority)
+            if len(self._pending) >= self.batch_max:
+                self._start_flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.batch_window, self._start_flush)
+        elif key in self._pending:
+            # Un interactivo que se suma a un texto pendiente de lote sube su prioridad
+            pending_text, pending_priority = self._pending[key]
+            self._pending[key] = (pending_text, min(pending_priority, priority))
+
+        # shield: si este llamador se cancela, el resto sigue esperando el mismo resultado
+        return await asyncio.shield(future)
+
+    async def generate_embeddings(self, texts: List[str], priority: int = PRIORITY_INTERACTIVE) -> List[Optional[np.ndarray]]:
+        """Varios textos a la vez: entran en la misma ventana y viajan en un solo micro-lote."""
+        return list(await asyncio.gather(*(self.generate_embedding(t, priority) for t in texts)))
+
+    async def embed_document(self, chunks: List[str], priority: int = PRIORITY_INTERACTIVE) -> Optional[np.ndarray]:
+        """
+        Vector de un documento largo: media de sus fragmentos (ponderada por longitud),
+        direccionada por el texto unido (el content_hash que guarda el historial).
+        """
+        key = embedding_key("\n\n".join(chunks))
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = (await self.cache.lookup([key])).get(key)
+        if vector is not None:
+            return vector
+
+        # Un solo micro-lote con todos los fragmentos
+        vector = pool_vectors(await self.generate_embeddings(chunks, priority), [len(c) for c in chunks])
+        if vector is not None:
+            self.cache.remember(key, vector)
+        return vector
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "api_calls": self.api_calls,
+            "texts_embedded": self.texts_embedded,
+            "pending": len(self._pending),
+            "cache": self.cache.metrics(),
+        }
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: Dict[str, Tuple[str, int]]):
+        results: Dict[str, Optional[np.ndarray]] = {}
+        try:
+            results.update(await self.cache.lookup(list(batch)))
+            missing = [key for key in batch if key not in results]
+            if missing:
+                texts = [batch[key][0] for key in missing]
+                tokens = sum(estimate_tokens(t) for t in texts)
+                priority = min(batch[key][1] for key in missing)
+                async with self.limiter.acquire(tokens, priority):
+                    # Mismo task_type que aembed_query: los vectores siguen siendo comparables con el historial
+                    with span("embed_api", texts=len(texts)):
+                        values = await self.embeddings.aembed_documents(texts, task_type="RETRIEVAL_QUERY")
+                self.api_calls += 1
+                self.texts_embedded += len(texts)
+                for key, value in zip(missing, values):
+                    vector = to_vector(value)
+                    self.cache.remember(key, vector)
+                    results[key] = vector
         except Exception as e:
-            print(f"⚠️ Error generando embedding: {e}")
-            return None
+            logger.warning(f"⚠️ Error generando embedding: {e}", extra={"texts": len(batch)})
+        finally:
+            for key in batch:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(results.get(key))
@@ -0,0 +1,157 @@
+"""
+Extracción de texto limpio de una página HTML.
+
+`stream_extract` recorre el documento en una sola pasada con la interfaz `target`
+del parser HTML de lxml: no construye árbol, descarta los subárboles de ruido
+(scripts, navegación, pies...) a medida que los ve y deja de alimentar al parser
+en cuanto llena el presupuesto de caracteres. En páginas de varios MB solo se
+parsea el principio.
+
+`soup_extract` es la limpieza original con BeautifulSoup (árbol completo +
+decompose + get_text); se conserva como referencia y para comparar resultados
+(benchmarks/bench_html_extraction.py).
+"""
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from app.services.prefilter import is_affiliate_link
+
+# Etiquetas que NUNCA tienen contenido relevante
+NOISE_TAGS = frozenset(["script", "style", "nav", "footer", "header", "aside", "form", "iframe", "noscript"])
+DEFAULT_TITLE = "Sin Título"
+# Trozos con los que se alimenta al parser: el exceso parseado tras llenar el presupuesto es como mucho esto
+FEED_CHUNK_CHARS = 64 * 1024
+
+
+class _TextTarget:
+    """Recibe los eventos del parser (start/end/data) y va acumulando líneas de texto."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.lines: List[str] = []
+        self.chars = 0
+        self.done = False
+
+        self.title: Optional[str] = None
+        self.links = 0
+        self.affiliate_links = 0
+
+        self._noise_depth = 0
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._pending: List[str] = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        if self._noise_depth or tag in NOISE_TAGS:
+            self._noise_depth += 1
+            return
+        if tag == "title" and self.title is None:
+            self._in_title = True
+        elif tag == "a" and attrib.get("href") is not None:
+            self.links += 1
+            if is_affiliate_link(attrib["href"]):
+                self.affiliate_links += 1
+
+    def end(self, tag):
+        self._flush()
+        if self._noise_depth:
+            self._noise_depth -= 1
+            return
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts).strip()
+
+    def data(self, data):
+        # Un mismo nodo de texto puede llegar en varios trozos: se juntan hasta el siguiente evento
+        if not self._noise_depth and not self.done:
+            self._pending.append(data)
+            if self._in_title:
+                self._title_parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        node_text = "".join(self._pending)
+        self._pending = []
+        # Igual que get_text(separator="\n", strip=True) + limpieza de líneas vacías
+        for line in node_text.splitlines():
+            line = line.strip()
+            if line:
+                self.lines.append(line)
+                self.chars += len(line) + 1
+                if self.chars >= self.max_chars:
+                    self.done = True
+                    return
+
+
+def stream_extract(html: str, max_chars: int = 15000) -> dict:
+    """Título, texto limpio (como mucho `max_chars`) y señales de markup, en una sola pasada."""
+    target = _TextTarget(max_chars)
+    parser = etree.HTMLParser(target=target, recover=True, no_network=True)
+    consumed = 0
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        chunk = html[start:start + FEED_CHUNK_CHARS]
+        parser.feed(chunk)
+        consumed += len(chunk)
+        if target.done:
+            break
+    if consumed:
+        parser.close()
+
+    clean_text = "\n".join(target.lines)[:max_chars]
+    return {
+        "title": target.title or DEFAULT_TITLE,
+        "clean_text": clean_text,
+        # Sobre la parte del HTML realmente consumida (mantiene la proporción texto/markup)
+        "page_stats": {
+            "html_chars": consumed,
+            "text_chars": len(clean_text),
+            "links": target.links,
+            "affiliate_links": target.affiliate_links,
+        },
+    }
+
+
+def soup_extract(html: str, max_chars: int = 15000) -> dict:
+    """Limpieza original: árbol BeautifulSoup completo, decompose() del ruido y get_text()."""
+    soup = BeautifulSoup(html, "lxml")
+
+    # 1. ELIMINACIÓN DE RUIDO ESTRUCTURAL
+    for tag in soup(list(NOISE_TAGS)):
+        tag.decompose()
+
+    # 2. EXTRACCIÓN DE METADATOS
+    title = soup.title.string.strip() if soup.title and soup.title.string else DEFAULT_TITLE
+    links = [a["href"] for a in soup.find_all("a", href=True)]
+
+    # 3. EXTRACCIÓN DE TEXTO LIMPIO
+    # get_text con separador asegura que los párrafos no se peguen
+    text_content = soup.get_text(separator="\n", strip=True)
+
+    # 4. LIMPIEZA POST-PROCESADO
+    # Eliminamos líneas vacías múltiples
+    lines = [line.strip() for line in text_content.splitlines() if line.strip()]
+    clean_text = "\n".join(lines)
+
+    return {
+        "title": title,
+        "clean_text": clean_text[:max_chars],
+        "page_stats": {
+            "html_chars": len(html),
+            "text_chars": len(clean_text),
+            "links": len(links),
+            "affiliate_links": sum(1 for href in links if is_affiliate_link(href)),
+        },
+    }
+
+
+EXTRACTORS = {"stream": stream_extract, "soup": soup_extract}
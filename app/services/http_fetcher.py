@@ -0,0 +1,93 @@
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core import config
+from app.services.browser_pool import USER_AGENT
+
+
+class HttpFetchError(Exception):
+    """La página no se pudo obtener (o no es HTML) por el tier HTTP."""
+
+
+class HttpFetcher:
+    """
+    Tier rápido de descarga: un único httpx.AsyncClient compartido
+    (HTTP/2 + keep-alive) con un límite de conexiones por host.
+    """
+
+    def __init__(
+        self,
+        timeout: float = config.HTTP_FETCH_TIMEOUT,
+        max_connections: int = config.HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = config.HTTP_MAX_KEEPALIVE,
+        max_per_host: int = config.HTTP_MAX_PER_HOST,
+        max_bytes: int = config.HTTP_MAX_BYTES,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "es,en;q=0.8",
+                },
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            if len(self._host_limits) > 1000:
+                # Olvidamos los hosts sin peticiones en curso para no crecer sin límite
+                self._host_limits = {h: s for h, s in self._host_limits.items() if s.locked()}
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    async def fetch(self, url: str) -> str:
+        """Descarga el HTML de `url` (sin ejecutar JS). Lanza HttpFetchError si no es utilizable."""
+        host = urlsplit(url).hostname or ""
+        async with self._host_limit(host):
+            try:
+                async with self.client.stream("GET", url) as response:
+                    if response.status_code >= 400:
+                        raise HttpFetchError(f"HTTP {response.status_code}")
+
+                    content_type = response.headers.get("content-type", "")
+                    if "html" not in content_type:
+                        raise HttpFetchError(f"Contenido no HTML ({content_type or 'desconocido'})")
+
+                    chunks = []
+                    size = 0
+                    async for chunk in response.aiter_bytes():
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size >= self.max_bytes:
+                            break
+                    body = b"".join(chunks)
+                    return body.decode(response.encoding or "utf-8", errors="replace")
+            except httpx.HTTPError as e:
+                raise HttpFetchError(f"{type(e).__name__}: {e}") from e
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+import numpy as np
+from sqlalchemy import select, update
+
+from app.core import config
+from app.db.models import User, UserInterest
+from app.db.session import AsyncSessionLocal
+from app.services.embedding_service import EmbeddingService, embedding_key, to_vector
+from app.services.rate_limiter import PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InterestMatch:
+    user_id: int
+    interest_id: int
+    similarity: float
+    threshold: float  # user_interests.min_quality_threshold
+
+    def accepts(self, verdict: dict) -> bool:
+        """Decisión para este usuario: su umbral de calidad, y nunca clickbait."""
+        return float(verdict.get("quality_score") or 0.0) >= self.threshold and not verdict.get("is_clickbait")
+
+
+class _Snapshot:
+    """Intereses con vector en arrays contiguos: un producto matriz-vector resuelve todos a la vez."""
+
+    def __init__(self, rows: list):
+        self.matrix = np.stack([r[4] for r in rows]) if rows else np.zeros((0, 768), dtype=np.float32)
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.where(norms > 0, norms, 1.0)
+        self.interest_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.user_ids = np.array([r[1] for r in rows], dtype=np.int64)
+        self.categories = np.array([r[2] or "" for r in rows], dtype=object)
+        self.thresholds = np.array([r[3] for r in rows], dtype=np.float32)
+
+
+class InterestIndex:
+    """
+    Índice en memoria de los intereses de todos los usuarios (user_interests):
+    un ítem analizado una vez se entrega a cada usuario cuyo interés se parece lo
+    bastante (coseno >= INTEREST_MIN_SIMILARITY, misma categoría si el interés la fija),
+    sin una llamada al LLM por usuario.
+
+    Los vectores de las keywords se calculan al recargar (solo los nuevos o editados)
+    y se guardan en la propia tabla. Una tarea de fondo recarga cada INTEREST_INDEX_REFRESH segundos.
+    """
+
+    def __init__(
+        self,
+        vectorizer: EmbeddingService,
+        session_factory=AsyncSessionLocal,
+        enabled: bool = config.INTEREST_INDEX_ENABLED,
+        refresh_interval: int = config.INTEREST_INDEX_REFRESH,
+        min_similarity: float = config.INTEREST_MIN_SIMILARITY,
+    ):
+        self.vectorizer = vectorizer
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.min_similarity = min_similarity
+
+        self.snapshot = _Snapshot([])
+        self.users: Set[int] = set()
+        self.refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Métricas
+        self.lookups = 0
+        self.deliveries = 0
+        self.embedded = 0
+
+    # --- CICLO DE VIDA ---
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def refresh(self):
+        """Reconstruye el índice desde Postgres; si falla se conserva el anterior."""
+        try:
+            snapshot, users = await self._load()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo recargar el índice de intereses: {e}")
+            return
+        # Sustitución atómica, como DomainReputation
+        self.snapshot, self.users = snapshot, users
+        self.refreshed_at = time.time()
+
+    async def _load(self):
+        async with self.session_factory() as db:
+            users = set((await db.execute(select(User.id))).scalars())
+            interests = (await db.execute(
+                select(UserInterest.id, UserInterest.user_id, UserInterest.keyword, UserInterest.category_code,
+                       UserInterest.min_quality_threshold, UserInterest.embedding, UserInterest.embedding_hash)
+                .where(UserInterest.user_id.is_not(None), UserInterest.keyword.is_not(None))
+            )).all()
+
+        # Solo se vectorizan las keywords nuevas o editadas (un micro-lote, con prioridad de lote)
+        stale = [r for r in interests if r.embedding is None or r.embedding_hash != embedding_key(r.keyword)]
+        fresh = {}
+        if stale:
+            vectors = await self.vectorizer.generate_embeddings([r.keyword for r in stale], PRIORITY_BATCH)
+            fresh = {r.id: v for r, v in zip(stale, vectors) if v is not None}
+            if fresh:
+                keys = {r.id: embedding_key(r.keyword) for r in stale}
+                async with self.session_factory() as db, db.begin():
+                    for interest_id, vector in fresh.items():
+                        await db.execute(update(UserInterest).where(UserInterest.id == interest_id)
+                                         .values(embedding=vector, embedding_hash=keys[interest_id]))
+                self.embedded += len(fresh)
+
+        rows = []
+        for r in interests:
+            vector = fresh.get(r.id)
+            if vector is None and r.embedding is not None and r.embedding_hash == embedding_key(r.keyword):
+                vector = to_vector(r.embedding)
+            if vector is not None:
+                threshold = float(r.min_quality_threshold) if r.min_quality_threshold is not None else 0.7
+                rows.append((r.id, r.user_id, r.category_code, threshold, vector))
+        return _Snapshot(rows), users
+
+    # --- CONSULTAS ---
+    def match(self, vector, category: str, exclude_user: Optional[int] = None) -> List[InterestMatch]:
+        """Usuarios interesados en el ítem: uno por usuario (su interés más parecido)."""
+        snapshot = self.snapshot
+        if not self.enabled or vector is None or not len(snapshot.interest_ids):
+            return []
+        self.lookups += 1
+        query = to_vector(vector)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        similarity = snapshot.matrix @ (query / norm)
+        mask = (similarity >= self.min_similarity) & ((snapshot.categories == category) | (snapshot.categories == ""))
+
+        matches, seen = [], {exclude_user}
+        for i in np.flatnonzero(mask)[np.argsort(-similarity[mask])]:
+            user_id = int(snapshot.user_ids[i])
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            matches.append(InterestMatch(user_id, int(snapshot.interest_ids[i]),
+                                         round(float(similarity[i]), 4), float(snapshot.thresholds[i])))
+        self.deliveries += len(matches)
+        return matches
+
+    def match_user(self, user_id: int, vector, category: str) -> Optional[InterestMatch]:
+        """
+        Interés del propio solicitante más parecido al ítem (misma regla de categoría),
+        sin umbral de similitud: lo pidió él. None si no tiene intereses aplicables.
+        """
+        snapshot = self.snapshot
+        if not self.enabled or vector is None or not len(snapshot.interest_ids):
+            return None
+        candidates = np.flatnonzero((snapshot.user_ids == user_id)
+                                    & ((snapshot.categories == category) | (snapshot.categories == "")))
+        if not len(candidates):
+            return None
+        query = to_vector(vector)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        similarity = snapshot.matrix[candidates] @ (query / norm)
+        best = int(np.argmax(similarity))
+        i = candidates[best]
+        return InterestMatch(user_id, int(snapshot.interest_ids[i]), round(float(similarity[best]), 4),
+                             float(snapshot.thresholds[i]))
+
+    async def has_user(self, user_id: int) -> bool:
+        """¿Existe el usuario? En memoria; si no, a la DB (usuarios creados tras la última recarga)."""
+        if user_id in self.users:
+            return True
+        async with self.session_factory() as db:
+            found = (await db.execute(select(User.id).where(User.id == user_id))).scalar() is not None
+        if found:
+            self.users.add(user_id)
+        return found
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interests": int(len(self.snapshot.interest_ids)),
+            "users_with_interests": int(len(np.unique(self.snapshot.user_ids))),
+            "users": len(self.users),
+            "refreshed_at": self.refreshed_at,
+            "lookups": self.lookups,
+            "deliveries": self.deliveries,
+            "interests_embedded": self.embedded,
+        }
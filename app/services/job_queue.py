@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import httpx
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+
+from app.core import config
+from app.db.models import AnalysisJob
+from app.db.session import SessionLocal
+from app.schemas.analysis import AnalysisRequest, JobRequest, JobResponse
+from app.services.analysis_pipeline import AnalysisError, AnalysisPipeline
+from app.services.rate_limiter import PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Cola durable de análisis sobre la tabla `analysis_jobs`.
+
+    Los workers (tareas asyncio dentro del proceso) reclaman trabajos con
+    `SELECT ... FOR UPDATE SKIP LOCKED`, así varias réplicas pueden consumir
+    la misma cola sin pisarse. Un trabajo "running" cuyo worker murió vuelve
+    a ser reclamable pasado JOB_VISIBILITY_TIMEOUT, hasta JOB_MAX_ATTEMPTS
+    intentos; después se marca "failed" (un trabajo que tumba o cuelga al
+    worker no se reintenta para siempre). Los fallos transitorios (5xx o
+    excepciones inesperadas) se reencolan con el mismo límite; los errores
+    4xx de la URL o del contenido fallan a la primera.
+    """
+
+    def __init__(
+        self,
+        pipeline: AnalysisPipeline,
+        workers: int = config.JOB_WORKERS,
+        poll_interval: float = config.JOB_POLL_INTERVAL,
+        visibility_timeout: int = config.JOB_VISIBILITY_TIMEOUT,
+        max_attempts: int = config.JOB_MAX_ATTEMPTS,
+        session_factory=SessionLocal,
+    ):
+        self.pipeline = pipeline
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._webhooks: Optional[httpx.AsyncClient] = None
+        self._next_expiry = 0.0
+
+    # --- API (llamada desde los endpoints) ---
+    async def enqueue(self, job: JobRequest) -> JobResponse:
+        response = await asyncio.to_thread(self._insert, job)
+        if self._wakeup is not None:
+            # Despertamos a un worker local sin esperar al siguiente sondeo
+            self._wakeup.set()
+        return response
+
+    async def get(self, job_id: uuid.UUID) -> Optional[JobResponse]:
+        return await asyncio.to_thread(self._load, job_id)
+
+    def _insert(self, job: JobRequest) -> JobResponse:
+        payload = job.model_dump(mode="json", exclude={"webhook_url"})
+        with self.session_factory() as db:
+            row = AnalysisJob(
+                id=uuid.uuid4(),
+                status="queued",
+                payload=payload,
+                webhook_url=str(job.webhook_url) if job.webhook_url else None,
+            )
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            return self._to_response(row)
+
+    def _load(self, job_id: uuid.UUID) -> Optional[JobResponse]:
+        with self.session_factory() as db:
+            row = db.get(AnalysisJob, job_id)
+            return self._to_response(row) if row is not None else None
+
+    @staticmethod
+    def _to_response(row: AnalysisJob) -> JobResponse:
+        return JobResponse(
+            job_id=row.id,
+            status=row.status,
+            attempts=row.attempts,
+            result=row.result,
+            error=row.error,
+            error_code=row.error_code,
+            created_at=row.created_at,
+            finished_at=row.finished_at,
+        )
+
+    # --- CICLO DE VIDA DE LOS WORKERS ---
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._webhooks = httpx.AsyncClient(timeout=config.JOB_WEBHOOK_TIMEOUT)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"📬 Cola de trabajos activa ({self.workers} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        # Un trabajo interrumpido queda "running" y se reintenta al vencer su visibilidad
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._webhooks is not None:
+            await self._webhooks.aclose()
+            self._webhooks = None
+
+    async def _worker(self, n: int):
+        while True:
+            if time.monotonic() >= self._next_expiry:
+                await self._expire_exhausted(n)
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.warning(f"⚠️ Worker {n}: no se pudo leer la cola: {e}")
+                claimed = None
+
+            if claimed is None:
+                # Cola vacía: dormimos hasta el próximo sondeo o hasta que alguien encole aquí
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, payload, attempts = claimed
+            try:
+                await self._process(job_id, payload, attempts)
+            except Exception as e:
+                # Si ni siquiera pudimos registrar el resultado, el timeout de visibilidad lo recupera
+                logger.error(f"❌ Worker {n}: error procesando {job_id}: {e}")
+
+    def _claim(self):
+        """Reclama el trabajo más antiguo disponible. Devuelve (id, payload, attempts) o None."""
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=self.visibility_timeout)
+        with self.session_factory() as db:
+            row = db.execute(
+                select(AnalysisJob)
+                .where(or_(
+                    AnalysisJob.status == "queued",
+                    (AnalysisJob.status == "running") & (AnalysisJob.started_at < stale_before)
+                    & (AnalysisJob.attempts < self.max_attempts),
+                ))
+                .order_by(AnalysisJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar_one_or_none()
+            if row is None:
+                return None
+
+            row.status = "running"
+            row.started_at = now
+            row.attempts += 1
+            db.commit()
+            return row.id, row.payload, row.attempts
+
+    async def _expire_exhausted(self, n: int):
+        """Cada JOB_VISIBILITY_TIMEOUT: los "running" vencidos sin intentos restantes pasan a "failed"."""
+        self._next_expiry = time.monotonic() + self.visibility_timeout
+        try:
+            expired = await asyncio.to_thread(self._expire)
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {n}: no se pudieron expirar trabajos colgados: {e}")
+            return
+        for job_id in expired:
+            logger.warning(f"⚠️ Trabajo {job_id} agotó sus {self.max_attempts} intentos sin terminar")
+            await self._notify(job_id)
+
+    def _expire(self) -> List[uuid.UUID]:
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=self.visibility_timeout)
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(AnalysisJob)
+                .where(AnalysisJob.status == "running", AnalysisJob.started_at < stale_before,
+                       AnalysisJob.attempts >= self.max_attempts)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            for row in rows:
+                row.status = "failed"
+                row.error = f"El trabajo no terminó en {row.attempts} intentos (timeout de visibilidad)"
+                row.error_code = 500
+                row.finished_at = now
+            db.commit()
+            return [row.id for row in rows]
+
+    async def _process(self, job_id: uuid.UUID, payload: dict, attempts: int):
+        try:
+            request = AnalysisRequest(**payload)
+            response = await self.pipeline.run(request, priority=PRIORITY_BATCH)
+        except ValidationError as e:
+            # Payload que ya no valida (p. ej. encolado con otra versión del esquema): no hay reintento posible
+            await asyncio.to_thread(self._finish, job_id, "failed", None, str(e), 422)
+        except AnalysisError as e:
+            if e.status_code >= 500 and attempts < self.max_attempts:
+                # Saturación pasajera (p. ej. pool del navegador lleno): se reintenta más tarde
+                logger.warning(f"⚠️ Trabajo {job_id}: {e.detail} (intento {attempts}), se reencola")
+                await asyncio.to_thread(self._requeue, job_id)
+                return
+            # 4xx: error del contenido/URL, reintentar no cambiaría nada
+            await asyncio.to_thread(self._finish, job_id, "failed", None, e.detail, e.status_code)
+        except Exception as e:
+            if attempts < self.max_attempts:
+                logger.warning(f"⚠️ Trabajo {job_id} falló (intento {attempts}), se reencola: {e}")
+                await asyncio.to_thread(self._requeue, job_id)
+                return
+            await asyncio.to_thread(self._finish, job_id, "failed", None, f"{type(e).__name__}: {e}", 500)
+        else:
+            await asyncio.to_thread(self._finish, job_id, "done", response.model_dump(mode="json"), None, None)
+
+        await self._notify(job_id)
+
+    def _finish(self, job_id, status: str, result: Optional[dict], error: Optional[str], error_code: Optional[int]):
+        with self.session_factory() as db:
+            row = db.get(AnalysisJob, job_id)
+            row.status = status
+            row.result = result
+            row.error = error
+            row.error_code = error_code
+            row.finished_at = datetime.now(timezone.utc)
+            db.commit()
+
+    def _webhook_payload(self, job_id):
+        with self.session_factory() as db:
+            row = db.get(AnalysisJob, job_id)
+            return row.webhook_url, self._to_response(row).model_dump(mode="json")
+
+    def _requeue(self, job_id):
+        with self.session_factory() as db:
+            row = db.get(AnalysisJob, job_id)
+            row.status = "queued"
+            row.started_at = None
+            db.commit()
+
+    async def _notify(self, job_id: uuid.UUID):
+        """POST del estado final al webhook del cliente (best effort, 3 intentos)."""
+        webhook_url, body = await asyncio.to_thread(self._webhook_payload, job_id)
+        if not webhook_url:
+            return
+
+        for attempt in range(3):
+            try:
+                response = await self._webhooks.post(webhook_url, json=body)
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ Webhook {webhook_url} falló: {e}")
+            await asyncio.sleep(2 ** attempt)
@@ -0,0 +1,134 @@
+"""
+Ajustes de cada navegación con Playwright:
+
+- NavigationProfile / NavigationProfiles: condición de espera, timeout, viewport,
+  JavaScript y recursos bloqueados, con perfiles por dominio cargados de config.
+- ResourceBlocker: manejador de `page.route` que aborta imágenes, fuentes, media,
+  hojas de estilo y peticiones a dominios de publicidad/analítica.
+"""
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+from app.core import config
+from app.services.domain_trie import DomainTrie, normalize_host
+
+WAIT_CONDITIONS = ("commit", "domcontentloaded", "load", "networkidle")
+# Viewport por defecto de Playwright
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+
+# Tamaño típico de cada tipo de recurso (medianas aproximadas de HTTP Archive).
+# Un recurso abortado nunca se descarga, así que el ahorro solo se puede estimar.
+ESTIMATED_BYTES = {
+    "image": 50_000,
+    "media": 500_000,
+    "font": 30_000,
+    "stylesheet": 20_000,
+    "script": 25_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+ESTIMATED_BYTES_OTHER = 5_000
+
+
+class NavigationProfile:
+    """Cómo se navega a una URL. Los campos ausentes toman el valor por defecto de config."""
+
+    __slots__ = ("wait_until", "timeout_ms", "viewport", "javascript", "block_resources")
+
+    def __init__(
+        self,
+        wait_until: str = config.NAVIGATION_WAIT_UNTIL,
+        timeout_ms: int = config.NAVIGATION_TIMEOUT_MS,
+        viewport: Optional[dict] = None,
+        javascript: bool = True,
+        block_resources: Optional[Iterable[str]] = None,
+    ):
+        if wait_until not in WAIT_CONDITIONS:
+            raise ValueError(f"wait_until inválido: {wait_until} (opciones: {', '.join(WAIT_CONDITIONS)})")
+        self.wait_until = wait_until
+        self.timeout_ms = int(timeout_ms)
+        self.viewport = dict(viewport or DEFAULT_VIEWPORT)
+        self.javascript = bool(javascript)
+        self.block_resources = frozenset(config.BROWSER_BLOCK_RESOURCES if block_resources is None else block_resources)
+
+    @classmethod
+    def from_dict(cls, data: dict, default: "NavigationProfile") -> "NavigationProfile":
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en el perfil de navegación: {', '.join(sorted(unknown))}")
+        merged = {name: getattr(default, name) for name in cls.__slots__}
+        merged.update(data)
+        return cls(**merged)
+
+
+def load_profiles(source: str = config.NAVIGATION_PROFILES) -> Dict[str, dict]:
+    """NAVIGATION_PROFILES: JSON en línea o ruta a un archivo .json ({dominio: perfil})."""
+    if not source.strip():
+        return {}
+    if not source.lstrip().startswith("{") and os.path.exists(source):
+        with open(source, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(source)
+
+
+class NavigationProfiles:
+    """Perfil de navegación por dominio (un dominio cubre sus subdominios)."""
+
+    def __init__(self, profiles: Optional[Dict[str, dict]] = None, default: Optional[NavigationProfile] = None):
+        self.default = default or NavigationProfile()
+        self._trie = DomainTrie()
+        for domain, data in (load_profiles() if profiles is None else profiles).items():
+            self._trie.insert(domain, NavigationProfile.from_dict(data, self.default))
+
+    def for_url(self, url: str) -> NavigationProfile:
+        return self._trie.longest_match(normalize_host(url)) or self.default
+
+    def __len__(self) -> int:
+        return self._trie.size
+
+
+class ResourceBlocker:
+    """
+    Manejador de `page.route("**/*")`: aborta lo que no aporta texto al DOM.
+    El documento principal nunca se bloquea.
+    """
+
+    def __init__(self, tracker_domains: Iterable[str] = config.BROWSER_TRACKER_DOMAINS):
+        self.trackers = DomainTrie()
+        for domain in tracker_domains:
+            self.trackers.insert(domain, True)
+
+        # Métricas
+        self.allowed = 0
+        self.blocked: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+
+    def reason(self, url: str, resource_type: str, block_types: frozenset) -> Optional[str]:
+        """Motivo del bloqueo ("tracker" o el tipo de recurso) o None si la petición sigue."""
+        if resource_type == "document":
+            return None
+        if self.trackers.longest_match(normalize_host(url)):
+            return "tracker"
+        if resource_type in block_types:
+            return resource_type
+        return None
+
+    async def handle(self, route, block_types: frozenset):
+        request = route.request
+        reason = self.reason(request.url, request.resource_type, block_types)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+            return
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, ESTIMATED_BYTES_OTHER)
+        await route.abort("blockedbyclient")
+
+    def metrics(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "blocked": dict(self.blocked),
+            "blocked_total": sum(self.blocked.values()),
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+        }
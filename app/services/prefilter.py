@@ -0,0 +1,156 @@
+import logging
+import random
+import re
+from typing import Optional
+
+import numpy as np
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+# Frases típicas de titulares cebo (ES/EN). Los acentos son opcionales: mucho clickbait los omite.
+_CLICKBAIT = re.compile(
+    r"no te lo vas a creer|no creer[aá]s|te sorprender[aá]|incre[ií]ble|impactante|"
+    r"esc[aá]ndalo|exclusiv[ao]s?|el drama|explota|haz clic|pincha aqu[ií]|lo que pas[oó] despu[eé]s|"
+    r"cambiar[aá]n? tu vida|nadie te cuenta|el n[uú]mero \d+|top \d+|"
+    r"you won'?t believe|shocking|what happened next|click here|this one trick|will blow your mind",
+    re.IGNORECASE,
+)
+_AFFILIATE_TEXT = re.compile(r"enlaces? de afiliad[oa]s?|affiliate links?|c[oó]digo de descuento|promo code", re.IGNORECASE)
+_AFFILIATE_HREF = re.compile(
+    r"amzn\.to|amazon\.[a-z.]+/.*[?&]tag=|[?&](aff|affiliate|aff_id|ref)=|/ref=|"
+    r"awin1\.com|clickbank\.net|shareasale\.com|go\.skimresources|linksynergy|tradedoubler",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"\w+")
+
+
+def is_affiliate_link(href: str) -> bool:
+    return bool(_AFFILIATE_HREF.search(href))
+
+
+class ContentPrefilter:
+    """
+    Etapa local (solo CPU) previa al LLM. Un modelo lineal sobre heurísticas
+    baratas estima la probabilidad de que el contenido sea ruido:
+
+    - densidad de frases cebo y de exclamaciones, proporción de mayúsculas,
+    - densidad de enlaces de afiliados (o su mención en el texto),
+    - proporción texto/markup del HTML y textos muy cortos.
+
+    Con probabilidad >= block_threshold se bloquea sin llamar a Gemini; con
+    probabilidad <= show_threshold se muestra (0 lo desactiva: las heurísticas no
+    saben si el texto encaja con el tópico del usuario). Una fracción `sample_rate`
+    de los casos confiados se envía igualmente al LLM para medir el acuerdo.
+    """
+
+    FEATURES = ("clickbait", "exclamations", "caps", "affiliate", "low_text_ratio", "short")
+    WEIGHTS = np.array([1.5, 0.4, 4.0, 3.0, 1.5, 0.5], dtype=np.float32)
+    BIAS = -3.0
+
+    def __init__(
+        self,
+        enabled: bool = config.PREFILTER_ENABLED,
+        block_threshold: float = config.PREFILTER_BLOCK_THRESHOLD,
+        show_threshold: float = config.PREFILTER_SHOW_THRESHOLD,
+        sample_rate: float = config.PREFILTER_SAMPLE_RATE,
+    ):
+        self.enabled = enabled
+        self.block_threshold = block_threshold
+        self.show_threshold = show_threshold
+        self.sample_rate = sample_rate
+
+        # Métricas
+        self.evaluated = 0
+        self.skipped = {"SHOW": 0, "BLOCK": 0}
+        self.audited = 0
+        self.agreed = 0
+
+    def features(self, text: str, page_stats: Optional[dict] = None) -> np.ndarray:
+        words = max(1, len(_WORD.findall(text)))
+        per_100_words = 100.0 / words
+        letters = sum(1 for c in text if c.isalpha()) or 1
+
+        affiliate = 0.0
+        if page_stats and page_stats.get("links"):
+            affiliate = page_stats["affiliate_links"] / page_stats["links"]
+        if _AFFILIATE_TEXT.search(text):
+            affiliate = max(affiliate, 0.5)
+
+        low_text_ratio = 0.0
+        if page_stats and page_stats.get("html_chars"):
+            ratio = page_stats["text_chars"] / page_stats["html_chars"]
+            # Por debajo del 10% de texto útil, cuanto menos texto más sospechoso
+            low_text_ratio = max(0.0, 0.1 - ratio) / 0.1
+
+        return np.array([
+            min(5.0, len(_CLICKBAIT.findall(text)) * per_100_words),
+            min(10.0, (text.count("!") + text.count("¡")) * per_100_words),
+            sum(1 for c in text if c.isupper()) / letters,
+            affiliate,
+            low_text_ratio,
+            1.0 if words < 150 else 0.0,
+        ], dtype=np.float32)
+
+    def noise_probability(self, text: str, page_stats: Optional[dict] = None) -> float:
+        return self._sigmoid(self.features(text, page_stats))
+
+    def _sigmoid(self, x: np.ndarray) -> float:
+        return float(1.0 / (1.0 + np.exp(-(self.WEIGHTS @ x + self.BIAS))))
+
+    def evaluate(self, text: str, page_stats: Optional[dict] = None) -> Optional[dict]:
+        """Veredicto local (mismo formato que ContentScorer) si la confianza es alta; si no, None."""
+        if not self.enabled:
+            return None
+        self.evaluated += 1
+        x = self.features(text, page_stats)
+        noise = self._sigmoid(x)
+
+        if noise >= self.block_threshold:
+            decision = "BLOCK"
+        elif noise <= self.show_threshold:
+            decision = "SHOW"
+        else:
+            return None
+
+        signals = [name for name, value, weight in zip(self.FEATURES, x, self.WEIGHTS) if value * weight >= 0.5]
+        words = len(_WORD.findall(text))
+        return {
+            "quality_score": round(1.0 - noise, 3),
+            "decision": decision,
+            "analysis_reasoning": f"Pre-filtro local (ruido {noise:.0%}): {', '.join(signals) or 'sin señales de ruido'}",
+            "is_clickbait": bool(x[0] >= 1.0),
+            "estimated_read_time_seconds": int(words / 200 * 60),  # ~200 palabras/minuto
+            "verdict_source": "prefilter",
+        }
+
+    def skip(self, verdict: dict) -> bool:
+        """¿Se usa el veredicto local? False para la muestra que se audita contra el LLM."""
+        if random.random() < self.sample_rate:
+            return False
+        self.skipped[verdict["decision"]] += 1
+        return True
+
+    def record_audit(self, local: dict, llm: dict):
+        """Compara un veredicto local auditado con el del LLM (los de emergencia no cuentan)."""
+        if llm.get("verdict_source") not in ("llm", "cache"):
+            return
+        self.audited += 1
+        if llm.get("decision") == local["decision"]:
+            self.agreed += 1
+        else:
+            logger.info(f"🔎 Pre-filtro en desacuerdo con el LLM: {local['decision']} vs {llm.get('decision')}")
+
+    def metrics(self) -> dict:
+        skipped = sum(self.skipped.values())
+        return {
+            "enabled": self.enabled,
+            "block_threshold": self.block_threshold,
+            "show_threshold": self.show_threshold,
+            "evaluated": self.evaluated,
+            "skipped": dict(self.skipped),
+            "skip_rate": round(skipped / self.evaluated, 3) if self.evaluated else 0.0,
+            "audited": self.audited,
+            "agreement_rate": round(self.agreed / self.audited, 3) if self.audited else None,
+        }
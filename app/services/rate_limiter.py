@@ -0,0 +1,201 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from app.core import config
+from app.core.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: menor = antes. Las peticiones interactivas adelantan al trabajo por lotes.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "Too Many Requests")
+
+
+def _status_code(e: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code"):
+        value = getattr(e, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(e, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_quota_error(e: BaseException) -> bool:
+    """429 / RESOURCE_EXHAUSTED: hay que frenar, no solo reintentar."""
+    return _status_code(e) == 429 or "RESOURCE_EXHAUSTED" in str(e)
+
+
+def is_retryable(e: BaseException) -> bool:
+    """
+    Solo errores transitorios (cuota, 5xx, timeouts, red). Un JSON mal formado
+    o una petición inválida fallarían igual en el siguiente intento.
+    """
+    if isinstance(e, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = _status_code(e)
+    if code is not None:
+        return code in _RETRYABLE_CODES
+    message = str(e)
+    return any(marker in message for marker in _RETRYABLE_MARKERS)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 caracteres por token es la aproximación que documenta Google para Gemini
+    return max(1, len(text) // 4)
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        return max(0.0, (amount - self.available) / self.rate)
+
+
+class GeminiRateLimiter:
+    """
+    Limitador del lado cliente para la cuota de Gemini.
+
+    - Dos token buckets: peticiones/minuto y tokens/minuto (estimados por longitud del prompt).
+    - Concurrencia adaptativa AIMD: +1/límite por éxito, la mitad ante RESOURCE_EXHAUSTED.
+    - Cola de prioridad: un pedido interactivo espera menos que el trabajo por lotes.
+
+    Así la cuota se respeta antes de agotarla, en lugar de descubrirla a base de 429.
+    """
+
+    def __init__(
+        self,
+        rpm: int = config.GEMINI_RPM,
+        tpm: int = config.GEMINI_TPM,
+        max_concurrency: int = config.GEMINI_MAX_CONCURRENCY,
+        min_concurrency: int = config.GEMINI_MIN_CONCURRENCY,
+    ):
+        self.requests = _TokenBucket(rpm)
+        self.tokens = _TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min_concurrency)
+        self.concurrency_limit = float(max_concurrency)
+
+        self.in_flight = 0
+        self._waiters = []  # heap de (prioridad, orden, tokens, future)
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Métricas
+        self.granted = 0
+        self.throttled = 0
+        self.tokens_reserved = 0
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE):
+        """
+        Espera turno para una llamada de ~`tokens` tokens. Si la llamada lanza
+        un error de cuota, la concurrencia se reduce automáticamente.
+        """
+        tokens = min(tokens, int(self.tokens.capacity))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), tokens, future))
+        self._dispatch()
+        try:
+            # Tiempo en cola por la cuota (RPM/TPM/concurrencia), separado de la llamada en sí
+            with span("quota_wait"):
+                await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Se nos concedió el turno justo cuando nos cancelaban
+                self._release(success=False, throttled=False)
+            raise
+
+        try:
+            yield
+        except BaseException as e:
+            self._release(success=False, throttled=isinstance(e, Exception) and is_quota_error(e))
+            raise
+        else:
+            self._release(success=True, throttled=False)
+
+    def _dispatch(self):
+        self.requests.refill()
+        self.tokens.refill()
+        while self._waiters:
+            priority, order, tokens, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= int(self.concurrency_limit):
+                return  # _release volverá a despachar
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                # Prioridad estricta: nadie adelanta a la cabeza de la cola
+                self._schedule(wait)
+                return
+
+            heapq.heappop(self._waiters)
+            self.requests.available -= 1
+            self.tokens.available -= tokens
+            self.in_flight += 1
+            self.granted += 1
+            self.tokens_reserved += tokens
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _release(self, success: bool, throttled: bool):
+        self.in_flight -= 1
+        if throttled:
+            self.throttled += 1
+            self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+            # Vaciamos el bucket de peticiones: pausa corta para toda la cola
+            self.requests.available = min(self.requests.available, 0.0)
+            logger.warning(f"⚠️ Cuota de Gemini agotada: concurrencia reducida a {int(self.concurrency_limit)}")
+        elif success:
+            self.concurrency_limit = min(float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit)
+        self._dispatch()
+
+    def metrics(self) -> dict:
+        self.requests.refill()
+        self.tokens.refill()
+        waiting = {}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                name = "interactive" if priority == PRIORITY_INTERACTIVE else "batch"
+                waiting[name] = waiting.get(name, 0) + 1
+        return {
+            "concurrency_limit": int(self.concurrency_limit),
+            "in_flight": self.in_flight,
+            "waiting": waiting,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "tokens_reserved": self.tokens_reserved,
+            "requests_available": round(self.requests.available, 1),
+            "tokens_available": int(self.tokens.available),
+        }
+
+
+# Instancia compartida: la cuota es de la API key, no de cada servicio
+gemini_limiter = GeminiRateLimiter()
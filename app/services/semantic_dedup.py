@@ -0,0 +1,98 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import or_, select
+
+from app.core import config
+from app.db.models import ContentHistory
+from app.db.session import AsyncSessionLocal
+from app.db.vector_index import aset_search_params
+from app.services.content_scorer import FALLBACK_VERDICT
+
+logger = logging.getLogger(__name__)
+
+# Veredictos que Gemini dio sobre el texto en sí (los de la caché también lo son)
+REUSABLE_SOURCES = ("llm", "cache")
+
+
+class SemanticDeduplicator:
+    """
+    Atajo para contenido sindicado/republicado: si ya analizamos algo casi
+    idéntico (vecino más cercano por distancia coseno en `content_history`)
+    en la misma categoría, reutilizamos su veredicto en lugar de llamar a Gemini.
+    """
+
+    def __init__(
+        self,
+        max_distance: float = config.SEMANTIC_DEDUP_MAX_DISTANCE,
+        enabled: bool = config.SEMANTIC_DEDUP_ENABLED,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.max_distance = max_distance
+        self.enabled = enabled
+        self.session_factory = session_factory
+
+        # Métricas
+        self.lookups = 0
+        self.reused = 0
+
+    async def find(self, vector, category: str) -> Optional[dict]:
+        """Veredicto reutilizable (mismo formato que ContentScorer) o None."""
+        if not self.enabled or vector is None:
+            return None
+
+        self.lookups += 1
+        try:
+            match = await self._nearest(vector, category)
+        except Exception as e:
+            logger.warning(f"⚠️ Búsqueda semántica no disponible: {e}")
+            return None
+        if match is None:
+            return None
+
+        row, distance = match
+        self.reused += 1
+        logger.info(f"♻️ Veredicto reutilizado de ID {row.id} (distancia {distance:.4f})")
+        return {
+            "quality_score": float(row.signal_score) if row.signal_score is not None else 0.0,
+            "decision": "SHOW" if row.is_signal else "BLOCK",
+            "analysis_reasoning": row.content_summary or "",
+            "is_clickbait": row.is_clickbait,
+            "estimated_read_time_seconds": row.estimated_read_time_seconds or 0,
+            "verdict_source": "semantic",
+            "reused_from_id": row.id,
+        }
+
+    async def _nearest(self, vector, category: str):
+        distance = ContentHistory.embedding.cosine_distance(vector)
+        async with self.session_factory() as db, db.begin():
+            await aset_search_params(db)
+            match = (await db.execute(
+                select(
+                    ContentHistory.id,
+                    ContentHistory.signal_score,
+                    ContentHistory.is_signal,
+                    ContentHistory.content_summary,
+                    ContentHistory.is_clickbait,
+                    ContentHistory.estimated_read_time_seconds,
+                    distance.label("distance"),
+                )
+                .where(
+                    ContentHistory.category_code == category,
+                    ContentHistory.embedding.is_not(None),
+                    # Solo veredictos del LLM: ni los de emergencia (IA caída) ni los atajos
+                    # por dominio/pre-filtro, que no dicen nada del texto en otra fuente
+                    ContentHistory.verdict_source.in_(REUSABLE_SOURCES),
+                    or_(ContentHistory.content_summary.is_(None),
+                        ContentHistory.content_summary != FALLBACK_VERDICT["analysis_reasoning"]),
+                )
+                .order_by(distance)
+                .limit(1)
+            )).first()
+
+        if match is None or match.distance > self.max_distance:
+            return None
+        return match, match.distance
+
+    def metrics(self) -> dict:
+        return {"lookups": self.lookups, "reused": self.reused, "max_distance": self.max_distance}
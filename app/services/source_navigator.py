@@ -1,67 +1,183 @@
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit
+from app.core import config
+from app.core.telemetry import PAYLOAD_CHARS, span
+from app.services.browser_pool import BrowserPool, BrowserPoolTimeout
+from app.services.http_fetcher import HttpFetcher, HttpFetchError
+from app.services.html_extractor import EXTRACTORS
+from app.services.navigation_profiles import NavigationProfiles
+
+logger = logging.getLogger(__name__)
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+# Puntos de montaje vacíos típicos de React/Vue/Next/Nuxt/Angular: el contenido llega por JS
+_SPA_MOUNT = re.compile(
+    r'<(div|app-root)[^>]*id=["\'](root|app|__next|__nuxt|main-app)["\'][^>]*>\s*</\1>'
+    r'|<app-root[^>]*>\s*</app-root>',
+    re.IGNORECASE,
+)
+_NEEDS_JS = re.compile(r"(enable|activa|habilita)[^<]{0,20}javascript", re.IGNORECASE)
+
+
+def looks_like_spa_shell(html: str) -> bool:
+    """Heurística barata: ¿el HTML servido es solo el "cascarón" de una SPA?"""
+    return bool(_SPA_MOUNT.search(html) or _NEEDS_JS.search(html))
+
+
+class DomainTierMemory:
+    """
+    Recuerda por dominio qué tier funcionó la última vez (LRU acotado con TTL),
+    para que los dominios que necesitan JS no paguen la sonda HTTP en cada petición.
+    """
+
+    def __init__(self, ttl: int = config.DOMAIN_TIER_TTL, max_entries: int = config.DOMAIN_TIER_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, domain: str) -> Optional[str]:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        tier, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[domain]
+            return None
+        self._entries.move_to_end(domain)
+        return tier
+
+    def record(self, domain: str, tier: str):
+        self._entries[domain] = (tier, time.monotonic() + self.ttl)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {d: tier for d, (tier, exp) in self._entries.items() if exp >= now}
+
 
 class SourceNavigator:
     """
     Agente encargado de navegar a una URL, renderizar el JS (si es necesario)
     y extraer el texto limpio quirúrgicamente.
+
+    Primero intenta una descarga HTTP simple (sin navegador) y solo escala a
+    Playwright si el texto extraído es muy corto o la página es una SPA.
     """
-    
+
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        http: Optional[HttpFetcher] = None,
+        min_text_chars: int = config.HTTP_MIN_TEXT_CHARS,
+        extractor: str = config.HTML_EXTRACTOR,
+        max_chars: int = config.EXTRACT_MAX_CHARS,
+        profiles: Optional[NavigationProfiles] = None,
+    ):
+        # Pool de Chromium "caliente": se arranca con la app (start) y se cierra con ella (close)
+        self.pool = pool or BrowserPool()
+        self.http = http or HttpFetcher()
+        # Espera, timeout, viewport, JS y recursos bloqueados por dominio (NAVIGATION_PROFILES)
+        self.profiles = profiles or NavigationProfiles()
+        self.min_text_chars = min_text_chars
+        # "stream" (una pasada con lxml, se detiene al llenar max_chars) o "soup" (árbol BeautifulSoup completo)
+        self.extract = EXTRACTORS[extractor]
+        self.max_chars = max_chars # Limitamos caracteres para no saturar el LLM
+        self.domain_tiers = DomainTierMemory()
+        self.tier_counts = {TIER_HTTP: 0, TIER_BROWSER: 0, "escalations": 0}
+
+    async def start(self):
+        await self.pool.start()
+
+    async def close(self):
+        await self.http.close()
+        await self.pool.close()
+
+    def metrics(self) -> dict:
+        return {
+            "tiers": dict(self.tier_counts),
+            "domains": self.domain_tiers.snapshot(),
+            "pool": self.pool.metrics(),
+            "navigation_profiles": len(self.profiles),
+        }
+
     async def fetch_and_clean(self, url: str) -> dict:
-        print(f"🌐 Navegando a: {url}")
-        
-        async with async_playwright() as p:
-            # Lanzamos navegador headless (sin interfaz gráfica)
-            browser = await p.chromium.launch(headless=True)
-            
-            # Contexto con User-Agent de usuario real para evitar bloqueos simples
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            
-            page = await context.new_page()
-            
-            try:
-                # Timeout de 15 segundos para no colgar el proceso
-                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-                
-                # Obtenemos el HTML renderizado (útil para Single Page Apps)
-                content_html = await page.content()
-                
-            except Exception as e:
-                await browser.close()
-                return {"error": f"Error de navegación: {str(e)}", "status": "failed"}
-            
-            await browser.close()
-
-            # --- FASE DE LIMPIEZA (BeautifulSoup) ---
-            soup = BeautifulSoup(content_html, "lxml")
-            
-            # 1. ELIMINACIÓN DE RUIDO ESTRUCTURAL
-            # Eliminamos etiquetas que NUNCA tienen contenido relevante
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside", "form", "iframe", "noscript"]):
-                tag.decompose()
-
-            # 2. EXTRACCIÓN DE METADATOS
-            title = soup.title.string.strip() if soup.title else "Sin Título"
-            
-            # 3. EXTRACCIÓN DE TEXTO LIMPIO
-            # get_text con separador asegura que los párrafos no se peguen
-            text_content = soup.get_text(separator="\n", strip=True)
-            
-            # 4. LIMPIEZA POST-PROCESADO
-            # Eliminamos líneas vacías múltiples
-            lines = [line.strip() for line in text_content.splitlines() if line.strip()]
-            clean_text = "\n".join(lines)
-            
-            # Retornamos estructura lista para el ContentScorer
-            return {
-                "status": "success",
-                "url": url,
-                "title": title,
-                "clean_text": clean_text[:15000] # Limitamos caracteres para no saturar el LLM
-            }
+        logger.info("🌐 Navegando", extra={"url": url})
+        domain = (urlsplit(url).hostname or "").lower()
+
+        with span("navigate"):
+            # TIER 1: HTTP plano (salvo que ya sepamos que este dominio necesita navegador)
+            if self.domain_tiers.get(domain) != TIER_BROWSER:
+                result = await self._fetch_http(url)
+                if result is not None:
+                    self.domain_tiers.record(domain, TIER_HTTP)
+                    self.tier_counts[TIER_HTTP] += 1
+                    return result
+                self.tier_counts["escalations"] += 1
+
+            # TIER 2: Navegador completo
+            result = await self._fetch_browser(url)
+            if result.get("status") == "success":
+                self.domain_tiers.record(domain, TIER_BROWSER)
+                self.tier_counts[TIER_BROWSER] += 1
+            return result
+
+    async def _fetch_http(self, url: str) -> Optional[dict]:
+        """Devuelve el resultado limpio, o None si hay que escalar a Playwright."""
+        try:
+            with span("fetch_http"):
+                content_html = await self.http.fetch(url)
+        except HttpFetchError:
+            return None
+
+        result = self._clean(url, content_html)
+        text_chars = len(result["clean_text"])
+        if text_chars < self.min_text_chars:
+            return None
+        # Un cascarón de SPA con algo de texto (cookies, menú) sigue sin ser el artículo
+        if text_chars < 4 * self.min_text_chars and looks_like_spa_shell(content_html):
+            return None
+
+        result["tier"] = TIER_HTTP
+        return result
+
+    async def _fetch_browser(self, url: str) -> dict:
+        try:
+            profile = self.profiles.for_url(url)
+            with span("fetch_browser"):
+                async with self.pool.page(profile) as page:
+                    # Timeout acotado (15 s por defecto) para no colgar el proceso
+                    await page.goto(url, wait_until=profile.wait_until, timeout=profile.timeout_ms)
+
+                    # Obtenemos el HTML renderizado (útil para Single Page Apps)
+                    content_html = await page.content()
+
+        except BrowserPoolTimeout as e:
+            # Todas las páginas ocupadas: el cliente puede reintentar más tarde
+            return {"error": str(e), "status": "busy"}
+        except Exception as e:
+            return {"error": f"Error de navegación: {str(e)}", "status": "failed"}
+
+        result = self._clean(url, content_html)
+        result["tier"] = TIER_BROWSER
+        return result
+
+    def _clean(self, url: str, content_html: str) -> dict:
+        # --- FASE DE LIMPIEZA (ver app/services/html_extractor.py) ---
+        with span("extract"):
+            extracted = self.extract(content_html, self.max_chars)
+        PAYLOAD_CHARS.labels("html").observe(len(content_html))
+        PAYLOAD_CHARS.labels("text").observe(len(extracted["clean_text"]))
+        # Retornamos estructura lista para el ContentScorer
+        return {"status": "success", "url": url, **extracted}
 
 # --- BLOQUE DE PRUEBA INDIVIDUAL ---
 if __name__ == "__main__":
@@ -71,5 +187,6 @@ if __name__ == "__main__":
         result = await navigator.fetch_and_clean("https://www.python.org/")
         print(f"Título: {result.get('title')}")
         print(f"Texto (Extracto): {result.get('clean_text')[:200]}...")
+        await navigator.close()
     
     asyncio.run(test_run())
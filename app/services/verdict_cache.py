@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core import config
+from app.core.prompts import PROMPT_VERSION
+from app.core.telemetry import CACHE_LOOKUPS
+from app.db.models import VerdictCacheEntry
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_content(content: str) -> str:
+    """Colapsa espacios y mayúsculas para que el mismo texto limpio dé la misma clave."""
+    return " ".join(content.split()).casefold()
+
+
+def verdict_cache_key(content: str, topic: str, category: str, prompt_version: str = PROMPT_VERSION) -> str:
+    parts = [prompt_version, category, " ".join(topic.split()).casefold(), normalize_content(content)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Caché de veredictos en dos niveles:
+    1. LRU en memoria del proceso (sin I/O). Cada entrada caduca con su veredicto
+       o, antes, a los `memory_ttl` segundos: así un `clear()` en otra réplica
+       también acaba vaciando este nivel.
+    2. Tabla `verdict_cache` en Postgres, compartida entre réplicas, con TTL.
+
+    La versión del prompt forma parte de la clave, así que editar
+    RUTHLESS_EDITOR_PROMPT invalida todo lo anterior; `purge_stale()` borra esas filas.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = config.VERDICT_CACHE_SIZE,
+        ttl_seconds: int = config.VERDICT_CACHE_TTL,
+        memory_ttl: int = config.VERDICT_CACHE_MEMORY_TTL,
+        session_factory=AsyncSessionLocal,
+        prompt_version: str = PROMPT_VERSION,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_ttl = memory_ttl
+        self.session_factory = session_factory
+        self.prompt_version = prompt_version
+        # clave -> (veredicto, instante de caducidad en time.monotonic())
+        self._memory: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+
+        # Métricas
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def key(self, content: str, topic: str, category: str) -> str:
+        return verdict_cache_key(content, topic, category, self.prompt_version)
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            verdict, expires_at = entry
+            if expires_at > time.monotonic():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                CACHE_LOOKUPS.labels("verdict", "memory").inc()
+                return dict(verdict)
+            # Caducada: se descarta y decide la DB (que también aplica el TTL)
+            del self._memory[key]
+
+        try:
+            row = await self._db_get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché de veredictos (DB) no disponible: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            CACHE_LOOKUPS.labels("verdict", "miss").inc()
+            return None
+
+        verdict, expires_at = row
+        self.db_hits += 1
+        CACHE_LOOKUPS.labels("verdict", "db").inc()
+        self._remember(key, verdict, expires_at)
+        return dict(verdict)
+
+    async def put(self, key: str, verdict: dict):
+        self._remember(key, verdict)
+        try:
+            await self._db_put(key, verdict)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar el veredicto en DB: {e}")
+
+    async def purge_stale(self) -> int:
+        """Borra veredictos expirados o generados con otra versión del prompt."""
+        return await self._db_purge(False)
+
+    async def clear(self) -> int:
+        """Invalidación explícita: vacía ambos niveles."""
+        self._memory.clear()
+        return await self._db_purge(True)
+
+    def metrics(self) -> dict:
+        return {
+            "prompt_version": self.prompt_version,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
+
+    def _remember(self, key: str, verdict: dict, expires_at: Optional[datetime] = None):
+        """`expires_at`: caducidad de la fila en DB (por defecto, la de un veredicto recién guardado)."""
+        ttl = min(self.memory_ttl, self.ttl_seconds)
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now(timezone.utc)).total_seconds())
+        self._memory[key] = (dict(verdict), time.monotonic() + ttl)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- Nivel Postgres (AsyncSession) ---
+    async def _db_get(self, key: str) -> Optional[Tuple[dict, datetime]]:
+        async with self.session_factory() as db:
+            return (await db.execute(
+                select(VerdictCacheEntry.verdict, VerdictCacheEntry.expires_at).where(
+                    VerdictCacheEntry.cache_key == key,
+                    VerdictCacheEntry.prompt_version == self.prompt_version,
+                    VerdictCacheEntry.expires_at > datetime.now(timezone.utc),
+                )
+            )).one_or_none()
+
+    async def _db_put(self, key: str, verdict: dict):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        stmt = insert(VerdictCacheEntry).values(
+            cache_key=key, prompt_version=self.prompt_version, verdict=verdict, expires_at=expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VerdictCacheEntry.cache_key],
+            set_={"verdict": stmt.excluded.verdict, "expires_at": stmt.excluded.expires_at},
+        )
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def _db_purge(self, everything: bool) -> int:
+        stmt = delete(VerdictCacheEntry)
+        if not everything:
+            stmt = stmt.where(
+                (VerdictCacheEntry.prompt_version != self.prompt_version)
+                | (VerdictCacheEntry.expires_at <= datetime.now(timezone.utc))
+            )
+        async with self.session_factory() as db:
+            deleted = (await db.execute(stmt)).rowcount
+            await db.commit()
+        return deleted
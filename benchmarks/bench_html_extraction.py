@@ -0,0 +1,132 @@
+"""
+Benchmark de extracción de texto: stream_extract (lxml, una pasada con parada
+temprana) frente a soup_extract (árbol BeautifulSoup completo, la limpieza original).
+
+Mide por página la latencia (p50/p95), el throughput en MB/s de HTML de entrada,
+el pico de memoria (tracemalloc) y si ambos motores producen el mismo texto.
+
+Uso:
+    # Por defecto: las páginas guardadas en benchmarks/corpus/ (ver su README)
+    python benchmarks/bench_html_extraction.py
+
+    # Otro directorio de páginas (p. ej. `curl -o mis_paginas/x.html ...` o page.content() de Playwright)
+    python benchmarks/bench_html_extraction.py --corpus mis_paginas/
+
+    # Páginas sintéticas con navegación, scripts y artículo largo (50 KB .. 5 MB)
+    python benchmarks/bench_html_extraction.py --synthetic 50000 500000 5000000 --json bench_extract.json
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.html_extractor import EXTRACTORS
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+WORDS = ("el modelo procesa datos con atención dispersa y reduce el coste de entrenamiento "
+         "los resultados muestran mejoras consistentes en varios conjuntos de evaluación").split()
+
+
+def synthetic_page(size: int, seed: int) -> str:
+    """Página con la forma típica de un medio: cabecera, menú, scripts, artículo, barra lateral, pie."""
+    rnd = random.Random(seed)
+    head = ("<html><head><title>Artículo de prueba</title>"
+            + "<script>" + "var a=1;" * 2000 + "</script><style>" + "p{margin:0}" * 500 + "</style></head><body>"
+            + "<header><nav>" + "".join(f'<a href="/s{i}">Sección {i}</a>' for i in range(60)) + "</nav></header>")
+    parts = [head, "<article><h1>Un titular razonable</h1>"]
+    length = len(head)
+    while length < size:
+        paragraph = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 120)))
+        block = f'<p>{paragraph} <a href="https://ejemplo.org/{rnd.randint(0, 9999)}">fuente</a>.</p>'
+        if rnd.random() < 0.1:
+            block += "<aside><p>Publicidad relacionada</p></aside><script>track();</script>"
+        parts.append(block)
+        length += len(block)
+    parts.append("</article><footer>Pie de página</footer></body></html>")
+    return "".join(parts)
+
+
+def load_corpus(args) -> list:
+    pages = []
+    if args.corpus:
+        for path in sorted(glob.glob(os.path.join(args.corpus, "**", "*.htm*"), recursive=True)):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append((os.path.relpath(path, args.corpus), f.read()))
+    for i, size in enumerate(args.synthetic or []):
+        pages.append((f"synthetic-{size}", synthetic_page(size, seed=i)))
+    return pages
+
+
+def measure(extract, html: str, max_chars: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = extract(html, max_chars)
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    extract(html, max_chars)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "mb_per_s": len(html) / 1e6 / statistics.median(timings),
+        "peak_mb": peak / 1e6,
+        "result": result,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directorio con páginas .html guardadas (por defecto benchmarks/corpus)")
+    parser.add_argument("--synthetic", type=int, nargs="*", help="Tamaños (bytes) de páginas sintéticas")
+    parser.add_argument("--max-chars", type=int, default=15000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+    if not args.corpus and not args.synthetic:
+        args.corpus = CORPUS_DIR
+
+    pages = load_corpus(args)
+    if not pages:
+        sys.exit("❌ No hay páginas que medir")
+
+    results = []
+    print(f"{'página':<32} {'KB':>8} {'motor':>7} {'p50 ms':>9} {'p95 ms':>9} {'MB/s':>8} {'pico MB':>8}")
+    for name, html in pages:
+        row = {"page": name, "html_bytes": len(html)}
+        for engine, extract in EXTRACTORS.items():
+            r = measure(extract, html, args.max_chars, args.repeat)
+            row[engine] = {k: round(v, 3) for k, v in r.items() if k != "result"}
+            row[f"{engine}_text"] = r["result"]["clean_text"]
+            print(f"{name[:32]:<32} {len(html) / 1024:>8.0f} {engine:>7} {r['p50_ms']:>9.2f} "
+                  f"{r['p95_ms']:>9.2f} {r['mb_per_s']:>8.1f} {r['peak_mb']:>8.1f}")
+        row["same_text"] = row.pop("stream_text") == row.pop("soup_text")
+        row["speedup"] = round(row["soup"]["p50_ms"] / max(row["stream"]["p50_ms"], 1e-6), 1)
+        results.append(row)
+
+    same = sum(r["same_text"] for r in results)
+    speedups = [r["speedup"] for r in results]
+    print(f"\n⚡ Aceleración p50 (soup / stream): mediana {statistics.median(speedups):.1f}x, "
+          f"mín {min(speedups):.1f}x, máx {max(speedups):.1f}x")
+    print(f"🔍 Mismo texto extraído en {same}/{len(results)} páginas")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
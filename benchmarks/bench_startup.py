@@ -0,0 +1,123 @@
+"""
+Benchmark de arranque de la API: cuánto tarda `import app.main`, cuánto hasta la
+primera respuesta de `/` y cuánto hasta que /api/v1/ready da 200 (con el tiempo
+de cada subsistema). Cada repetición corre en un proceso nuevo, como un worker
+de uvicorn o un `--reload`.
+
+Uso (Postgres accesible en DATABASE_URL; sin GOOGLE_API_KEY o sin Chromium el
+subsistema correspondiente aparece como `failed` y ready_s queda vacío):
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --importtime 20          # módulos más lentos de importar
+    python benchmarks/bench_startup.py --json bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Se ejecuta en el proceso hijo: mide import, primera respuesta y readiness
+_PROBE = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import app.main as m
+imported = time.perf_counter() - t0
+import httpx
+
+async def probe(timeout):
+    async with m.app.router.lifespan_context(m.app):
+        transport = httpx.ASGITransport(app=m.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get("/")
+            first_response = time.perf_counter() - t0
+            deadline = time.monotonic() + timeout
+            while True:
+                r = await client.get("/api/v1/ready")
+                if r.status_code == 200 or time.monotonic() > deadline:
+                    break
+                await asyncio.sleep(0.02)
+            return first_response, time.perf_counter() - t0, r.json()
+
+first_response, ready_at, report = asyncio.run(probe(float(sys.argv[1])))
+print(json.dumps({"import_s": imported, "first_response_s": first_response,
+                  "ready_s": ready_at if report["ready"] else None, "subsystems": report["subsystems"]}))
+"""
+
+
+def run_probe(timeout: float) -> dict:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _PROBE, str(timeout)], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    # Incluye arrancar el intérprete: lo que ve un orquestador que lanza el proceso
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def import_profile(top: int) -> list:
+    """Módulos con más tiempo acumulado de import (`python -X importtime`)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def summarize(values: list) -> dict:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {}
+    return {"median_s": round(statistics.median(values), 3), "min_s": round(min(values), 3),
+            "max_s": round(max(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Espera máxima por /api/v1/ready (s)")
+    parser.add_argument("--importtime", type=int, metavar="N", help="Mostrar los N imports más lentos")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    runs = [run_probe(args.timeout) for _ in range(args.repeat)]
+    results = {metric: summarize([r[metric] for r in runs])
+               for metric in ("import_s", "first_response_s", "ready_s", "process_s")}
+    subsystems = {}
+    for name in runs[-1]["subsystems"]:
+        states = [r["subsystems"][name] for r in runs]
+        subsystems[name] = {"status": states[-1]["status"], **summarize([s.get("seconds") for s in states])}
+        if "error" in states[-1]:
+            subsystems[name]["error"] = states[-1]["error"]
+    results["subsystems"] = subsystems
+
+    print(f"{'métrica':<18} {'mediana s':>10} {'mín s':>8} {'máx s':>8}")
+    for metric in ("import_s", "first_response_s", "ready_s", "process_s"):
+        r = results[metric]
+        print(f"{metric:<18} {r.get('median_s', '-'):>10} {r.get('min_s', '-'):>8} {r.get('max_s', '-'):>8}")
+    print(f"\n{'subsistema':<12} {'estado':<8} {'mediana s':>10}")
+    for name, s in subsystems.items():
+        print(f"{name:<12} {s['status']:<8} {s.get('median_s', '-'):>10}  {s.get('error', '').splitlines()[0] if s.get('error') else ''}")
+
+    if args.importtime:
+        results["slowest_imports"] = [{"module": m.strip(), "cumulative_s": round(t, 3)}
+                                      for t, m in import_profile(args.importtime)]
+        print("\n🐢 Imports más lentos (acumulado):")
+        for row in results["slowest_imports"]:
+            print(f"  {row['cumulative_s']:>7.3f} s  {row['module']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Dobles locales de Gemini para medir el pipeline sin red ni cuota.
+
+- FakeChatModel: sustituto de ChatGoogleGenerativeAI para ContentScorer(llm=...), con `ainvoke` y `astream`.
+- FakeEmbeddings: sustituto de GoogleGenerativeAIEmbeddings para EmbeddingService(embeddings=...).
+
+Ambos tienen latencia log-normal configurable (mediana + dispersión) y una tasa de
+errores 429 que el limitador y los reintentos tratan igual que los de Gemini.
+Las respuestas son deterministas: el mismo texto da el mismo veredicto y el mismo vector.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.services.rate_limiter import estimate_tokens
+
+
+class FakeQuotaError(Exception):
+    """Imita el RESOURCE_EXHAUSTED de Gemini (is_quota_error / is_retryable lo reconocen)."""
+
+    code = 429
+
+    def __init__(self):
+        super().__init__("429 RESOURCE_EXHAUSTED (simulado)")
+
+
+class _FakeBackend:
+    def __init__(self, latency_ms: float, jitter: float, error_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+        # Métricas
+        self.calls = 0
+        self.errors = 0
+
+    def _latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._random.lognormvariate(math.log(self.latency_ms), self.jitter) if self.jitter else self.latency_ms
+
+    async def _simulate(self, fraction: float = 1.0) -> float:
+        """Espera `fraction` de una latencia muestreada (o falla con 429). Devuelve la latencia completa (ms)."""
+        self.calls += 1
+        latency = self._latency()
+        await asyncio.sleep(latency * fraction / 1000)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            raise FakeQuotaError()
+        return latency
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class FakeChatModel(_FakeBackend):
+    """
+    `ainvoke(messages)` con un veredicto JSON en el mismo formato que pide RUTHLESS_EDITOR_PROMPT.
+    `astream(messages)` entrega el mismo texto en `stream_chunks` trozos: el primero llega
+    tras `first_token_fraction` de la latencia y el resto se reparte en lo que queda.
+    """
+
+    def __init__(self, latency_ms: float = 800, jitter: float = 0.3, error_rate: float = 0.0,
+                 show_ratio: float = 0.5, output_tokens: int = 120, seed: int = 0,
+                 stream_chunks: int = 8, first_token_fraction: float = 0.3):
+        super().__init__(latency_ms, jitter, error_rate, seed)
+        self.show_ratio = show_ratio
+        self.output_tokens = output_tokens
+        self.stream_chunks = stream_chunks
+        self.first_token_fraction = first_token_fraction
+
+    async def ainvoke(self, messages) -> AIMessage:
+        await self._simulate()
+        content, usage = self._respond(messages)
+        return AIMessage(content=content, usage_metadata=usage)
+
+    async def astream(self, messages):
+        latency = await self._simulate(self.first_token_fraction)
+        content, usage = self._respond(messages)
+        size = -(-len(content) // self.stream_chunks)
+        pieces = [content[i:i + size] for i in range(0, len(content), size)]
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(latency * (1 - self.first_token_fraction) / (len(pieces) - 1) / 1000)
+            # Como Gemini: el uso de tokens llega con el último trozo
+            yield AIMessageChunk(content=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+
+    def _respond(self, messages):
+        prompt = "".join(content for _, content in messages)
+        score = int.from_bytes(_digest(prompt)[:4], "big") / 2 ** 32
+        verdict = {
+            "quality_score": round(score, 2),
+            "decision": "SHOW" if score < self.show_ratio else "BLOCK",
+            "analysis_reasoning": "Veredicto simulado para benchmark.",
+            "is_clickbait": score > 0.9,
+            "estimated_read_time_seconds": 60 + int(score * 600),
+        }
+        content = "```json\n" + json.dumps(verdict, ensure_ascii=False) + "\n```"
+        usage = {
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": self.output_tokens,
+            "total_tokens": estimate_tokens(prompt) + self.output_tokens,
+        }
+        return content, usage
+
+
+class FakeEmbeddings(_FakeBackend):
+    """`aembed_documents(texts)`: una sola latencia por llamada (como batchEmbedContents)."""
+
+    def __init__(self, latency_ms: float = 150, jitter: float = 0.3, error_rate: float = 0.0,
+                 dimensions: int = 768, seed: int = 0):
+        super().__init__(latency_ms, jitter, error_rate, seed)
+        self.dimensions = dimensions
+        self.texts = 0
+
+    async def aembed_documents(self, texts, task_type=None, **kwargs):
+        await self._simulate()
+        self.texts += len(texts)
+        return [self.vector(text) for text in texts]
+
+    def vector(self, text: str) -> list:
+        # Vector unitario pseudoaleatorio sembrado con el texto: textos distintos quedan lejos
+        rng = np.random.default_rng(int.from_bytes(_digest(text)[:8], "big"))
+        v = rng.standard_normal(self.dimensions).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
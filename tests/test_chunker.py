@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.chunker import DocumentChunker, split_chunks
+
+BOILERPLATE = "\n".join([
+    "Inicio", "Noticias", "Suscríbete a nuestra newsletter",
+    "Usamos cookies para mejorar tu experiencia. Acepta las cookies para continuar navegando.",
+] * 3)
+
+SECTION_NOISE = (
+    "La empresa celebró su aniversario con una fiesta en la oficina. Hubo tarta, música y "
+    "fotos del equipo. Los empleados compartieron anécdotas de los primeros años. "
+) * 8
+
+SECTION_SIGNAL = (
+    "El mecanismo de atención dispersa reduce la complejidad del transformer de cuadrática a "
+    "N log N. Los experimentos sobre GLUE y SQuAD muestran que la atención dispersa mantiene "
+    "la precisión del transformer denso con menos memoria. "
+) * 8
+
+
+def long_document() -> str:
+    sections = [BOILERPLATE]
+    for i in range(12):
+        sections.append(f"Sección {i}")
+        sections.append(SECTION_SIGNAL if i == 9 else SECTION_NOISE)
+    return "\n".join(sections)
+
+
+def test_split_respects_max_and_headings():
+    chunks = split_chunks(long_document(), target_chars=1500, max_chars=3000)
+    assert len(chunks) > 5
+    assert all(len(c.text) <= 3000 for c in chunks)
+    # Se corta antes de los encabezados: cada sección arranca su propio fragmento
+    assert sum(c.text.startswith("Sección") for c in chunks) >= 10
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+
+def test_long_line_split_by_sentences():
+    chunks = split_chunks(SECTION_SIGNAL * 5, target_chars=500, max_chars=800)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 800 for c in chunks)
+
+
+def test_selects_topic_chunk_over_opening():
+    chunker = DocumentChunker(min_doc_chars=5000, target_chars=1500, max_chars=3000,
+                              max_selected=1, budget_chars=4000, topic_weight=0.7)
+    selected = chunker.select(long_document(), "atención dispersa en transformers")
+    assert selected is not None and len(selected) == 1
+    assert "atención dispersa" in selected[0].text
+    assert "cookies" not in selected[0].text
+
+    # Con más hueco se añaden otros fragmentos, siempre en orden de lectura
+    chunker.max_selected = 3
+    selected = chunker.select(long_document(), "atención dispersa en transformers")
+    assert len(selected) == 2  # el presupuesto de 4000 caracteres no da para un tercero
+    assert [c.index for c in selected] == sorted(c.index for c in selected)
+
+
+def test_short_text_is_not_chunked():
+    assert DocumentChunker(min_doc_chars=15000).select(SECTION_SIGNAL, "transformers") is None
+
+
+if __name__ == "__main__":
+    test_split_respects_max_and_headings()
+    test_long_line_split_by_sentences()
+    test_selects_topic_chunk_over_opening()
+    test_short_text_is_not_chunked()
+    print("✅ Troceado y saliencia OK")
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.domain_reputation import DomainReputation, _DomainHistory
+from app.services.domain_trie import DomainTrie
+
+
+def make_reputation() -> DomainReputation:
+    reputation = DomainReputation(enabled=True, block_min_items=20, block_ratio=0.95,
+                                  fast_track_trust=0.9, trust_weight=0.2)
+    reputation.trusted.insert("arxiv.org", 1.0)
+    reputation.trusted.insert("example.org", 0.5)
+    reputation.priorities = {"PROFESIONAL": 1, "RUIDO": 4}
+    reputation.history = {"spam.test": _DomainHistory(total=30, blocked=30),
+                          "mixed.test": _DomainHistory(total=30, blocked=20)}
+    return reputation
+
+
+def test_trie_suffix_match():
+    trie = DomainTrie()
+    trie.insert("arxiv.org", 1.0)
+    trie.insert("blog.arxiv.org", 0.3)
+    assert trie.longest_match("arxiv.org") == 1.0
+    assert trie.longest_match("export.arxiv.org") == 1.0
+    assert trie.longest_match("blog.arxiv.org") == 0.3
+    assert trie.longest_match("notarxiv.org") is None
+    assert trie.longest_match("org") is None
+
+
+def test_precheck_blocks_noisy_domains_and_categories():
+    reputation = make_reputation()
+    assert reputation.precheck("https://www.spam.test/a", "NOTICIAS")["decision"] == "BLOCK"
+    assert reputation.precheck("https://mixed.test/a", "NOTICIAS") is None
+    assert reputation.precheck("https://mixed.test/a", "RUIDO")["decision"] == "BLOCK"
+    # Una fuente de confianza no se bloquea por categoría sin leerla
+    assert reputation.precheck("https://arxiv.org/abs/1", "RUIDO") is None
+    assert reputation.precheck("https://arxiv.org/abs/1", "PROFESIONAL") is None
+
+
+def test_trust_fast_track_and_blend():
+    reputation = make_reputation()
+    verdict = reputation.fast_track("https://export.arxiv.org/abs/1", "palabra " * 400)
+    assert verdict["decision"] == "SHOW" and verdict["verdict_source"] == "domain"
+    assert verdict["estimated_read_time_seconds"] == 120
+    assert reputation.fast_track("https://example.org/a", "texto") is None
+    # ... pero no en una categoría de ruido: ahí se evalúa el contenido
+    assert reputation.fast_track("https://arxiv.org/abs/1", "texto", "RUIDO") is None
+
+    adjusted = reputation.observe("https://example.org/a", {"quality_score": 0.4, "decision": "BLOCK",
+                                                            "verdict_source": "llm"})
+    assert adjusted["quality_score"] == 0.42
+    assert reputation.history["example.org"].blocked == 1
+
+
+def test_lookup_is_sub_millisecond():
+    reputation = make_reputation()
+    for i in range(50_000):
+        reputation.trusted.insert(f"site{i}.example{i % 100}.com", 0.8)
+    urls = [f"https://a.b.site{i}.example{i % 100}.com/path" for i in range(1000)]
+    start = time.perf_counter()
+    for url in urls:
+        reputation.precheck(url, "NOTICIAS")
+        reputation.fast_track(url, "")
+    per_lookup = (time.perf_counter() - start) / len(urls)
+    assert per_lookup < 0.001
+
+
+if __name__ == "__main__":
+    test_trie_suffix_match()
+    test_precheck_blocks_noisy_domains_and_categories()
+    test_trust_fast_track_and_blend()
+    test_lookup_is_sub_millisecond()
+    print("✅ Reputación de dominios OK")
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+# Aseguramos que Python encuentre el módulo 'app' (y los dobles de benchmarks/)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+import numpy as np
+
+from fakes import FakeEmbeddings
+from app.services.embedding_service import EmbeddingCache, EmbeddingService
+from app.services.rate_limiter import GeminiRateLimiter
+
+
+def _no_database():
+    raise ConnectionError("sin base de datos")
+
+
+def make_service(**fake) -> EmbeddingService:
+    backend = FakeEmbeddings(jitter=0, **fake)
+    return EmbeddingService(
+        limiter=GeminiRateLimiter(rpm=10_000, tpm=10_000_000, max_concurrency=4),
+        cache=EmbeddingCache(session_factory=_no_database),
+        batch_window_ms=20,
+        embeddings=backend,
+    )
+
+
+def test_concurrent_calls_share_one_request():
+    async def scenario():
+        service = make_service(latency_ms=10)
+        vectors = await asyncio.gather(*(service.generate_embedding(f"texto {i}") for i in range(5)))
+        return service, vectors
+
+    service, vectors = asyncio.run(scenario())
+    assert service.embeddings.calls == 1 and service.api_calls == 1
+    assert service.texts_embedded == 5
+    assert all(v is not None and v.dtype == np.float32 for v in vectors)
+    assert np.allclose(vectors[3], service.embeddings.vector("texto 3"))
+
+
+def test_identical_texts_in_flight_are_deduplicated():
+    async def scenario():
+        service = make_service(latency_ms=50)
+        first = asyncio.create_task(service.generate_embedding("mismo texto"))
+        await asyncio.sleep(0.03)  # la ventana ya se cerró: el primero está en vuelo
+        second = await service.generate_embedding("mismo texto")
+        return service, await first, second
+
+    service, first, second = asyncio.run(scenario())
+    assert service.embeddings.calls == 1 and service.embeddings.texts == 1
+    assert first is second
+
+
+def test_error_reaches_every_waiter_and_next_call_retries():
+    async def scenario():
+        service = make_service(latency_ms=5, error_rate=1.0)
+        failed = await asyncio.gather(*(service.generate_embedding(t) for t in ("a", "b", "a")))
+        pending = dict(service._inflight)
+
+        service.embeddings.error_rate = 0.0
+        retried = await service.generate_embedding("a")
+        return service, failed, pending, retried
+
+    service, failed, pending, retried = asyncio.run(scenario())
+    # Gemini falla: todos los que esperaban reciben None (el pipeline sigue sin vector)
+    assert failed == [None, None, None]
+    assert pending == {}
+    # El fallo no queda cacheado: la siguiente llamada vuelve a la API
+    assert retried is not None and service.embeddings.calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_batch():
+    async def scenario():
+        service = make_service(latency_ms=50)
+        cancelled = asyncio.create_task(service.generate_embedding("compartido"))
+        survivor = asyncio.create_task(service.generate_embedding("compartido"))
+        await asyncio.sleep(0.03)
+        cancelled.cancel()
+        return service, await survivor
+
+    service, vector = asyncio.run(scenario())
+    assert vector is not None and service.embeddings.calls == 1
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_request()
+    test_identical_texts_in_flight_are_deduplicated()
+    test_error_reaches_every_waiter_and_next_call_retries()
+    test_cancelled_caller_does_not_cancel_the_batch()
+    print("✅ Micro-lotes de embeddings OK")
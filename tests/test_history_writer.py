@@ -0,0 +1,176 @@
+import asyncio
+import os
+import sys
+from collections import Counter
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.writer import HistoryWriter
+
+
+class FakeDatabase:
+    """
+    content_history en memoria. Un INSERT que contiene una fila de `poisoned`
+    falla siempre; una de `flaky` falla tantas veces como indique el contador.
+    """
+
+    def __init__(self, poisoned=(), flaky=None):
+        self.poisoned = set(poisoned)
+        self.flaky = Counter(flaky or {})
+        self.rows = []
+        self.inserts = 0
+
+    def session(self):
+        return _Session(self)
+
+
+class _Session:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.staged = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return _Transaction(self)
+
+    async def execute(self, stmt, rows=None):
+        if rows is None:
+            return  # UPSERTs de contadores
+        self.database.inserts += 1
+        urls = [row["source_url"] for row in rows]
+        if self.database.poisoned.intersection(urls):
+            raise ValueError("violates foreign key constraint")
+        for url in urls:
+            if self.database.flaky[url] > 0:
+                self.database.flaky[url] -= 1
+                raise ConnectionError("connection reset")
+        self.staged.extend(rows)
+
+
+class _Transaction:
+    def __init__(self, session: _Session):
+        self.session = session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.session.database.rows.extend(self.session.staged)
+        return False
+
+
+def rows(n: int) -> list:
+    return [{"source_url": f"https://example.com/{i}", "category_code": "PROFESIONAL", "is_signal": True}
+            for i in range(n)]
+
+
+def urls(database: FakeDatabase) -> list:
+    return [row["source_url"] for row in database.rows]
+
+
+def make_writer(database: FakeDatabase, **kwargs) -> HistoryWriter:
+    return HistoryWriter(session_factory=database.session, **{"batch_size": 100, "flush_interval": 10.0,
+                                                               "max_buffer": 1000, **kwargs})
+
+
+def test_flush_on_size():
+    async def scenario():
+        database = FakeDatabase()
+        writer = make_writer(database, batch_size=3)
+        await writer.start()
+        for row in rows(3):
+            await writer.submit(row)
+        await asyncio.sleep(0.05)  # muy por debajo de flush_interval
+        flushed = list(database.rows)
+        await writer.stop()
+        return writer, flushed
+
+    writer, flushed = asyncio.run(scenario())
+    assert len(flushed) == 3
+    assert writer.metrics() == {"buffered": 0, "written": 3, "failed": 0, "flushes": 1}
+
+
+def test_flush_on_interval():
+    async def scenario():
+        database = FakeDatabase()
+        writer = make_writer(database, flush_interval=0.05)
+        await writer.start()
+        for row in rows(2):
+            await writer.submit(row)
+        await asyncio.sleep(0.2)
+        flushed = list(database.rows)
+        await writer.stop()
+        return writer, flushed
+
+    writer, flushed = asyncio.run(scenario())
+    assert len(flushed) == 2 and writer.flushes == 1
+
+
+def test_stop_drains_the_buffer():
+    async def scenario():
+        database = FakeDatabase()
+        writer = make_writer(database, batch_size=4)
+        await writer.start()
+        for row in rows(10):
+            await writer.submit(row)
+        await writer.stop()
+        return database, writer
+
+    database, writer = asyncio.run(scenario())
+    assert urls(database) == [row["source_url"] for row in rows(10)]
+    assert writer.written == 10 and writer.flushes == 3
+
+
+def test_poisoned_row_is_dropped_and_the_rest_written():
+    database = FakeDatabase(poisoned={"https://example.com/2"})
+    writer = make_writer(database)
+    asyncio.run(writer._flush(rows(5)))
+
+    assert "https://example.com/2" not in urls(database) and len(database.rows) == 4
+    assert (writer.written, writer.failed, writer.flushes) == (4, 1, 1)
+    # Dos intentos del lote + uno por fila
+    assert database.inserts == 2 + 5
+
+
+def test_transient_failure_is_retried_as_a_batch():
+    database = FakeDatabase(flaky={"https://example.com/1": 1})
+    writer = make_writer(database)
+    asyncio.run(writer._flush(rows(3)))
+
+    assert len(database.rows) == 3 and database.inserts == 2
+    assert (writer.written, writer.failed, writer.flushes) == (3, 0, 1)
+
+
+def test_single_row_gets_the_same_attempts_as_a_batch():
+    # Falla en los dos intentos del lote y entra en la pasada fila a fila
+    for size in (1, 3):
+        database = FakeDatabase(flaky={"https://example.com/0": 2})
+        writer = make_writer(database)
+        asyncio.run(writer._flush(rows(size)))
+        assert len(database.rows) == size
+        assert (writer.written, writer.failed) == (size, 0)
+
+
+def test_submit_without_running_writer_writes_at_once():
+    database = FakeDatabase()
+    writer = make_writer(database)
+    asyncio.run(writer.submit(rows(1)[0]))
+    assert len(database.rows) == 1 and writer.written == 1
+
+
+if __name__ == "__main__":
+    test_flush_on_size()
+    test_flush_on_interval()
+    test_stop_drains_the_buffer()
+    test_poisoned_row_is_dropped_and_the_rest_written()
+    test_transient_failure_is_retried_as_a_batch()
+    test_single_row_gets_the_same_attempts_as_a_batch()
+    test_submit_without_running_writer_writes_at_once()
+    print("✅ Escritura diferida OK")
@@ -0,0 +1,97 @@
+import glob
+import os
+import sys
+import warnings
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import config
+from app.services.html_extractor import NOISE_TAGS, soup_extract, stream_extract
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'corpus')
+
+ARTICLE = """<!DOCTYPE html>
+<html><head>
+  <title> Atención dispersa en transformers </title>
+  <style>body { color: red }</style>
+  <script>var tracking = "no debe salir";</script>
+</head><body>
+  <header><a href="/">Inicio</a> Cabecera del sitio</header>
+  <nav><ul><li><a href="/a">Menú A</a></li><li><a href="/b">Menú B</a></li></ul></nav>
+  <article>
+    <h1>Atención dispersa</h1>
+    <p>El mecanismo reduce la complejidad
+       de cuadrática a <b>N log N</b>.</p>
+    <p>Ver el <a href="https://arxiv.org/abs/1">paper</a> y el
+       <a href="https://www.amazon.com/dp/B0?tag=afiliado-21">libro</a>.</p>
+    <form><input name="q"><button>Buscar</button></form>
+    <aside>Publicidad lateral</aside>
+    <iframe src="https://ads.example"></iframe>
+    <noscript>Activa JavaScript</noscript>
+    <p>Conclusión:   mantiene la precisión.</p>
+  </article>
+  <footer>© 2024 <a href="/legal">Aviso legal</a></footer>
+</body></html>"""
+
+
+def assert_parity(html: str, max_chars: int = 15000):
+    streamed, souped = stream_extract(html, max_chars), soup_extract(html, max_chars)
+    assert streamed["title"] == souped["title"]
+    assert streamed["clean_text"] == souped["clean_text"]
+    for stat in ("links", "affiliate_links"):
+        if streamed["page_stats"]["html_chars"] == len(html):
+            assert streamed["page_stats"][stat] == souped["page_stats"][stat], stat
+        else:
+            # Parada temprana: solo cuenta los enlaces de la parte consumida
+            assert streamed["page_stats"][stat] <= souped["page_stats"][stat], stat
+    return streamed
+
+
+def test_noise_subtrees_are_skipped():
+    result = assert_parity(ARTICLE)
+    text = result["clean_text"]
+    assert text.splitlines()[:2] == ["Atención dispersa en transformers", "Atención dispersa"]
+    for noise in ("no debe salir", "color: red", "Cabecera", "Menú", "Buscar", "Publicidad",
+                  "JavaScript", "Aviso legal"):
+        assert noise not in text, noise
+    assert "Conclusión:   mantiene la precisión." in text
+    # Los enlaces dentro de subárboles de ruido tampoco cuentan
+    assert result["page_stats"]["links"] == 2 and result["page_stats"]["affiliate_links"] == 1
+    # El fixture cubre todas las etiquetas de la lista de ruido
+    assert all(f"<{tag}" in ARTICLE for tag in NOISE_TAGS)
+
+
+def test_title_edge_cases():
+    assert assert_parity("<html><body><p>Sin cabecera</p></body></html>")["title"] == "Sin Título"
+    assert assert_parity("<html><head><title>  Solo título </title></head></html>")["title"] == "Solo título"
+    assert assert_parity("<html><head><title></title></head><body><p>x</p></body></html>")["title"] == "Sin Título"
+
+
+def test_text_is_cut_at_the_budget():
+    paragraphs = "".join(f"<p>Párrafo {i}: " + "texto " * 40 + "</p>" for i in range(5000))
+    html = f"<html><head><title>Largo</title></head><body>{paragraphs}</body></html>"
+    result = assert_parity(html, config.EXTRACT_MAX_CHARS)
+    assert len(result["clean_text"]) == config.EXTRACT_MAX_CHARS
+    # Se deja de parsear al llenar el presupuesto: no se consume el documento entero
+    assert result["page_stats"]["html_chars"] < len(html)
+
+
+def test_saved_pages_parity():
+    pages = sorted(glob.glob(os.path.join(CORPUS, "*.html")))
+    assert pages
+    for path in pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # XHTML servido como HTML: aviso de BeautifulSoup
+            result = assert_parity(html)
+        assert result["clean_text"], path
+
+
+if __name__ == "__main__":
+    test_noise_subtrees_are_skipped()
+    test_title_edge_cases()
+    test_text_is_cut_at_the_budget()
+    test_saved_pages_parity()
+    print("✅ Extracción HTML OK")
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import numpy as np
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.interest_index import InterestIndex, InterestMatch, _Snapshot
+
+
+def unit(*values):
+    vector = np.zeros(768, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+def make_index() -> InterestIndex:
+    index = InterestIndex(vectorizer=None, min_similarity=0.5)
+    # (interest_id, user_id, categoría, umbral, vector)
+    index.snapshot = _Snapshot([
+        (1, 10, "PROFESIONAL", 0.7, unit(1, 0)),
+        (2, 10, None, 0.7, unit(1, 0.2)),        # mismo usuario, sin categoría
+        (3, 20, "PROFESIONAL", 0.9, unit(1, 1)),
+        (4, 30, "OCIO_SANO", 0.5, unit(1, 0)),   # otra categoría
+        (5, 40, None, 0.5, unit(0, 1)),          # poco parecido
+    ])
+    return index
+
+
+def test_one_match_per_interested_user():
+    matches = make_index().match(unit(1, 0), "PROFESIONAL")
+    assert [m.user_id for m in matches] == [10, 20]
+    # Para cada usuario, su interés más parecido
+    assert matches[0].interest_id == 1 and matches[0].similarity > 0.99
+    assert 0.5 <= matches[1].similarity < 0.8
+
+
+def test_requesting_user_is_excluded():
+    matches = make_index().match(unit(1, 0), "PROFESIONAL", exclude_user=10)
+    assert [m.user_id for m in matches] == [20]
+
+
+def test_per_user_threshold():
+    match = InterestMatch(user_id=20, interest_id=3, similarity=0.7, threshold=0.9)
+    assert not match.accepts({"quality_score": 0.8, "is_clickbait": False})
+    assert match.accepts({"quality_score": 0.95, "is_clickbait": False})
+    assert not match.accepts({"quality_score": 0.95, "is_clickbait": True})
+
+
+def test_requester_gets_own_interest_without_similarity_gate():
+    index = make_index()
+    # Usuario 40: su único interés se parece poco, pero el ítem lo pidió él
+    own = index.match_user(40, unit(1, 0), "PROFESIONAL")
+    assert own.interest_id == 5 and own.similarity < 0.5 and own.threshold == 0.5
+    assert index.match_user(10, unit(1, 0.2), "PROFESIONAL").interest_id == 2
+    # Sin intereses en la categoría (o sin intereses): sin umbral propio
+    assert index.match_user(30, unit(1, 0), "PROFESIONAL") is None
+    assert index.match_user(99, unit(1, 0), "PROFESIONAL") is None
+
+
+def test_empty_index_and_missing_vector():
+    index = InterestIndex(vectorizer=None)
+    assert index.match(unit(1, 0), "PROFESIONAL") == []
+    assert make_index().match(None, "PROFESIONAL") == []
+    assert make_index().match_user(10, None, "PROFESIONAL") is None
+
+
+if __name__ == "__main__":
+    test_one_match_per_interested_user()
+    test_requesting_user_is_excluded()
+    test_per_user_threshold()
+    test_requester_gets_own_interest_without_similarity_gate()
+    test_empty_index_and_missing_vector()
+    print("✅ Índice de intereses OK")
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.analysis_pipeline import AnalysisError
+from app.services.job_queue import JobQueue
+
+PAYLOAD = {"url": "https://example.com/articulo", "topic": "transformers", "category": "PROFESIONAL"}
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDatabase:
+    """Tabla analysis_jobs en memoria: `execute` devuelve las filas preparadas y guarda la sentencia."""
+
+    def __init__(self, *jobs):
+        self.jobs = {job.id: job for job in jobs}
+        self.selected = list(jobs)
+        self.statements = []
+
+    def session(self):
+        return _Session(self)
+
+
+class _Session:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        self.database.statements.append(stmt)
+        return _Result(self.database.selected)
+
+    def get(self, model, job_id):
+        return self.database.jobs.get(job_id)
+
+    def commit(self):
+        pass
+
+
+class FailingPipeline:
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    async def run(self, request, priority=None):
+        self.calls += 1
+        raise self.error
+
+
+def job(status="running", attempts=1, started_ago=0, payload=PAYLOAD) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(), status=status, payload=payload, result=None, error=None, error_code=None,
+        webhook_url=None, attempts=attempts, created_at=datetime.now(timezone.utc),
+        started_at=datetime.now(timezone.utc) - timedelta(seconds=started_ago), finished_at=None,
+    )
+
+
+def make_queue(database: FakeDatabase, pipeline=None) -> JobQueue:
+    return JobQueue(pipeline=pipeline, workers=1, visibility_timeout=60, max_attempts=3,
+                    session_factory=database.session)
+
+
+def sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def process(queue: JobQueue, row) -> None:
+    asyncio.run(queue._process(row.id, row.payload, row.attempts))
+
+
+def test_claim_skips_locked_rows_and_caps_reclaims():
+    row = job(status="queued", attempts=0)
+    database = FakeDatabase(row)
+    claimed = make_queue(database)._claim()
+
+    assert claimed == (row.id, PAYLOAD, 1)
+    assert row.status == "running" and row.started_at is not None
+    query = sql(database.statements[0])
+    assert query.endswith("FOR UPDATE SKIP LOCKED")
+    # Un "running" vencido solo se reclama si le quedan intentos
+    assert "analysis_jobs.attempts < 3" in query
+    assert "ORDER BY analysis_jobs.created_at" in query
+
+    assert make_queue(FakeDatabase())._claim() is None
+
+
+def test_exhausted_stale_jobs_are_failed():
+    row = job(attempts=3, started_ago=120)
+    database = FakeDatabase(row)
+    expired = make_queue(database)._expire()
+
+    assert expired == [row.id]
+    assert row.status == "failed" and row.error_code == 500 and row.finished_at is not None
+    query = sql(database.statements[0])
+    assert "analysis_jobs.attempts >= 3" in query and query.endswith("FOR UPDATE SKIP LOCKED")
+
+
+def test_invalid_payload_fails_without_retry():
+    row = job(payload={"topic": "sin url"})
+    pipeline = FailingPipeline(AssertionError("no debería llamarse"))
+    process(make_queue(FakeDatabase(row), pipeline), row)
+
+    assert row.status == "failed" and row.error_code == 422
+    assert pipeline.calls == 0
+
+
+def test_transient_analysis_error_is_requeued_until_exhausted():
+    # Pool del navegador saturado: 503 => se reencola mientras queden intentos
+    row = job(attempts=1)
+    queue = make_queue(FakeDatabase(row), FailingPipeline(AnalysisError(503, "Navegador saturado: timeout")))
+    process(queue, row)
+    assert row.status == "queued" and row.started_at is None and row.error is None
+
+    row.status, row.attempts = "running", 3
+    process(queue, row)
+    assert row.status == "failed" and row.error_code == 503
+    assert row.error == "Navegador saturado: timeout"
+
+
+def test_client_analysis_error_fails_at_once():
+    row = job(attempts=1)
+    process(make_queue(FakeDatabase(row), FailingPipeline(AnalysisError(422, "Contenido insuficiente"))), row)
+    assert row.status == "failed" and row.error_code == 422
+
+
+def test_unexpected_error_is_requeued():
+    row = job(attempts=2)
+    queue = make_queue(FakeDatabase(row), FailingPipeline(RuntimeError("conexión perdida")))
+    process(queue, row)
+    assert row.status == "queued"
+
+    row.status, row.attempts = "running", 3
+    process(queue, row)
+    assert row.status == "failed" and row.error == "RuntimeError: conexión perdida"
+
+
+if __name__ == "__main__":
+    test_claim_skips_locked_rows_and_caps_reclaims()
+    test_exhausted_stale_jobs_are_failed()
+    test_invalid_payload_fails_without_retry()
+    test_transient_analysis_error_is_requeued_until_exhausted()
+    test_client_analysis_error_fails_at_once()
+    test_unexpected_error_is_requeued()
+    print("✅ Cola de trabajos OK")
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.navigation_profiles import (
+    ESTIMATED_BYTES, NavigationProfile, NavigationProfiles, ResourceBlocker, load_profiles,
+)
+
+BLOCK = frozenset(["image", "font", "media"])
+
+
+class FakeRoute:
+    def __init__(self, url: str, resource_type: str):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+    async def abort(self, error_code):
+        self.outcome = error_code
+
+
+def test_tracker_domains_match_by_suffix():
+    blocker = ResourceBlocker(tracker_domains=["doubleclick.net", "google-analytics.com"])
+    assert blocker.reason("https://doubleclick.net/pixel", "image", BLOCK) == "tracker"
+    assert blocker.reason("https://stats.g.doubleclick.net/j/collect", "xhr", BLOCK) == "tracker"
+    assert blocker.reason("https://www.google-analytics.com/analytics.js", "script", BLOCK) == "tracker"
+    # Misma terminación de texto pero otro dominio
+    assert blocker.reason("https://notdoubleclick.net/app.js", "script", BLOCK) is None
+    # Tipos de recurso
+    assert blocker.reason("https://cdn.example/hero.webp", "image", BLOCK) == "image"
+    assert blocker.reason("https://cdn.example/app.js", "script", BLOCK) is None
+
+
+def test_main_document_is_never_blocked():
+    blocker = ResourceBlocker(tracker_domains=["doubleclick.net"])
+    assert blocker.reason("https://ads.doubleclick.net/landing", "document", BLOCK) is None
+    assert blocker.reason("https://ads.doubleclick.net/frame", "sub_frame", BLOCK) == "tracker"
+    assert blocker.reason("https://example.com/", "document", frozenset(["document"])) is None
+
+
+def test_handle_aborts_and_counts():
+    async def scenario():
+        blocker = ResourceBlocker(tracker_domains=["doubleclick.net"])
+        routes = [
+            FakeRoute("https://example.com/", "document"),
+            FakeRoute("https://cdn.example/a.png", "image"),
+            FakeRoute("https://ad.doubleclick.net/x.js", "script"),
+        ]
+        for route in routes:
+            await blocker.handle(route, BLOCK)
+        return blocker, routes
+
+    blocker, routes = asyncio.run(scenario())
+    assert [r.outcome for r in routes] == ["continue", "blockedbyclient", "blockedbyclient"]
+    assert blocker.metrics() == {
+        "allowed": 1,
+        "blocked": {"image": 1, "tracker": 1},
+        "blocked_total": 2,
+        "estimated_bytes_saved": ESTIMATED_BYTES["image"] + ESTIMATED_BYTES["script"],
+    }
+
+
+def test_profile_from_dict_merges_defaults():
+    default = NavigationProfile(wait_until="domcontentloaded", timeout_ms=15000, block_resources=["image"])
+    profile = NavigationProfile.from_dict({"wait_until": "networkidle", "javascript": False}, default)
+    assert profile.wait_until == "networkidle" and profile.javascript is False
+    assert profile.timeout_ms == 15000 and profile.block_resources == frozenset(["image"])
+    assert profile.viewport == default.viewport and profile.viewport is not default.viewport
+
+
+def test_profile_rejects_unknown_fields_and_wait_conditions():
+    default = NavigationProfile()
+    for data, message in (
+        ({"wait_untill": "load"}, "Campos desconocidos"),
+        ({"timeout": 1000, "headless": False}, "headless, timeout"),
+        ({"wait_until": "idle"}, "wait_until inválido"),
+    ):
+        try:
+            NavigationProfile.from_dict(data, default)
+        except ValueError as e:
+            assert message in str(e), str(e)
+        else:
+            raise AssertionError(f"{data} debería ser rechazado")
+
+
+def test_profiles_cover_subdomains():
+    profiles = NavigationProfiles(
+        load_profiles('{"spa.example": {"wait_until": "networkidle"}, "app.spa.example": {"javascript": false}}'),
+        default=NavigationProfile(wait_until="domcontentloaded"),
+    )
+    assert len(profiles) == 2
+    assert profiles.for_url("https://news.spa.example/x").wait_until == "networkidle"
+    # El dominio más específico gana; sus campos ausentes vienen del perfil por defecto
+    nested = profiles.for_url("https://app.spa.example/x")
+    assert nested.javascript is False and nested.wait_until == "domcontentloaded"
+    assert profiles.for_url("https://other.example/") is profiles.default
+    assert load_profiles("  ") == {}
+
+
+if __name__ == "__main__":
+    test_tracker_domains_match_by_suffix()
+    test_main_document_is_never_blocked()
+    test_handle_aborts_and_counts()
+    test_profile_from_dict_merges_defaults()
+    test_profile_rejects_unknown_fields_and_wait_conditions()
+    test_profiles_cover_subdomains()
+    print("✅ Perfiles de navegación OK")
@@ -0,0 +1,84 @@
+import os
+import sys
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.prefilter import ContentPrefilter, is_affiliate_link
+
+# Mismos casos que test_gatekeeper.py, pero sin llamar a Gemini
+PAPER = """
+Title: A New Approach to Transformer Efficiency using Sparse Attention
+Abstract: We propose a novel mechanism for sparse attention that reduces computational complexity from O(N^2) to O(N log N).
+This allows for training larger models with significantly less hardware. The method is validated on standard benchmarks like GLUE and SQuAD.
+"""
+
+CHISME = """
+¡INCREÍBLE! ¡No creerás con quién está saliendo esta celebridad ahora!
+Las fotos exclusivas revelan que X y Y fueron vistos cenando juntos.
+¡El drama explota en redes sociales! Mira las reacciones de sus ex-parejas.
+Haz clic aquí para ver la galería completa de fotos borrosas.
+"""
+
+GADGETS = """
+Top 10 Gadgets que necesitas comprar este 2024.
+El número 7 te sorprenderá. Estos dispositivos cambiarán tu vida para siempre.
+Incluye enlaces de afiliados a Amazon para cada producto.
+Resumen: Un reloj inteligente, una freidora de aire y unos auriculares.
+"""
+
+
+def test_blocks_obvious_noise():
+    prefilter = ContentPrefilter(block_threshold=0.95, show_threshold=0.0, sample_rate=0.0)
+    verdict = prefilter.evaluate(CHISME)
+    assert verdict is not None
+    assert verdict["decision"] == "BLOCK"
+    assert verdict["verdict_source"] == "prefilter"
+    assert verdict["is_clickbait"]
+
+    verdict = prefilter.evaluate(GADGETS)
+    assert verdict is not None and verdict["decision"] == "BLOCK"
+
+
+def test_leaves_signal_to_the_llm():
+    prefilter = ContentPrefilter(block_threshold=0.95, show_threshold=0.0, sample_rate=0.0)
+    assert prefilter.evaluate(PAPER) is None
+    assert prefilter.noise_probability(PAPER) < 0.5
+
+
+def test_markup_signals():
+    prefilter = ContentPrefilter()
+    clean = {"html_chars": 20000, "text_chars": 8000, "links": 20, "affiliate_links": 0}
+    spammy = {"html_chars": 200000, "text_chars": 800, "links": 20, "affiliate_links": 15}
+    assert prefilter.noise_probability(PAPER, spammy) > prefilter.noise_probability(PAPER, clean)
+    assert is_affiliate_link("https://amzn.to/3xYz")
+    assert is_affiliate_link("https://www.amazon.es/dp/B0C?tag=blog-21")
+    assert not is_affiliate_link("https://arxiv.org/abs/2401.00001")
+
+
+def test_skip_and_agreement_metrics():
+    prefilter = ContentPrefilter(sample_rate=0.0)
+    verdict = prefilter.evaluate(CHISME)
+    assert prefilter.skip(verdict)
+
+    prefilter.sample_rate = 1.0
+    assert not prefilter.skip(verdict)
+    prefilter.record_audit(verdict, {"decision": "BLOCK", "verdict_source": "llm"})
+    prefilter.record_audit(verdict, {"decision": "SHOW", "verdict_source": "llm"})
+    # Los veredictos de emergencia no cuentan para el acuerdo
+    prefilter.record_audit(verdict, {"decision": "BLOCK", "verdict_source": "fallback"})
+
+    metrics = prefilter.metrics()
+    assert metrics["skipped"]["BLOCK"] == 1
+    assert metrics["audited"] == 2
+    assert metrics["agreement_rate"] == 0.5
+
+
+if __name__ == "__main__":
+    for name, case in [("SEÑAL", PAPER), ("RUIDO", CHISME), ("DUDOSO", GADGETS)]:
+        print(f"{name}: ruido {ContentPrefilter().noise_probability(case):.1%}")
+    test_blocks_obvious_noise()
+    test_leaves_signal_to_the_llm()
+    test_markup_signals()
+    test_skip_and_agreement_metrics()
+    print("✅ Pre-filtro OK")
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.rate_limiter import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, GeminiRateLimiter, is_quota_error, is_retryable,
+)
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+async def hold(limiter, started: asyncio.Event, release: asyncio.Event):
+    async with limiter.acquire(10):
+        started.set()
+        await release.wait()
+
+
+def test_interactive_overtakes_batch():
+    async def scenario():
+        limiter = GeminiRateLimiter(rpm=1000, tpm=100_000, max_concurrency=1)
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, started, release))
+        await started.wait()
+
+        order = []
+
+        async def call(name, priority):
+            async with limiter.acquire(10, priority):
+                order.append(name)
+
+        # El lote llega antes, pero la petición interactiva pasa primero
+        batch = asyncio.create_task(call("batch", PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        assert limiter.metrics()["waiting"] == {"batch": 1, "interactive": 1}
+
+        release.set()
+        await asyncio.gather(holder, batch, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_waits_for_rpm_and_tpm_refill():
+    async def timed(limiter, tokens):
+        start = time.monotonic()
+        async with limiter.acquire(tokens):
+            pass
+        return time.monotonic() - start
+
+    async def scenario():
+        # 600 RPM = 10 peticiones/s: con el bucket vacío, ~0.1 s hasta la siguiente
+        limiter = GeminiRateLimiter(rpm=600, tpm=1_000_000, max_concurrency=4)
+        limiter.requests.available = 0.0
+        rpm_wait = await timed(limiter, 10)
+
+        # 6000 TPM = 100 tokens/s: 20 tokens sin saldo son ~0.2 s
+        limiter = GeminiRateLimiter(rpm=1000, tpm=6000, max_concurrency=4)
+        limiter.tokens.available = 0.0
+        tpm_wait = await timed(limiter, 20)
+        return rpm_wait, tpm_wait, limiter
+
+    rpm_wait, tpm_wait, limiter = asyncio.run(scenario())
+    assert 0.07 <= rpm_wait < 0.5
+    assert 0.15 <= tpm_wait < 0.6
+    assert limiter.tokens_reserved == 20 and limiter.in_flight == 0
+
+
+def test_aimd_halves_on_quota_error_and_recovers():
+    async def scenario():
+        limiter = GeminiRateLimiter(rpm=100_000, tpm=10_000_000, max_concurrency=8, min_concurrency=2)
+        try:
+            async with limiter.acquire(10):
+                raise QuotaError("429 RESOURCE_EXHAUSTED")
+        except QuotaError:
+            pass
+        halved = limiter.concurrency_limit
+        # El bucket de peticiones se vacía: pausa corta para toda la cola
+        paused = limiter.requests.available < 1
+
+        for _ in range(3):
+            try:
+                async with limiter.acquire(10):
+                    raise QuotaError("429")
+            except QuotaError:
+                pass
+        floor = limiter.concurrency_limit
+
+        # Aumento aditivo: +1/límite por éxito hasta volver al máximo
+        for _ in range(60):
+            async with limiter.acquire(10):
+                pass
+        return halved, paused, floor, limiter
+
+    halved, paused, floor, limiter = asyncio.run(scenario())
+    assert halved == 4 and paused
+    assert floor == 2  # nunca por debajo de min_concurrency
+    assert limiter.concurrency_limit == 8 and limiter.throttled == 4
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    async def scenario():
+        limiter = GeminiRateLimiter(rpm=1000, tpm=100_000, max_concurrency=1)
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, started, release))
+        await started.wait()
+
+        async def waiting():
+            async with limiter.acquire(10, PRIORITY_BATCH):
+                raise AssertionError("no debería obtener turno")
+
+        waiter = asyncio.create_task(waiting())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        release.set()
+        await holder
+
+        async def call():
+            async with limiter.acquire(10):
+                pass
+
+        # El hueco que dejó el cancelado no se pierde: la siguiente llamada pasa sin esperar
+        await asyncio.wait_for(call(), timeout=0.5)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.granted == 2
+    assert limiter.metrics()["waiting"] == {}
+
+
+def test_retryable_classification():
+    class HttpError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"HTTP {status_code}")
+            self.status_code = status_code
+
+    # Transitorios
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(ConnectionError("reset"))
+    assert is_retryable(QuotaError("cuota"))
+    assert is_retryable(HttpError(503))
+    assert is_retryable(Exception("503 UNAVAILABLE: backend overloaded"))
+    # Fallarían igual al reintentar
+    assert not is_retryable(ValueError("La respuesta no es JSON"))
+    assert not is_retryable(json.JSONDecodeError("Expecting value", "", 0))
+    assert not is_retryable(HttpError(400))
+    assert not is_retryable(HttpError(403))
+
+    assert is_quota_error(QuotaError("x"))
+    assert is_quota_error(Exception("RESOURCE_EXHAUSTED"))
+    assert not is_quota_error(HttpError(503))
+
+
+if __name__ == "__main__":
+    test_interactive_overtakes_batch()
+    test_waits_for_rpm_and_tpm_refill()
+    test_aimd_halves_on_quota_error_and_recovers()
+    test_cancelled_waiter_leaves_no_slot_behind()
+    test_retryable_classification()
+    print("✅ Limitador de Gemini OK")
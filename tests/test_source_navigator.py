@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.http_fetcher import HttpFetchError
+from app.services.source_navigator import (
+    TIER_BROWSER, TIER_HTTP, DomainTierMemory, SourceNavigator, looks_like_spa_shell,
+)
+
+PARAGRAPH = "<p>" + "El artículo explica con datos propios cómo reducir el coste de la atención. " * 4 + "</p>"
+ARTICLE = f"<html><head><title>Artículo</title></head><body><div id='root'><article>{PARAGRAPH * 6}</article></div></body></html>"
+# Con banner de cookies: supera min_text_chars, así que escala por la heurística de SPA
+SPA_SHELL = ("<html><head><title>App</title><script src='/main.js'></script></head><body>"
+             "<div class='cookies'>" + "Usamos cookies propias y de terceros para mejorar tu experiencia. " * 4 + "</div>"
+             "<noscript>You need to enable JavaScript to run this app.</noscript><div id=\"root\"></div></body></html>")
+
+
+class FakeHttp:
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.fetched = []
+
+    async def fetch(self, url: str) -> str:
+        self.fetched.append(url)
+        page = self.pages.get(url)
+        if page is None:
+            raise HttpFetchError("HTTP 404")
+        return page
+
+    async def close(self):
+        pass
+
+
+class FakePage:
+    def __init__(self, html: str):
+        self.html = html
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        pass
+
+    async def content(self) -> str:
+        return self.html
+
+
+class FakePool:
+    """Chromium ya renderizado: siempre devuelve el artículo completo."""
+
+    def __init__(self):
+        self.pages = 0
+
+    @asynccontextmanager
+    async def page(self, profile):
+        self.pages += 1
+        yield FakePage(ARTICLE)
+
+    async def close(self):
+        pass
+
+
+def test_spa_shell_heuristic():
+    assert looks_like_spa_shell(SPA_SHELL)
+    assert looks_like_spa_shell('<body><div id="__next">  </div></body>')
+    assert looks_like_spa_shell("<body><app-root></app-root></body>")
+    assert looks_like_spa_shell("<p>Por favor, activa el JavaScript de tu navegador</p>")
+    # Un artículo real montado en #root (SSR) no es un cascarón
+    assert not looks_like_spa_shell(ARTICLE)
+    assert not looks_like_spa_shell('<div id="root-note"></div><p>Texto</p>')
+
+
+def test_spa_shell_escalates_and_domain_is_remembered():
+    async def scenario():
+        http = FakeHttp({"https://spa.example/a": SPA_SHELL, "https://spa.example/b": SPA_SHELL,
+                         "https://blog.example/post": ARTICLE})
+        pool = FakePool()
+        navigator = SourceNavigator(pool=pool, http=http, min_text_chars=200)
+
+        first = await navigator.fetch_and_clean("https://spa.example/a")
+        second = await navigator.fetch_and_clean("https://spa.example/b")
+        article = await navigator.fetch_and_clean("https://blog.example/post")
+        return navigator, http, pool, first, second, article
+
+    navigator, http, pool, first, second, article = asyncio.run(scenario())
+    assert first["tier"] == TIER_BROWSER and second["tier"] == TIER_BROWSER
+    # El segundo ítem del dominio SPA va directo al navegador: sin sonda HTTP
+    assert http.fetched == ["https://spa.example/a", "https://blog.example/post"]
+    assert article["tier"] == TIER_HTTP and pool.pages == 2
+    assert navigator.tier_counts == {TIER_HTTP: 1, TIER_BROWSER: 2, "escalations": 1}
+    assert navigator.domain_tiers.snapshot() == {"spa.example": TIER_BROWSER, "blog.example": TIER_HTTP}
+
+
+def test_tier_memory_expires():
+    memory = DomainTierMemory(ttl=0.05, max_entries=10)
+    memory.record("spa.example", TIER_BROWSER)
+    assert memory.get("spa.example") == TIER_BROWSER
+    time.sleep(0.06)
+    assert memory.snapshot() == {}
+    assert memory.get("spa.example") is None
+    assert "spa.example" not in memory._entries
+
+
+def test_tier_memory_evicts_least_recently_used():
+    memory = DomainTierMemory(ttl=60, max_entries=2)
+    memory.record("a.example", TIER_HTTP)
+    memory.record("b.example", TIER_BROWSER)
+    assert memory.get("a.example") == TIER_HTTP  # "a" pasa a ser el más reciente
+    memory.record("c.example", TIER_HTTP)         # expulsa a "b"
+    assert memory.snapshot() == {"a.example": TIER_HTTP, "c.example": TIER_HTTP}
+    assert memory.get("b.example") is None
+
+
+if __name__ == "__main__":
+    test_spa_shell_heuristic()
+    test_spa_shell_escalates_and_domain_is_remembered()
+    test_tier_memory_expires()
+    test_tier_memory_evicts_least_recently_used()
+    print("✅ Navegación por tiers OK")
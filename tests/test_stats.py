@@ -0,0 +1,147 @@
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import ContentStatsDaily, UserStatsDaily
+from app.db.stats import UNCATEGORIZED, _daily_upserts, dashboard_stats, stats_upserts
+
+BEFORE_MIDNIGHT = datetime(2026, 3, 1, 23, 59, 30, tzinfo=timezone.utc)
+AFTER_MIDNIGHT = datetime(2026, 3, 2, 0, 0, 15, tzinfo=timezone.utc)
+
+
+def row(analyzed_at=BEFORE_MIDNIGHT, category="PROFESIONAL", is_signal=True, score=0.8, read=120,
+        user_id=None, interest_id=None):
+    return dict(analyzed_at=analyzed_at, category_code=category, is_signal=is_signal, signal_score=score,
+                estimated_read_time_seconds=read, user_id=user_id, interest_id=interest_id)
+
+
+def params(stmt) -> dict:
+    return stmt.compile(dialect=postgresql.dialect()).params
+
+
+def test_counters_are_bucketed_by_analysis_day():
+    # Un lote que cruza la medianoche reparte las filas entre sus dos días
+    statements = _daily_upserts(ContentStatsDaily, [
+        row(AFTER_MIDNIGHT, is_signal=False, score=0.2),
+        row(BEFORE_MIDNIGHT),
+        row(BEFORE_MIDNIGHT + timedelta(seconds=10), score=0.6),
+    ])
+    counters = {p["day"]: p for p in map(params, statements)}
+    assert set(counters) == {date(2026, 3, 1), date(2026, 3, 2)}
+
+    first, second = counters[date(2026, 3, 1)], counters[date(2026, 3, 2)]
+    assert (first["total_items"], first["blocked_items"], first["score_count"]) == (2, 0, 2)
+    assert abs(first["score_sum"] - 1.4) < 1e-9
+    assert (second["total_items"], second["blocked_items"], second["time_saved_seconds"]) == (1, 1, 120)
+
+
+def test_day_uses_utc_for_aware_timestamps():
+    madrid = timezone(timedelta(hours=1))
+    statements = _daily_upserts(ContentStatsDaily, [row(datetime(2026, 3, 2, 0, 30, tzinfo=madrid))])
+    assert params(statements[0])["day"] == date(2026, 3, 1)
+
+
+def test_upserts_are_sorted_by_key():
+    rows = [
+        row(AFTER_MIDNIGHT, category="RUIDO", user_id=7),
+        row(BEFORE_MIDNIGHT, category="RUIDO", user_id=3),
+        row(AFTER_MIDNIGHT, category=None, user_id=3),
+        row(BEFORE_MIDNIGHT, category="NOTICIAS", user_id=7),
+    ]
+    keys = [(p["user_id"], p["day"], p["category_code"])
+            for p in map(params, _daily_upserts(UserStatsDaily, rows, keys=("user_id",)))]
+    # Mismo orden sin importar el orden de llegada: (día, categoría, usuario)
+    assert keys == [
+        (7, date(2026, 3, 1), "NOTICIAS"),
+        (3, date(2026, 3, 1), "RUIDO"),
+        (7, date(2026, 3, 2), "RUIDO"),
+        (3, date(2026, 3, 2), UNCATEGORIZED),
+    ]
+    reversed_keys = [(p["user_id"], p["day"], p["category_code"])
+                     for p in map(params, _daily_upserts(UserStatsDaily, rows[::-1], keys=("user_id",)))]
+    assert reversed_keys == keys
+
+
+def test_stats_upserts_split_global_and_per_user_rows():
+    analysis = row(is_signal=False, user_id=None)
+    own = row(is_signal=False, user_id=5)
+    delivery = row(is_signal=True, user_id=9, interest_id=2)
+    statements = stats_upserts([analysis, own, delivery])
+
+    tables = [stmt.table.name for stmt in statements]
+    assert tables == ["content_stats_daily", "user_stats_daily", "user_stats_daily", "users"]
+    # Globales: el análisis y la fila del solicitante, no la entrega del fan-out
+    assert params(statements[0])["total_items"] == 2
+    assert [params(s)["user_id"] for s in statements[1:3]] == [5, 9]
+    # Solo el usuario con contenido bloqueado recalcula su tiempo ahorrado
+    assert "users.id IN" in str(statements[3].compile(dialect=postgresql.dialect()))
+    assert params(statements[3])["id_1"] == [5]
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+
+    def filter(self, *criteria):
+        self.filters.extend(criteria)
+        return self
+
+    def group_by(self, *columns):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.last_query = FakeQuery(rows)
+
+    def query(self, *columns):
+        return self.last_query
+
+
+def counters(category, total, blocked, seconds, score_sum, score_count):
+    return SimpleNamespace(category_code=category, total_items=total, blocked_items=blocked,
+                           time_saved_seconds=seconds, score_sum=score_sum, score_count=score_count)
+
+
+def test_dashboard_kpis():
+    db = FakeSession([
+        counters("PROFESIONAL", 8, 2, 600, 5.6, 8),
+        counters("RUIDO", 2, 2, 300, 0.4, 2),
+    ])
+    stats = dashboard_stats(db, days=7, category=None, user_id=4)
+
+    assert stats["total_items"] == 10 and stats["blocked_items"] == 4
+    assert stats["noise_ratio"] == 40.0
+    assert stats["time_saved_minutes"] == 15
+    assert stats["digital_health_score"] == 6.0  # (5.6 + 0.4) / 10 en escala 0-10
+    assert stats["window_days"] == 7
+    assert stats["by_category"]["RUIDO"] == {"total_items": 2, "blocked_items": 2, "noise_ratio": 100.0,
+                                             "time_saved_minutes": 5, "digital_health_score": 2.0}
+    # Filtros: usuario y ventana de días
+    assert len(db.last_query.filters) == 2
+
+
+def test_dashboard_without_data():
+    stats = dashboard_stats(FakeSession([]))
+    assert stats["total_items"] == 0 and stats["noise_ratio"] == 0 and stats["digital_health_score"] == 0
+    assert stats["by_category"] == {} and stats["window_days"] is None
+
+
+if __name__ == "__main__":
+    test_counters_are_bucketed_by_analysis_day()
+    test_day_uses_utc_for_aware_timestamps()
+    test_upserts_are_sorted_by_key()
+    test_stats_upserts_split_global_and_per_user_rows()
+    test_dashboard_kpis()
+    test_dashboard_without_data()
+    print("✅ Contadores del dashboard OK")
@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.content_scorer import partial_reasoning
+
+RESPONSE = json.dumps({
+    "quality_score": 0.8,
+    "analysis_reasoning": "Explica \"por qué\" el artículo es útil:\n— datos propios 📊",
+    "is_clickbait": False,
+})
+
+
+def test_prefixes_grow_monotonically():
+    # Cada trozo del stream da un prefijo del texto final: el cliente solo añade deltas
+    final = json.loads(RESPONSE)["analysis_reasoning"]
+    previous = ""
+    for end in range(len(RESPONSE) + 1):
+        current = partial_reasoning(RESPONSE[:end])
+        assert final.startswith(current)
+        assert current.startswith(previous)
+        previous = current
+    assert previous == final
+
+
+def test_without_field_yet():
+    assert partial_reasoning('{"quality_score": 0.8, ') == ""
+    assert partial_reasoning("") == ""
+
+
+def test_markdown_fence_and_incomplete_escape():
+    text = '```json\n{"analysis_reasoning": "línea\\'
+    assert partial_reasoning(text) == "línea"
+    assert partial_reasoning(text + 'nsiguiente') == "línea\nsiguiente"
+    assert partial_reasoning('{"analysis_reasoning": "caf\\u00') == "caf"
+
+
+if __name__ == "__main__":
+    test_prefixes_grow_monotonically()
+    test_without_field_yet()
+    test_markdown_fence_and_incomplete_escape()
+    print("✅ Razonamiento parcial OK")
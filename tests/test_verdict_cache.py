@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Aseguramos que Python encuentre el módulo 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.verdict_cache import VerdictCache, verdict_cache_key
+
+
+class _Result:
+    rowcount = 3
+
+    def __init__(self, row=None):
+        self.row = row
+
+    def one_or_none(self):
+        return self.row
+
+
+class RecordingSession:
+    """Sesión falsa: guarda las sentencias en vez de ir a Postgres."""
+
+    def __init__(self, statements: list, fail: bool = False, row=None):
+        self.statements = statements
+        self.fail = fail
+        self.row = row
+
+    async def __aenter__(self):
+        if self.fail:
+            raise ConnectionError("sin base de datos")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result(self.row)
+
+    async def commit(self):
+        pass
+
+
+def offline_cache(max_entries: int = 2, **ttls) -> VerdictCache:
+    # La DB "no está": el nivel en memoria funciona solo
+    return VerdictCache(max_entries=max_entries, session_factory=lambda: RecordingSession([], fail=True),
+                        prompt_version="v-test", **ttls)
+
+
+class SharedTable:
+    """La fila de verdict_cache que ven todas las réplicas (None: no hay o se borró)."""
+
+    def __init__(self, verdict: dict, expires_in: float):
+        self.row = (verdict, datetime.now(timezone.utc) + timedelta(seconds=expires_in))
+
+    def session(self):
+        return RecordingSession([], row=self.row)
+
+
+def sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_key_ignores_whitespace_and_case():
+    a = verdict_cache_key("Sparse  Attention\n reduces cost", " Transformers ", "PROFESIONAL", "v1")
+    b = verdict_cache_key("sparse attention reduces   COST", "transformers", "PROFESIONAL", "v1")
+    assert a == b
+    # Otro prompt, otra categoría u otro texto => otra clave
+    assert a != verdict_cache_key("sparse attention reduces cost", "transformers", "PROFESIONAL", "v2")
+    assert a != verdict_cache_key("sparse attention reduces cost", "transformers", "OCIO_SANO", "v1")
+    assert a != verdict_cache_key("dense attention reduces cost", "transformers", "PROFESIONAL", "v1")
+
+
+def test_memory_tier_is_lru():
+    async def scenario():
+        cache = offline_cache(max_entries=2)
+        await cache.put("a", {"decision": "SHOW"})
+        await cache.put("b", {"decision": "BLOCK"})
+        assert await cache.get("a") == {"decision": "SHOW"}  # "a" pasa a ser la más reciente
+        await cache.put("c", {"decision": "SHOW"})            # expulsa a "b"
+        return cache, await cache.get("a"), await cache.get("b"), await cache.get("c")
+
+    cache, a, b, c = asyncio.run(scenario())
+    assert a is not None and b is None and c is not None
+    assert cache.metrics()["memory_entries"] == 2
+    assert cache.memory_hits == 3 and cache.misses == 1
+
+
+def test_returned_verdicts_are_copies():
+    async def scenario():
+        cache = offline_cache()
+        await cache.put("a", {"decision": "SHOW"})
+        verdict = await cache.get("a")
+        verdict["decision"] = "BLOCK"
+        return await cache.get("a")
+
+    assert asyncio.run(scenario()) == {"decision": "SHOW"}
+
+
+def test_purge_stale_and_clear():
+    statements = []
+    cache = VerdictCache(session_factory=lambda: RecordingSession(statements), prompt_version="v-test")
+
+    async def scenario():
+        await cache.put("a", {"decision": "SHOW"})
+        purged = await cache.purge_stale()
+        cleared = await cache.clear()
+        return purged, cleared
+
+    purged, cleared = asyncio.run(scenario())
+    assert purged == 3 and cleared == 3
+    # purge_stale: solo otra versión del prompt o expirados; clear: todo, también la memoria
+    stale = sql(statements[1])
+    assert stale.startswith("DELETE FROM verdict_cache WHERE")
+    assert "prompt_version != 'v-test'" in stale and "expires_at <=" in stale
+    assert sql(statements[2]) == "DELETE FROM verdict_cache"
+    assert cache.metrics()["memory_entries"] == 0
+
+
+def test_memory_entries_expire_with_the_verdict():
+    async def scenario():
+        cache = offline_cache(ttl_seconds=0.05)
+        await cache.put("a", {"decision": "SHOW"})
+        fresh = await cache.get("a")
+        time.sleep(0.06)
+        return cache, fresh, await cache.get("a")
+
+    cache, fresh, expired = asyncio.run(scenario())
+    assert fresh == {"decision": "SHOW"} and expired is None
+    assert cache.metrics()["memory_entries"] == 0 and cache.misses == 1
+
+
+def test_db_hit_is_kept_in_memory_until_the_row_expires():
+    async def scenario():
+        table = SharedTable({"decision": "BLOCK"}, expires_in=0.05)
+        cache = VerdictCache(session_factory=table.session, prompt_version="v-test")
+        first, second = await cache.get("a"), await cache.get("a")
+        time.sleep(0.06)
+        table.row = None  # la DB ya no la devuelve (expires_at vencido)
+        return cache, first, second, await cache.get("a")
+
+    cache, first, second, expired = asyncio.run(scenario())
+    assert first == second == {"decision": "BLOCK"} and expired is None
+    assert (cache.db_hits, cache.memory_hits, cache.misses) == (1, 1, 1)
+
+
+def test_clear_on_another_replica_reaches_memory():
+    async def scenario():
+        table = SharedTable({"decision": "SHOW"}, expires_in=3600)
+        cache = VerdictCache(session_factory=table.session, prompt_version="v-test", memory_ttl=0.05)
+        cached = await cache.get("a")
+        table.row = None  # otra réplica ejecutó clear()
+        time.sleep(0.06)
+        return cached, await cache.get("a")
+
+    cached, after_clear = asyncio.run(scenario())
+    assert cached == {"decision": "SHOW"} and after_clear is None
+
+
+if __name__ == "__main__":
+    test_key_ignores_whitespace_and_case()
+    test_memory_tier_is_lru()
+    test_returned_verdicts_are_copies()
+    test_purge_stale_and_clear()
+    test_memory_entries_expire_with_the_verdict()
+    test_db_hit_is_kept_in_memory_until_the_row_expires()
+    test_clear_on_another_replica_reaches_memory()
+    print("✅ Caché de veredictos OK")